@@ -0,0 +1,56 @@
+import os
+import sys
+import glob
+import json
+import numpy as np
+from dotenv import load_dotenv
+
+# Repo-Root in den Pfad, damit 'src' importierbar ist (wie in tests/)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.vector_store import LocalVectorStore
+
+load_dotenv()
+
+DEFAULT_CORPUS_FOLDER = os.getenv("LOCAL_VECTOR_STORE_PATH", "data/vectors")
+
+def load_chunk_vectors(folder: str = DEFAULT_CORPUS_FOLDER):
+    """
+    Lädt die Chunk-Vektoren entweder aus einem LocalVectorStore (Upload-Checkpoint)
+    oder aus JSON-Chunks mit 'contentVector'. Rückgabe: (ids, float32 Matrix).
+    """
+    if os.path.exists(os.path.join(folder, "meta.json")):
+        ids, matrix = LocalVectorStore(folder).load()
+        if not ids:
+            raise FileNotFoundError(f"Vector Store '{folder}' ist leer.")
+        return ids, np.asarray(matrix, dtype=np.float32)
+
+    ids, vectors = [], []
+    for file_path in sorted(glob.glob(os.path.join(folder, "*.json"))):
+        with open(file_path, "r", encoding="utf-8") as f:
+            chunks = json.load(f)
+        for chunk in chunks:
+            if chunk.get("contentVector"):
+                ids.append(chunk["id"])
+                vectors.append(chunk["contentVector"])
+
+    if not vectors:
+        raise FileNotFoundError(f"Keine Chunks mit 'contentVector' in '{folder}' gefunden.")
+    return ids, np.asarray(vectors, dtype=np.float32)
+
+def load_query_vectors(path: str) -> np.ndarray:
+    """Lädt Query-Vektoren (z.B. SOP Claims) aus einer .npy Datei oder einer JSON-Liste."""
+    if path.endswith(".npy"):
+        return np.load(path).astype(np.float32)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return np.asarray([d["vector"] if isinstance(d, dict) else d for d in data], dtype=np.float32)
+
+def split_queries(matrix: np.ndarray, n_queries: int, seed: int = 42):
+    """Zieht n_queries Vektoren als Held-out Queries aus dem Corpus. Rückgabe: (corpus, queries)."""
+    rng = np.random.default_rng(seed)
+    n_queries = min(n_queries, matrix.shape[0] // 2)
+    query_idx = rng.choice(matrix.shape[0], size=n_queries, replace=False)
+    mask = np.ones(matrix.shape[0], dtype=bool)
+    mask[query_idx] = False
+    return matrix[mask], matrix[query_idx]
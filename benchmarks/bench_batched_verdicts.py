@@ -0,0 +1,121 @@
+"""
+Batched Verdicts Benchmark: ein Urteils-Request pro Claim vs. gruppierte Requests
+(Claims mit überlappender Regulatorik in einem Structured-Output Request).
+
+    python benchmarks/bench_batched_verdicts.py --claims d:/sop/sop_test_CLAIMS.md --chunks data/json
+    python benchmarks/bench_batched_verdicts.py --sections 12 --claims-per-section 5 --batch 6   # synthetisch
+
+Läuft komplett offline: Retrieval per lokalem BM25 über die Chunk-JSONs (bzw. synthetische
+Treffer), das Chat-Modell ist ein Fake, der Requests und Tokens zählt. Gemessen wird
+derselbe Code-Pfad wie im Audit (audit_claims).
+"""
+import os
+import sys
+import re
+import json
+import argparse
+import tempfile
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src_sop_auditor')))
+
+import sop_audit_pipeline as pipeline
+from rate_limiter import AdaptiveRateLimiter
+from token_counter import count_tokens
+from src.bm25 import BM25Index
+from src.index_rebuild import iter_chunks
+from src.retrieval_backend import CHUNK_SOURCE
+
+# Typische Länge eines Einzelurteils (Status, Begründung, Zitat)
+VERDICT_TEXT = ("**Status:** ⚠️ WARNUNG\n**Begründung:** Die SOP nennt keine Frist für die Aktualisierung. "
+                "**Zitat / Referenz:** Art. 84 MDR: 'Der Plan zur Überwachung nach dem Inverkehrbringen ...'")
+
+def synthetic_claims(sections, per_section):
+    """Claims pro SOP-Abschnitt treffen überwiegend dieselben MDR Artikel (wie in echten SOPs)."""
+    claims, hits = [], {}
+    for s in range(sections):
+        articles = [f"mdr_art_{80 + s}_{p}" for p in range(4)]
+        for c in range(per_section):
+            content = f"Regel {s}.{c}: Der Hersteller dokumentiert Schritt {c} des Prozesses {s} im QMS."
+            claims.append((f"Regel {s}.{c}", content))
+            chosen = [articles[(c + k) % len(articles)] for k in range(3)]
+            hits[content] = [{"id": a, "source_type": "MDR", "title": f"Artikel {80 + s}",
+                              "content": f"Anforderung aus {a}. " * 40, "chapter": None} for a in chosen]
+    return claims, hits
+
+def bm25_hits(claims, chunk_source, top):
+    chunks = {c["id"]: c for c in iter_chunks(chunk_source) if c.get("id")}
+    index = BM25Index.build((cid, f"{c.get('title') or ''} {c.get('content') or ''}") for cid, c in chunks.items())
+    return {content: [{field: chunks[cid].get(field) for field in pipeline.RETRIEVAL_FIELDS}
+                      for cid, _ in index.search(content, top)] for _, content in claims}
+
+def make_clients(hits):
+    stats = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    def chat(model, messages, timeout, response_format=None):
+        prompt = messages[-1]["content"]
+        if response_format is None:
+            content = VERDICT_TEXT
+        else:
+            ids = [int(n) for n in re.findall(r"\[claim_id (\d+)\]", prompt)]
+            content = json.dumps({"verdicts": [{"claim_id": n, "status": "WARNUNG",
+                                                "begruendung": VERDICT_TEXT, "zitat": ""} for n in ids]}, ensure_ascii=False)
+        stats["calls"] += 1
+        stats["prompt_tokens"] += sum(count_tokens(m["content"]) for m in messages)
+        stats["completion_tokens"] += count_tokens(content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    def embed(input, model, dimensions, timeout):
+        texts = input if isinstance(input, list) else [input]
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[1.0, 0.0]) for i in range(len(texts))])
+
+    chat_client, emb_client, retriever = MagicMock(), MagicMock(), MagicMock()
+    chat_client.chat.completions.create.side_effect = chat
+    emb_client.embeddings.create.side_effect = embed
+    retriever.search.side_effect = lambda text, vector, top, select: hits.get(text, [])
+    return chat_client, emb_client, retriever, stats
+
+def run(claims_md, hits, batch_size, workers):
+    chat_client, emb_client, retriever, stats = make_clients(hits)
+    pipeline.audit_claims(claims_md, retriever, emb_client, chat_client,
+                          partial_report_path=os.path.join(tempfile.mkdtemp(), "partial.md"),
+                          max_workers=workers, limiter=AdaptiveRateLimiter(rate=1e6, max_rate=1e6),
+                          verdict_batch_size=batch_size)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Urteile: ein Request pro Claim vs. gruppiert")
+    parser.add_argument("--claims", help="_CLAIMS.md aus der Pipeline (sonst synthetisch)")
+    parser.add_argument("--chunks", default=CHUNK_SOURCE,
+                        help="Chunk-JSONs für das lokale BM25 Retrieval")
+    parser.add_argument("--sections", type=int, default=10)
+    parser.add_argument("--claims-per-section", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=6, help="Max. Claims pro Request")
+    parser.add_argument("--top", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    if args.claims:
+        with open(args.claims, "r", encoding="utf-8") as f:
+            claims_md = f.read()
+        claims = pipeline.parse_claims(claims_md)
+        print(f"🔎 BM25 Retrieval für {len(claims)} Claims über '{args.chunks}'...")
+        hits = bm25_hits(claims, args.chunks, args.top)
+    else:
+        claims, hits = synthetic_claims(args.sections, args.claims_per_section)
+        claims_md = "\n\n".join(f"### Claim: {title}\n{content}" for title, content in claims)
+        print(f"🛠️ Synthetische SOP: {args.sections} Abschnitte x {args.claims_per_section} Claims")
+
+    single = run(claims_md, hits, 1, args.workers)
+    batched = run(claims_md, hits, args.batch, args.workers)
+
+    print(f"\n{'Modus':<22} {'Requests':>9} {'Prompt-Tokens':>14} {'Output-Tokens':>14}")
+    for name, stats in (("1 Request pro Claim", single), (f"Gruppiert (max. {args.batch})", batched)):
+        print(f"{name:<22} {stats['calls']:>9} {stats['prompt_tokens']:>14} {stats['completion_tokens']:>14}")
+    print(f"\n📉 Requests: -{100 * (1 - batched['calls'] / max(single['calls'], 1)):.0f}%, "
+          f"Prompt-Tokens: -{100 * (1 - batched['prompt_tokens'] / max(single['prompt_tokens'], 1)):.0f}%")
+
+if __name__ == "__main__":
+    main()
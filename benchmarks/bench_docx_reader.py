@@ -0,0 +1,68 @@
+"""
+DOCX Reader Benchmark: python-docx (bisheriger Weg) vs. Streaming-Reader (zipfile + lxml).
+
+    python benchmarks/bench_docx_reader.py d:/sop/anhang_200_seiten.docx
+    python benchmarks/bench_docx_reader.py --tables 200 --rows 40   # synthetische SOP mit verbundenen Zellen
+
+Prüft außerdem, dass beide Wege identisches Markdown liefern.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import docx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src_sop_auditor')))
+
+from sop_audit_pipeline import docx_to_raw_markdown_legacy
+from docx_reader import read_docx_markdown
+
+def build_synthetic_sop(path, tables, rows, cols=6):
+    doc = docx.Document()
+    doc.add_heading("Synthetische SOP", level=0)
+    for t in range(tables):
+        doc.add_heading(f"Anhang {t}", level=1)
+        doc.add_paragraph(f"Tabelle {t}: Anforderungen, Verantwortlichkeiten und Fristen. " * 3)
+        table = doc.add_table(rows=rows, cols=cols)
+        for r, row in enumerate(table.rows):
+            for c, cell in enumerate(row.cells):
+                cell.text = f"Anforderung {t}.{r}.{c}"
+        # Verbundene Zellen wie in echten Anhängen: Kopfzeile und Gruppen-Spalte
+        table.cell(0, 0).merge(table.cell(0, cols - 1))
+        for start in range(1, rows - 4, 5):
+            table.cell(start, 0).merge(table.cell(start + 4, 0))
+    doc.save(path)
+
+def timed(fn, path, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(path)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="DOCX Reader: python-docx vs. Streaming")
+    parser.add_argument("path", nargs="?", help="DOCX Datei (sonst synthetische SOP)")
+    parser.add_argument("--tables", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    path = args.path
+    if not path:
+        path = os.path.join(tempfile.mkdtemp(), "synthetic_sop.docx")
+        print(f"🛠️ Erzeuge synthetische SOP ({args.tables} Tabellen x {args.rows} Zeilen)...")
+        build_synthetic_sop(path, args.tables, args.rows)
+    print(f"📄 {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+    legacy_s, legacy_md = timed(docx_to_raw_markdown_legacy, path, args.repeat)
+    fast_s, fast_md = timed(read_docx_markdown, path, args.repeat)
+
+    print(f"🐢 python-docx: {legacy_s:.3f}s")
+    print(f"🚀 Streaming:   {fast_s:.3f}s ({legacy_s / max(fast_s, 1e-9):.1f}x)")
+    print("✅ Markdown identisch" if legacy_md == fast_md else "❌ Markdown weicht ab!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Latenz des lokalen Retrieval Backends (exakte Cosine-Suche im Prozess, kein Netzwerk).
+
+    python benchmarks/bench_local_retrieval.py --input data/vectors --chunks data/json
+    python benchmarks/bench_local_retrieval.py --queries data/sop_claim_vectors.npy --batch 64
+
+Misst Einzel-Queries (wie im Auditor), gebündelte Queries (Bulk Audits) sowie
+BM25 und Hybrid (Vektor + BM25 per RRF) mit Chunk-Textauszügen als Query-Text.
+"""
+import os
+import time
+import argparse
+import numpy as np
+
+from _corpus import DEFAULT_CORPUS_FOLDER, load_query_vectors
+from src.retrieval_backend import LocalVectorBackend
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokales Retrieval Backend: Query-Latenz")
+    parser.add_argument("--input", default=DEFAULT_CORPUS_FOLDER, help="Vector Store Ordner")
+    parser.add_argument("--chunks", default=os.getenv("OUTPUT_JSON_PATH", "data/json"), help="Chunk JSON (Ordner oder Datei)")
+    parser.add_argument("--queries", default=None, help="Query-Vektoren (.npy oder JSON), sonst Corpus-Vektoren")
+    parser.add_argument("--n-queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--batch", type=int, default=64, help="Queries pro Batch für den Bulk-Lauf")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    backend = LocalVectorBackend(args.input, args.chunks)
+    print(f"📦 Geladen: {len(backend.ids)} x {backend.dims} in {time.perf_counter() - start:.2f}s")
+
+    if args.queries:
+        queries = load_query_vectors(args.queries)[:args.n_queries]
+    else:
+        rng = np.random.default_rng(42)
+        rows = rng.choice(len(backend.ids), size=min(args.n_queries, len(backend.ids)), replace=False)
+        queries = np.asarray(backend.matrix[np.sort(rows)], dtype=np.float32)
+
+    latencies = []
+    for q in queries:
+        t = time.perf_counter()
+        backend.search("", q, top=args.k)
+        latencies.append(time.perf_counter() - t)
+    print(f"🔎 Einzel-Query: mean {1000 * np.mean(latencies):.3f} ms | p95 {1000 * np.percentile(latencies, 95):.3f} ms")
+
+    t = time.perf_counter()
+    for s in range(0, len(queries), args.batch):
+        backend.search_vectors(queries[s:s + args.batch], args.k)
+    total = time.perf_counter() - t
+    print(f"📚 Batch ({args.batch}/Request): {1000 * total / max(len(queries), 1):.3f} ms pro Query, {len(queries) / total:.0f} QPS")
+
+    # Query-Texte: Anfang zufälliger Chunks (ähnlich lang wie SOP Claims)
+    texts = [meta["content"][:300] for meta in list(backend.metadata.values())[:len(queries)] if meta.get("content")]
+    if not texts:
+        return
+    t = time.perf_counter()
+    for text in texts:
+        backend.lexical.search(text, args.k)
+    total = time.perf_counter() - t
+    print(f"🔤 BM25: {1000 * total / len(texts):.3f} ms pro Query, {len(texts) / total:.0f} QPS")
+
+    t = time.perf_counter()
+    for text, q in zip(texts, queries):
+        backend.search(text, q, top=args.k)
+    total = time.perf_counter() - t
+    print(f"🔀 Hybrid (RRF): {1000 * total / len(texts):.3f} ms pro Query, {len(texts) / total:.0f} QPS")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Quota Governor Simulation: mehrere Prozesse teilen sich ein Deployment mit TPM/RPM-Limit.
+
+    python benchmarks/bench_quota_governor.py
+    python benchmarks/bench_quota_governor.py --batch-procs 4 --tpm 60000 --window 2 --seconds 20
+
+Läuft komplett offline: ein Fake-Azure (Sliding Window über eine eigene SQLite-Datei, für alle
+Prozesse gemeinsam) nimmt Requests an oder antwortet mit 429. Verglichen werden
+  - ungeregelt: jeder Prozess nur mit eigenem AdaptiveRateLimiter (bisheriger Stand)
+  - Governor:   zusätzlich der gemeinsame QuotaGovernor (Batch-Prozesse 'batch', einer 'interactive')
+Gemessen: Auslastung des Budgets, Anzahl 429, Latenz der interaktiven Requests.
+Das Minutenfenster ist auf --window Sekunden verkürzt, damit die Simulation schnell läuft.
+"""
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+import multiprocessing
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src_sop_auditor')))
+
+from rate_limiter import AdaptiveRateLimiter
+from src.quota_governor import QuotaGovernor
+
+DEPLOYMENT = "chat"
+
+class ThrottledError(Exception):
+    """Wie openai.RateLimitError: status_code 429 + Retry-After Header."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("429 Too Many Requests")
+        self.status_code = 429
+        self.response = SimpleNamespace(headers={"retry-after": f"{retry_after:.3f}"})
+
+class FakeAzure:
+    """Sliding-Window TPM/RPM-Limit wie beim Deployment, geteilt über eine SQLite-Datei."""
+
+    def __init__(self, path: str, tpm: int, rpm: int, window: float, latency: float):
+        self.tpm, self.rpm, self.window, self.latency = tpm, rpm, window, latency
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS log (ts REAL, tokens INTEGER, accepted INTEGER, priority TEXT)")
+
+    def create(self, tokens: int, priority: str):
+        self._db.execute("BEGIN IMMEDIATE")
+        now = time.time()
+        used_tokens, used_requests = self._db.execute(
+            "SELECT COALESCE(SUM(tokens), 0), COUNT(*) FROM log WHERE accepted = 1 AND ts > ?", (now - self.window,)).fetchone()
+        accepted = used_tokens + tokens <= self.tpm and used_requests + 1 <= self.rpm
+        self._db.execute("INSERT INTO log VALUES (?, ?, ?, ?)", (now, tokens, int(accepted), priority))
+        self._db.execute("COMMIT")
+        if not accepted:
+            raise ThrottledError(self.window / 10)
+        time.sleep(self.latency)
+        return SimpleNamespace(usage=SimpleNamespace(total_tokens=tokens))
+
+def client_process(args, mode, priority, tokens, interval, stop_at, latencies):
+    server = FakeAzure(args.server_db, args.tpm, args.rpm, args.window, args.latency)
+    limiter = AdaptiveRateLimiter(rate=5.0, max_rate=20.0, max_retries=50)
+    governor = None
+    if mode == "governor":
+        governor = QuotaGovernor(args.governor_db, budgets={DEPLOYMENT: (args.tpm, args.rpm)}, window=args.window)
+
+    while time.time() < stop_at:
+        start = time.perf_counter()
+        try:
+            if governor is None:
+                limiter.call(server.create, tokens, priority)
+            else:
+                limiter.call(governor.call, DEPLOYMENT, server.create, tokens, priority,
+                             priority=priority, tokens=tokens)
+        except ThrottledError:
+            pass
+        if priority == "interactive":
+            latencies.append(time.perf_counter() - start)
+        if interval:
+            time.sleep(interval)
+
+def run(args, mode):
+    with tempfile.TemporaryDirectory() as tmp:
+        args.server_db = os.path.join(tmp, "azure.sqlite")
+        args.governor_db = os.path.join(tmp, "governor.sqlite")
+        FakeAzure(args.server_db, args.tpm, args.rpm, args.window, args.latency)
+
+        manager = multiprocessing.Manager()
+        latencies = manager.list()
+        start = time.time()
+        stop_at = start + args.seconds
+        procs = [multiprocessing.Process(target=client_process,
+                                         args=(args, mode, "batch", args.batch_tokens, 0.0, stop_at, latencies))
+                 for _ in range(args.batch_procs)]
+        procs.append(multiprocessing.Process(target=client_process,
+                                             args=(args, mode, "interactive", args.interactive_tokens,
+                                                   args.interactive_interval, stop_at, latencies)))
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+
+        db = sqlite3.connect(args.server_db)
+        rows = db.execute("SELECT ts, tokens, accepted FROM log").fetchall()
+        lat = np.array(list(latencies)) if len(latencies) else np.zeros(1)
+        manager.shutdown()
+
+    # Erstes Fenster ist Anlauf (alle starten mit leerem Fenster), gemessen wird danach
+    steady = [(ts, tokens, accepted) for ts, tokens, accepted in rows if start + args.window <= ts < stop_at]
+    budget = args.tpm * (args.seconds - args.window) / args.window
+    used = sum(tokens for _, tokens, accepted in steady if accepted)
+    throttled = [ts for ts, _, accepted in rows if not accepted]
+    per_second = np.bincount([int(ts - start) for ts in throttled]) if throttled else np.zeros(1, dtype=int)
+    return {
+        "utilization": used / budget,
+        "throttled": len(throttled),
+        "burst": int(per_second.max()),
+        "p50": float(np.percentile(lat, 50)),
+        "p95": float(np.percentile(lat, 95)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Quota Governor: Auslastung und 429 bei mehreren Prozessen")
+    parser.add_argument("--batch-procs", type=int, default=3)
+    parser.add_argument("--tpm", type=int, default=30000, help="Token-Limit pro Fenster")
+    parser.add_argument("--rpm", type=int, default=60, help="Request-Limit pro Fenster")
+    parser.add_argument("--window", type=float, default=2.0, help="Länge des 'Minuten'-Fensters in Sekunden")
+    parser.add_argument("--seconds", type=float, default=12.0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--batch-tokens", type=int, default=1500)
+    parser.add_argument("--interactive-tokens", type=int, default=400)
+    parser.add_argument("--interactive-interval", type=float, default=0.5)
+    args = parser.parse_args()
+
+    print(f"⚙️ {args.batch_procs} Batch-Prozesse + 1 interaktiver, Budget {args.tpm} Tokens / {args.rpm} Requests "
+          f"pro {args.window:.0f}s, {args.seconds:.0f}s Laufzeit")
+    print(f"📊 {'Modus':<12} {'Auslastung':>10} {'429':>6} {'max 429/s':>10} {'interaktiv p50':>15} {'p95':>8}")
+    for mode in ("ungeregelt", "governor"):
+        r = run(args, mode)
+        print(f"   {mode:<12} {r['utilization']:>9.1%} {r['throttled']:>6} {r['burst']:>10} "
+              f"{r['p50'] * 1000:>13.0f}ms {r['p95'] * 1000:>6.0f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Offline Benchmark: Embedding-Dimensionen & Vektor-Kompression.
+
+Misst recall@k und Speicherbedarf pro Setting gegen exakte float32 Brute-Force
+Suche auf den vollen Vektoren unseres Chunk-Corpus. Keine Azure Calls.
+
+    python benchmarks/bench_vector_compression.py --input data/vectors --k 10
+"""
+import argparse
+import numpy as np
+
+from _corpus import DEFAULT_CORPUS_FOLDER, load_chunk_vectors, load_query_vectors, split_queries
+from src.vector_math import (
+    normalize_rows,
+    truncate_dimensions,
+    quantize_scalar_int8,
+    dequantize_scalar_int8,
+    quantize_binary,
+    hamming_similarity,
+    top_k_from_scores,
+    exact_top_k,
+    recall_at_k
+)
+
+COMPRESSIONS = ["none", "scalar", "binary"]
+
+def bytes_per_vector(dims: int, compression: str) -> float:
+    if compression == "scalar":
+        return dims
+    if compression == "binary":
+        return dims / 8
+    return dims * 4
+
+def candidate_scores(corpus: np.ndarray, queries: np.ndarray, compression: str) -> np.ndarray:
+    """Scores auf der (ggf. quantisierten) Repräsentation, so wie sie im HNSW-Graph liegt."""
+    if compression == "scalar":
+        codes, minimum, scale = quantize_scalar_int8(corpus)
+        return queries @ dequantize_scalar_int8(codes, minimum, scale).T
+    if compression == "binary":
+        return hamming_similarity(quantize_binary(corpus), quantize_binary(queries))
+    return queries @ corpus.T
+
+def evaluate(corpus, queries, exact_ids, dims, compression, k, oversampling):
+    corpus_d = truncate_dimensions(corpus, dims)
+    queries_d = truncate_dimensions(queries, dims)
+
+    scores = candidate_scores(corpus_d, queries_d, compression)
+    recall = recall_at_k(top_k_from_scores(scores, k), exact_ids)
+
+    # Rescoring: oversampling * k Kandidaten mit den (verkürzten) Originalvektoren nachbewerten
+    rescored = recall
+    if compression != "none":
+        candidates = top_k_from_scores(scores, int(k * oversampling))
+        final = []
+        for q, cand in zip(queries_d, candidates):
+            exact_scores = corpus_d[cand] @ q
+            final.append(cand[np.argsort(-exact_scores)[:k]])
+        rescored = recall_at_k(np.asarray(final), exact_ids)
+
+    return recall, rescored
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall/Memory Benchmark für Dimensionen & Kompression")
+    parser.add_argument("--input", default=DEFAULT_CORPUS_FOLDER, help="Vector Store Ordner oder Ordner mit JSON-Chunks (inkl. contentVector)")
+    parser.add_argument("--queries", default=None, help="Optionale Query-Vektoren (.npy oder JSON), sonst Held-out Chunks")
+    parser.add_argument("--n-queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--oversampling", type=float, default=4.0)
+    parser.add_argument("--dims", type=int, nargs="+", default=[3072, 1536, 1024, 512, 256])
+    args = parser.parse_args()
+
+    _, matrix = load_chunk_vectors(args.input)
+    matrix = normalize_rows(matrix)
+    if args.queries:
+        corpus, queries = matrix, normalize_rows(load_query_vectors(args.queries))
+    else:
+        corpus, queries = split_queries(matrix, args.n_queries)
+
+    full_dims = corpus.shape[1]
+    print(f"📊 Corpus: {corpus.shape[0]} Vektoren à {full_dims} Dimensionen | Queries: {queries.shape[0]} | k={args.k}")
+
+    # Referenz: exakte float32 Suche auf den vollen Vektoren
+    exact_ids = exact_top_k(corpus, queries, args.k)
+
+    print(f"\n{'dims':>6} {'compression':>12} {'recall@k':>10} {'+rescore':>10} {'vector MB':>10} {'ratio':>7}")
+    baseline_bytes = bytes_per_vector(full_dims, "none") * corpus.shape[0]
+    for dims in args.dims:
+        if dims > full_dims:
+            continue
+        for compression in COMPRESSIONS:
+            recall, rescored = evaluate(corpus, queries, exact_ids, dims, compression, args.k, args.oversampling)
+            size = bytes_per_vector(dims, compression) * corpus.shape[0]
+            print(f"{dims:>6} {compression:>12} {recall:>10.3f} {rescored:>10.3f} {size / 1e6:>10.2f} {baseline_bytes / size:>6.1f}x")
+
+    print("\nHinweis: Bei Kompression mit 'preserveOriginals' liegen die Originalvektoren zusätzlich auf Disk (nicht im RAM).")
+
+if __name__ == "__main__":
+    main()
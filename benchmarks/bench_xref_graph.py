@@ -0,0 +1,87 @@
+"""
+MDR Verweis-Graph Benchmark: Bauzeit, Größe und Lookup-Latenz auf der vollen Verordnung.
+
+    python benchmarks/bench_xref_graph.py --chunks data/json/mdr_full.json
+    python benchmarks/bench_xref_graph.py --html D:/mdr_raw/CELEX_32017R0745_DE_TXT.html
+    python benchmarks/bench_xref_graph.py                      # synthetisch (123 Artikel, 17 Anhänge)
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.xref_graph import XrefGraph
+from src.index_rebuild import iter_chunks
+from src.mdr_references import int_to_roman
+
+def synthetic_chunks(articles=123, annexes=17, parts=4, refs_per_chunk=3, seed=42):
+    """Größenordnung der MDR: ~140 Elemente, mehrere Chunks pro Element, Verweise im Fließtext."""
+    rng = np.random.default_rng(seed)
+    elements = [f"art_{n}" for n in range(1, articles + 1)] + [f"anx_{int_to_roman(n)}" for n in range(1, annexes + 1)]
+    chunks = []
+    for element in elements:
+        for part in range(parts):
+            refs = []
+            for target in rng.choice(len(elements), size=refs_per_chunk, replace=False):
+                kind, number = elements[target].split("_")
+                refs.append(f"gemäß Artikel {number}" if kind == "art" else f"nach Anhang {number}")
+            content = ("Der Hersteller stellt sicher, dass die Anforderungen erfüllt sind. " * 20) + "; ".join(refs) + "."
+            title = f"Artikel {element[4:]}" if element.startswith("art") else f"ANHANG {element[4:]}"
+            chunks.append({"id": f"mdr_{element}_{part}", "source_type": "MDR", "title": title, "content": content})
+    return chunks
+
+def folder_size(folder):
+    return sum(os.path.getsize(os.path.join(folder, name)) for name in os.listdir(folder))
+
+def main():
+    parser = argparse.ArgumentParser(description="MDR Verweis-Graph: Bauzeit, Größe, Lookup")
+    parser.add_argument("--chunks", help="MDR Chunks (JSON-Array oder Ordner)")
+    parser.add_argument("--html", help="MDR HTML (EUR-Lex), wird vorher geparst")
+    parser.add_argument("--lookups", type=int, default=10000)
+    args = parser.parse_args()
+
+    if args.html:
+        from src.mdr_parser import parse_mdr
+        with open(args.html, "r", encoding="utf-8") as f:
+            html = f.read()
+        start = time.perf_counter()
+        chunks = parse_mdr(html, "https://eur-lex.europa.eu")
+        print(f"📄 parse_mdr: {len(chunks)} Chunks in {time.perf_counter() - start:.2f}s")
+    elif args.chunks:
+        chunks = [c for c in iter_chunks(args.chunks) if c.get("source_type") == "MDR"]
+        print(f"📄 {len(chunks)} MDR Chunks aus '{args.chunks}'")
+    else:
+        chunks = synthetic_chunks()
+        print(f"🛠️ Synthetische MDR: {len(chunks)} Chunks")
+
+    start = time.perf_counter()
+    graph = XrefGraph.build(chunks)
+    build_s = time.perf_counter() - start
+
+    folder = os.path.join(tempfile.mkdtemp(), "mdr_xref")
+    graph.save(folder)
+    start = time.perf_counter()
+    graph = XrefGraph.load(folder)
+    load_s = time.perf_counter() - start
+
+    # Expansion wie im Audit: Top-3 Treffer -> max. 2 referenzierte Vorschriften
+    by_element = {node: {"id": cid, "source_type": "MDR", "title": title}
+                  for node, cid, title in zip(graph.nodes, graph.chunk_ids, graph.titles)}
+    rng = np.random.default_rng(7)
+    queries = [[by_element[graph.nodes[i]] for i in rng.choice(len(graph.nodes), size=3, replace=False)]
+               for _ in range(args.lookups)]
+    start = time.perf_counter()
+    expanded = sum(len(graph.expand(hits, 2)) for hits in queries)
+    lookup_s = time.perf_counter() - start
+
+    print(f"🔗 {len(graph.nodes)} Elemente, {graph.edge_count} Verweise (Ø {graph.edge_count / max(len(graph.nodes), 1):.1f} pro Element)")
+    print(f"⏱️ Bauzeit: {build_s * 1000:.1f} ms, Laden: {load_s * 1000:.1f} ms")
+    print(f"💾 Adjazenz (CSR): {graph.nbytes() / 1024:.1f} KB, auf Platte inkl. Auszüge: {folder_size(folder) / 1024:.1f} KB")
+    print(f"🔍 Expansion: {lookup_s / args.lookups * 1e6:.1f} µs pro Claim ({expanded / args.lookups:.2f} Vorschriften ergänzt)")
+
+if __name__ == "__main__":
+    main()
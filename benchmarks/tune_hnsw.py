@@ -0,0 +1,123 @@
+"""
+Offline HNSW Tuning Harness.
+
+Lädt die Chunk-Vektoren und (optional) SOP-Claim Query-Vektoren, berechnet die exakten
+Top-k Treffer mit NumPy und misst für jede HNSW-Parameterkombination auf einer lokalen
+HNSW-Implementierung: recall@k, Query-Latenz und Build-Zeit.
+
+    python benchmarks/tune_hnsw.py --input data/vectors --queries data/sop_claim_vectors.npy
+    python benchmarks/tune_hnsw.py --emit   # gewähltes Profil nach src/hnsw_profile.json schreiben
+
+Das geschriebene Profil wird von src/create_index_definition.py und reset_index.py gelesen.
+"""
+import json
+import time
+import argparse
+import itertools
+import numpy as np
+
+from _corpus import DEFAULT_CORPUS_FOLDER, load_chunk_vectors, load_query_vectors, split_queries
+from src.hnsw import HNSWIndex
+from src.vector_math import normalize_rows, truncate_dimensions, exact_top_k, recall_at_k
+from src.create_index_definition import HNSW_PROFILE_PATH, EMBEDDING_DIMENSIONS
+
+def benchmark(corpus, queries, exact_ids, k, m_values, efc_values, efs_values):
+    rows = []
+    for m, ef_construction in itertools.product(m_values, efc_values):
+        index = HNSWIndex(corpus.shape[1], m=m, ef_construction=ef_construction)
+        start = time.perf_counter()
+        index.add_items(corpus)
+        build_time = time.perf_counter() - start
+
+        for ef_search in efs_values:
+            latencies, found = [], []
+            for q in queries:
+                t = time.perf_counter()
+                found.append(index.search(q, k, ef_search))
+                latencies.append(time.perf_counter() - t)
+
+            row = {
+                "m": m,
+                "efConstruction": ef_construction,
+                "efSearch": ef_search,
+                "recall": recall_at_k(np.asarray(found), exact_ids),
+                "latency_ms_mean": 1000 * float(np.mean(latencies)),
+                "latency_ms_p95": 1000 * float(np.percentile(latencies, 95)),
+                "build_s": build_time
+            }
+            rows.append(row)
+            print(f"{m:>3} {ef_construction:>6} {ef_search:>6} {row['recall']:>8.3f} "
+                  f"{row['latency_ms_mean']:>9.2f} {row['latency_ms_p95']:>9.2f} {build_time:>9.1f}")
+    return rows
+
+def choose_profile(rows, target_recall):
+    """Schnellste Query-Latenz unter allen Settings mit recall >= Ziel (sonst: bester Recall)."""
+    eligible = [r for r in rows if r["recall"] >= target_recall]
+    if not eligible:
+        return max(rows, key=lambda r: (r["recall"], -r["latency_ms_mean"]))
+    return min(eligible, key=lambda r: (r["latency_ms_mean"], r["build_s"]))
+
+def emit_profile(row, path, k, n_corpus, n_queries):
+    profile = {
+        "hnswParameters": {
+            "m": row["m"],
+            "efConstruction": row["efConstruction"],
+            "efSearch": row["efSearch"],
+            "metric": "cosine"
+        },
+        "benchmark": {
+            "k": k,
+            "corpus": n_corpus,
+            "queries": n_queries,
+            "recall": round(row["recall"], 4),
+            "latency_ms_mean": round(row["latency_ms_mean"], 3),
+            "build_s": round(row["build_s"], 2)
+        }
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2)
+        f.write("\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="HNSW Parameter Sweep (offline, lokal)")
+    parser.add_argument("--input", default=DEFAULT_CORPUS_FOLDER, help="Vector Store Ordner oder Ordner mit JSON-Chunks")
+    parser.add_argument("--queries", default=None, help="SOP-Claim Query-Vektoren (.npy oder JSON), sonst Held-out Chunks")
+    parser.add_argument("--n-queries", type=int, default=100)
+    parser.add_argument("--max-corpus", type=int, default=None, help="Corpus für schnelle Läufe begrenzen")
+    parser.add_argument("--dims", type=int, default=EMBEDDING_DIMENSIONS, help="Vektoren auf diese Dimension verkürzen")
+    parser.add_argument("--k", type=int, default=10)
+    # Erlaubte Bereiche in Azure AI Search: m 4-10, efConstruction/efSearch 100-1000
+    parser.add_argument("--m", type=int, nargs="+", default=[4, 6, 8, 10])
+    parser.add_argument("--ef-construction", type=int, nargs="+", default=[100, 400])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[100, 200, 500])
+    parser.add_argument("--target-recall", type=float, default=0.98)
+    parser.add_argument("--emit", action="store_true", help=f"Gewähltes Profil nach {HNSW_PROFILE_PATH} schreiben")
+    args = parser.parse_args()
+
+    _, matrix = load_chunk_vectors(args.input)
+    matrix = normalize_rows(matrix)
+    if args.queries:
+        corpus, queries = matrix, normalize_rows(load_query_vectors(args.queries))
+    else:
+        corpus, queries = split_queries(matrix, args.n_queries)
+    if args.max_corpus:
+        corpus = corpus[:args.max_corpus]
+    if args.dims < corpus.shape[1]:
+        corpus, queries = truncate_dimensions(corpus, args.dims), truncate_dimensions(queries, args.dims)
+
+    print(f"📊 Corpus: {corpus.shape[0]} x {corpus.shape[1]} | Queries: {queries.shape[0]} | k={args.k}")
+    exact_ids = exact_top_k(corpus, queries, args.k)
+
+    print(f"\n{'m':>3} {'efC':>6} {'efS':>6} {'recall':>8} {'mean ms':>9} {'p95 ms':>9} {'build s':>9}")
+    rows = benchmark(corpus, queries, exact_ids, args.k, args.m, args.ef_construction, args.ef_search)
+
+    best = choose_profile(rows, args.target_recall)
+    print(f"\n🏆 Gewählt (Ziel recall >= {args.target_recall}): m={best['m']}, efConstruction={best['efConstruction']}, "
+          f"efSearch={best['efSearch']} -> recall {best['recall']:.3f}, {best['latency_ms_mean']:.2f} ms")
+
+    if args.emit:
+        emit_profile(best, HNSW_PROFILE_PATH, args.k, corpus.shape[0], queries.shape[0])
+        print(f"✅ Profil geschrieben: {HNSW_PROFILE_PATH} (gilt für create_index_definition.py und reset_index.py)")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import os
 import time
+import argparse
 from dotenv import load_dotenv
 from azure.core.credentials import AzureKeyCredential
 from azure.search.documents.indexes import SearchIndexClient
@@ -11,12 +12,27 @@ from azure.search.documents.indexes.models import (
     SearchFieldDataType,
     VectorSearch,
     HnswAlgorithmConfiguration,
+    HnswParameters,
     VectorSearchProfile,
     SemanticSearch,
     SemanticConfiguration,
     SemanticPrioritizedFields,
-    SemanticField
+    SemanticField,
+    ScalarQuantizationCompression,
+    ScalarQuantizationParameters,
+    BinaryQuantizationCompression,
+    RescoringOptions
 )
+from src.create_index_definition import (
+    EMBEDDING_DIMENSIONS,
+    VECTOR_COMPRESSION,
+    VECTOR_OVERSAMPLING,
+    COMPRESSION_NAMES,
+    HNSW_PARAMETERS
+)
+from src.search_rest import SearchRestClient
+from src.vector_store import LocalVectorStore
+from src.index_rebuild import rebuild_index, RebuildError
 
 # Load environment variables
 load_dotenv()
@@ -26,6 +42,55 @@ ENDPOINT = os.getenv("AZURE_SEARCH_ENDPOINT")
 KEY = os.getenv("AZURE_SEARCH_KEY")
 INDEX_NAME = os.getenv("AZURE_SEARCH_INDEX", "mdr-legal-index-v1")
 
+# --- BLUE/GREEN REBUILD ---
+INDEX_BASE_NAME = os.getenv("AZURE_SEARCH_INDEX_BASE", "mdr-legal-index")
+INDEX_ALIAS = os.getenv("AZURE_SEARCH_ALIAS")  # Wenn gesetzt: Umschalten per Alias statt .env
+CHUNK_SOURCE = os.getenv("OUTPUT_JSON_PATH", "data/json")
+VECTOR_STORE_PATH = os.getenv("LOCAL_VECTOR_STORE_PATH", "data/vectors")
+EMBEDDING_DEPLOYMENT = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT")
+
+def create_embedder():
+    """Embedding für Chunks, deren Text sich seit dem letzten Upload geändert hat (None = nicht konfiguriert)."""
+    endpoint, key = os.getenv("AZURE_OPENAI_EMBEDDING_ENDPOINT"), os.getenv("AZURE_OPENAI_EMBEDDING_KEY")
+    if not endpoint or not key or not EMBEDDING_DEPLOYMENT:
+        return None
+    from openai import AzureOpenAI
+    from src.quota_governor import govern
+    client = govern(AzureOpenAI(azure_endpoint=endpoint, api_key=key,
+                                api_version=os.getenv("AZURE_OPENAI_EMBEDDING_API_VERSION", "2024-02-01")), "batch")
+
+    def embed(text):
+        if not text or not isinstance(text, str):
+            return None
+        # Gleiche Aufbereitung wie upload_manager.get_embedding
+        response = client.embeddings.create(input=text.replace("\n", " ")[:8000], model=EMBEDDING_DEPLOYMENT,
+                                            dimensions=EMBEDDING_DIMENSIONS)
+        return response.data[0].embedding
+    return embed
+
+def build_compressions(kind: str = VECTOR_COMPRESSION) -> list:
+    """SDK-Pendant zu build_vector_compression() aus src/create_index_definition.py."""
+    if kind == "none":
+        return []
+
+    rescoring = RescoringOptions(
+        enable_rescoring=True,
+        default_oversampling=VECTOR_OVERSAMPLING,
+        rescore_storage_method="preserveOriginals"
+    )
+    if kind == "scalar":
+        return [ScalarQuantizationCompression(
+            compression_name=COMPRESSION_NAMES["scalar"],
+            rescoring_options=rescoring,
+            parameters=ScalarQuantizationParameters(quantized_data_type="int8")
+        )]
+    if kind == "binary":
+        return [BinaryQuantizationCompression(
+            compression_name=COMPRESSION_NAMES["binary"],
+            rescoring_options=rescoring
+        )]
+    raise ValueError(f"Unbekannte Vektor-Kompression: '{kind}' (erlaubt: none, scalar, binary)")
+
 def recreate_index():
     if not ENDPOINT or not KEY:
         print("❌ Error: .env Variablen fehlen (ENDPOINT/KEY).")
@@ -56,25 +121,30 @@ def recreate_index():
     # Das ist dein Schema aus den vorherigen Schritten
     print("🏗  Erstelle Index-Schema neu...")
     
-    # Vector Search Config (HNSW)
+    # Vector Search Config (HNSW + optionale Quantisierung)
+    compressions = build_compressions()
+    print(f"   Dimensionen: {EMBEDDING_DIMENSIONS} | Kompression: {VECTOR_COMPRESSION} | HNSW: {HNSW_PARAMETERS}")
+
     vector_search = VectorSearch(
         algorithms=[
             HnswAlgorithmConfiguration(
                 name="hnsw-config",
-                parameters={
-                    "m": 4,
-                    "efConstruction": 400,
-                    "efSearch": 500,
-                    "metric": "cosine"
-                }
+                parameters=HnswParameters(
+                    m=HNSW_PARAMETERS["m"],
+                    ef_construction=HNSW_PARAMETERS["efConstruction"],
+                    ef_search=HNSW_PARAMETERS["efSearch"],
+                    metric=HNSW_PARAMETERS["metric"]
+                )
             )
         ],
         profiles=[
             VectorSearchProfile(
                 name="my-vector-profile",
-                algorithm_configuration_name="hnsw-config"
+                algorithm_configuration_name="hnsw-config",
+                compression_name=compressions[0].compression_name if compressions else None
             )
-        ]
+        ],
+        compressions=compressions or None
     )
 
     # Semantic Search Config (Optional, aber gut für Hybrid Search)
@@ -104,12 +174,12 @@ def recreate_index():
         SearchableField(name="chapter", type=SearchFieldDataType.String, filterable=True, facetable=True),
         SimpleField(name="valid_from", type=SearchFieldDataType.DateTimeOffset, filterable=True, sortable=True),
 
-        # Der Vektor (Wichtig: 3072 Dimensionen für text-embedding-3-large!)
+        # Der Vektor (Wichtig: Dimensionen müssen zu AZURE_OPENAI_EMBEDDING_DIMENSIONS passen!)
         SearchField(
             name="contentVector",
             type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
             searchable=True,
-            vector_search_dimensions=3072, 
+            vector_search_dimensions=EMBEDDING_DIMENSIONS,
             vector_search_profile_name="my-vector-profile"
         )
     ]
@@ -130,5 +200,41 @@ def recreate_index():
     except Exception as e:
         print(f"❌ Fehler beim Erstellen: {e}")
 
+def rebuild_blue_green(chunk_source=CHUNK_SOURCE, alias=INDEX_ALIAS, env_file=".env", allow_missing=False):
+    """Baut einen neuen Index neben dem Live-Index auf - ohne Downtime, Embedding Calls nur für geänderte Chunks."""
+    if not ENDPOINT or not KEY:
+        print("❌ Error: .env Variablen fehlen (ENDPOINT/KEY).")
+        return
+
+    if not os.path.exists(os.path.join(VECTOR_STORE_PATH, "meta.json")):
+        print(f"❌ Kein lokaler Vector Store in '{VECTOR_STORE_PATH}'. Erst upload_manager.py laufen lassen.")
+        return
+
+    print(f"🔵🟢 Blue/Green Rebuild: Live-Index '{INDEX_NAME}' bleibt online.")
+    rest = SearchRestClient(ENDPOINT, KEY)
+    store = LocalVectorStore(VECTOR_STORE_PATH)
+
+    try:
+        result = rebuild_index(rest, INDEX_BASE_NAME, chunk_source, store,
+                               alias=alias, env_file=None if alias else env_file,
+                               allow_missing=allow_missing, embed=create_embedder())
+    except RebuildError as e:
+        print(f"❌ Rebuild abgebrochen: {e}")
+        return
+
+    print(f"   Alter Index '{INDEX_NAME}' bleibt als Rollback bestehen.")
+    return result
+
 if __name__ == "__main__":
-    recreate_index()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Azure Search Index neu anlegen")
+    parser.add_argument("--rebuild", action="store_true", help="Blue/Green: versionierten Index aus lokalen Vektoren befüllen und umschalten")
+    parser.add_argument("--chunks", default=CHUNK_SOURCE, help="Ordner mit JSON-Chunks oder JSON-Array-Datei (nur --rebuild)")
+    parser.add_argument("--alias", default=INDEX_ALIAS, help="Alias, der auf den neuen Index zeigen soll (sonst .env Update)")
+    parser.add_argument("--env-file", default=".env", help=".env Datei für das Umschalten ohne Alias")
+    parser.add_argument("--allow-missing", action="store_true", help="Chunks ohne lokalen Vektor auslassen statt abzubrechen")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild_blue_green(args.chunks, args.alias, args.env_file, args.allow_missing)
+    else:
+        recreate_index()
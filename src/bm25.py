@@ -0,0 +1,204 @@
+import os
+import re
+import json
+import numpy as np
+
+# Häufige deutsche Funktionswörter (entspricht grob der Stoppwortliste des de.microsoft Analyzers)
+GERMAN_STOPWORDS = set("""
+aber alle allem allen aller alles als also am an ander andere anderem anderen anderer anderes auch auf aus bei bin bis
+bist da damit dann das dass dem den denn der des dessen die dies diese diesem diesen dieser dieses doch dort du durch
+ein eine einem einen einer eines er es etwa für gegen hat hatte hier hin ihr ihre im in ins ist ja jede jedem jeden
+jeder jedes kann kein keine mit muss nach nicht noch nur ob oder ohne sich sie sind so soll sowie über um und uns
+unter vom von vor war wann was weil welche welchem welchen welcher wenn werden wie wir wird wo zu zum zur zwischen
+""".split())
+
+# Fugenelemente zwischen Kompositumsteilen (z.B. Überwachung-s-plan, Produkt-e-register)
+LINKING_ELEMENTS = ("", "s", "es", "n", "en", "e")
+# Endungen für das leichte Stemming, längste zuerst
+SUFFIXES = ("ern", "em", "en", "er", "es", "e", "s")
+
+MIN_PART_LENGTH = 4
+MIN_COMPOUND_LENGTH = 10
+
+_TOKEN_RE = re.compile(r"[a-zäöüß0-9]+")
+
+def normalize(text: str) -> str:
+    return text.lower().replace("ß", "ss")
+
+def stem(token: str) -> str:
+    """Leichtes Suffix-Stripping, damit Flexionsformen (Produkte/Produkten) zusammenfallen."""
+    for suffix in SUFFIXES:
+        # 'Prozess' nicht zu 'prozes' kürzen
+        if suffix == "s" and token.endswith("ss"):
+            continue
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_PART_LENGTH:
+            return token[:-len(suffix)]
+    return token
+
+def tokenize(text: str) -> list:
+    """Kleinschreibung, ß->ss, Stoppwörter raus, Stemming. Bindestrich-Wörter werden getrennt."""
+    return [stem(t) for t in _TOKEN_RE.findall(normalize(text)) if t not in GERMAN_STOPWORDS and len(t) > 1]
+
+def split_compound(token: str, vocabulary, depth: int = 0) -> list:
+    """
+    Zerlegt ein Kompositum anhand des Corpus-Vokabulars (z.B. 'überwachungsplan' ->
+    ['überwachung', 'plan']). Liefert [] wenn keine vollständige Zerlegung gefunden wird.
+    """
+    if depth > 3 or len(token) < 2 * MIN_PART_LENGTH:
+        return []
+    # Längster Kopf zuerst: 'sicherheitsbericht' eher als 'sicher' + ...
+    for cut in range(len(token) - MIN_PART_LENGTH, MIN_PART_LENGTH - 1, -1):
+        head, rest = token[:cut], token[cut:]
+        head_stem = stem(head)
+        for link in LINKING_ELEMENTS:
+            if link and not head.endswith(link):
+                continue
+            candidate = stem(head[:len(head) - len(link)]) if link else head_stem
+            if len(candidate) < MIN_PART_LENGTH or candidate not in vocabulary:
+                continue
+            tail = stem(rest)
+            if tail in vocabulary and len(tail) >= MIN_PART_LENGTH:
+                return [candidate, tail]
+            tail_parts = split_compound(rest, vocabulary, depth + 1)
+            if tail_parts:
+                return [candidate] + tail_parts
+    return []
+
+def analyze(text: str, vocabulary=None, compound_cache: dict = None) -> list:
+    """Tokens eines Textes inkl. Kompositum-Teilen (das Kompositum selbst bleibt erhalten)."""
+    tokens = tokenize(text)
+    if not vocabulary:
+        return tokens
+    compound_cache = compound_cache if compound_cache is not None else {}
+    analyzed = []
+    for token in tokens:
+        analyzed.append(token)
+        if len(token) >= MIN_COMPOUND_LENGTH:
+            if token not in compound_cache:
+                compound_cache[token] = split_compound(token, vocabulary)
+            analyzed.extend(compound_cache[token])
+    return analyzed
+
+class BM25Index:
+    """
+    Lokaler Volltext-Index mit BM25 Ranking.
+
+    Postings werden kompakt als CSR-Arrays gehalten:
+      offsets[t]..offsets[t+1] -> doc_ids (uint32) und tfs (uint16) für Term t
+    Das Vokabular dient gleichzeitig der Kompositum-Zerlegung (auch für Queries).
+    """
+
+    def __init__(self, doc_ids, vocabulary, offsets, postings_docs, postings_tfs, doc_lengths, k1=1.2, b=0.75):
+        self.doc_ids = list(doc_ids)
+        self.vocabulary = vocabulary  # term -> term_id
+        self.offsets = offsets
+        self.postings_docs = postings_docs
+        self.postings_tfs = postings_tfs
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self._compound_cache = {}
+
+        n_docs = len(self.doc_ids)
+        df = np.diff(offsets).astype(np.float32)
+        self.idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avg_length = float(doc_lengths.mean()) if n_docs else 1.0
+        self._length_norm = (k1 * (1 - b + b * doc_lengths / max(avg_length, 1e-9))).astype(np.float32)
+
+    @classmethod
+    def build(cls, documents, k1=1.2, b=0.75):
+        """documents: Iterable von (doc_id, text)."""
+        documents = list(documents)
+        tokenized = [tokenize(text) for _, text in documents]
+
+        # Vokabular der Einzelwörter zuerst, damit Komposita dagegen zerlegt werden können
+        base_vocabulary = {t for tokens in tokenized for t in tokens}
+        compound_cache = {}
+        term_docs = {}
+        doc_lengths = np.zeros(len(documents), dtype=np.float32)
+        for doc, tokens in enumerate(tokenized):
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+                if len(token) >= MIN_COMPOUND_LENGTH:
+                    if token not in compound_cache:
+                        compound_cache[token] = split_compound(token, base_vocabulary)
+                    for part in compound_cache[token]:
+                        counts[part] = counts.get(part, 0) + 1
+            doc_lengths[doc] = sum(counts.values())
+            for term, tf in counts.items():
+                term_docs.setdefault(term, []).append((doc, tf))
+
+        vocabulary = {term: i for i, term in enumerate(sorted(term_docs))}
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        total = sum(len(p) for p in term_docs.values())
+        postings_docs = np.empty(total, dtype=np.uint32)
+        postings_tfs = np.empty(total, dtype=np.uint16)
+        pos = 0
+        for term, term_id in vocabulary.items():
+            postings = term_docs[term]
+            postings_docs[pos:pos + len(postings)] = [d for d, _ in postings]
+            postings_tfs[pos:pos + len(postings)] = [min(tf, 65535) for _, tf in postings]
+            pos += len(postings)
+            offsets[term_id + 1] = pos
+
+        return cls([doc_id for doc_id, _ in documents], vocabulary, offsets, postings_docs, postings_tfs, doc_lengths, k1, b)
+
+    def save(self, folder: str, version: str = None):
+        os.makedirs(folder, exist_ok=True)
+        np.savez(os.path.join(folder, "bm25.npz"), offsets=self.offsets, postings_docs=self.postings_docs,
+                 postings_tfs=self.postings_tfs, doc_lengths=self.doc_lengths)
+        with open(os.path.join(folder, "bm25_meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": version, "k1": self.k1, "b": self.b, "doc_ids": self.doc_ids,
+                       "vocabulary": sorted(self.vocabulary, key=self.vocabulary.get)}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, folder: str, version: str = None):
+        """Lädt einen gespeicherten Index. None, wenn er fehlt oder zu einer anderen Version gehört."""
+        meta_path = os.path.join(folder, "bm25_meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if version is not None and meta.get("version") != version:
+            return None
+        arrays = np.load(os.path.join(folder, "bm25.npz"))
+        vocabulary = {term: i for i, term in enumerate(meta["vocabulary"])}
+        return cls(meta["doc_ids"], vocabulary, arrays["offsets"], arrays["postings_docs"],
+                   arrays["postings_tfs"], arrays["doc_lengths"], meta["k1"], meta["b"])
+
+    def score(self, query: str) -> np.ndarray:
+        """BM25 Score pro Dokument (Index-Reihenfolge)."""
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+        for term in set(analyze(query, self.vocabulary, self._compound_cache)):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.postings_docs[start:end]
+            tf = self.postings_tfs[start:end].astype(np.float32)
+            scores[docs] += self.idf[term_id] * tf * (self.k1 + 1) / (tf + self._length_norm[docs])
+        return scores
+
+    def search(self, query: str, top: int = 10) -> list:
+        """[(doc_id, score)] absteigend, nur Dokumente mit mindestens einem Treffer."""
+        scores = self.score(query)
+        hits = np.flatnonzero(scores)
+        if hits.size == 0:
+            return []
+        top = min(top, hits.size)
+        best = hits[np.argpartition(-scores[hits], top - 1)[:top]]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(self.doc_ids[i], float(scores[i])) for i in best]
+
+def reciprocal_rank_fusion(rankings, k: int = 60, top: int = None) -> list:
+    """
+    Reciprocal Rank Fusion (wie der Hybrid-Ranker von Azure AI Search):
+    score(d) = sum(1 / (k + rank)) über alle Rankings. rankings: Listen von IDs, beste zuerst.
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    ordered = sorted(fused.items(), key=lambda item: -item[1])
+    return ordered[:top] if top else ordered
@@ -1,41 +1,105 @@
+import os
 import json
+from dotenv import load_dotenv
 
-INDEX_SCHEMA = {
-  "name": "mdr-legal-index-v1",
-  "fields": [
-    { "name": "id", "type": "Edm.String", "key": True, "searchable": False },
-    { "name": "title", "type": "Edm.String", "searchable": True, "analyzer": "de.microsoft" },
-    { "name": "content", "type": "Edm.String", "searchable": True, "analyzer": "de.microsoft" },
-    {
-      "name": "contentVector",
-      "type": "Collection(Edm.Single)",
-      "searchable": True,
-      "dimensions": 3072,
-      "vectorSearchProfile": "my-vector-profile"
-    },
-    { "name": "source_type", "type": "Edm.String", "filterable": True, "facetable": True },
-    { "name": "url", "type": "Edm.String", "retrievable": True },
-    { "name": "chapter", "type": "Edm.String", "searchable": True, "filterable": True, "facetable": True, "analyzer": "de.microsoft" },
-    { "name": "valid_from", "type": "Edm.DateTimeOffset", "filterable": True, "sortable": True }
-  ],
-  "semantic": {
-    "configurations": [
-      {
-        "name": "my-semantic-config",
-        "prioritizedFields": {
-          "titleField": { "fieldName": "title" },
-          "contentFields": [{ "fieldName": "content" }],
-          "keywordsFields": [{ "fieldName": "chapter" }]
-        }
-      }
-    ]
-  },
-  "vectorSearch": {
-    "algorithms": [{ "name": "hnsw-config", "kind": "hnsw", "hnswParameters": { "m": 4, "efConstruction": 400, "efSearch": 500, "metric": "cosine" }}],
-    "profiles": [{ "name": "my-vector-profile", "algorithm": "hnsw-config" }]
-  }
+load_dotenv()
+
+# --- CONFIG ---
+INDEX_NAME = os.getenv("AZURE_SEARCH_INDEX", "mdr-legal-index-v1")
+
+# text-embedding-3-large liefert nativ 3072 Dimensionen. Über den 'dimensions'
+# Parameter der Embedding API lässt sich der Vektor verkürzen (Matryoshka).
+# WICHTIG: Muss identisch sein mit dem Wert, der beim Embedden genutzt wird.
+EMBEDDING_DIMENSIONS = int(os.getenv("AZURE_OPENAI_EMBEDDING_DIMENSIONS", "3072"))
+
+# Vektor-Kompression im Index: "none" | "scalar" (int8) | "binary" (1 Bit/Dimension)
+VECTOR_COMPRESSION = os.getenv("AZURE_SEARCH_VECTOR_COMPRESSION", "none").lower()
+# Oversampling für das Rescoring mit den Originalvektoren (nur bei Kompression)
+VECTOR_OVERSAMPLING = float(os.getenv("AZURE_SEARCH_VECTOR_OVERSAMPLING", "4"))
+
+# HNSW Profil: wird von benchmarks/tune_hnsw.py --emit geschrieben und von
+# beiden Schema-Pfaden (REST Definition + reset_index.py) gelesen
+HNSW_PROFILE_PATH = os.path.join(os.path.dirname(__file__), "hnsw_profile.json")
+
+def load_hnsw_parameters(path: str = HNSW_PROFILE_PATH) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["hnswParameters"]
+
+HNSW_PARAMETERS = load_hnsw_parameters()
+
+COMPRESSION_NAMES = {
+    "scalar": "scalar-int8-compression",
+    "binary": "binary-compression",
 }
 
+def build_vector_compression(kind: str, oversampling: float = VECTOR_OVERSAMPLING) -> dict:
+    """
+    Liefert die REST-Definition einer Vektor-Kompression (API 2025-09-01).
+    Die Originalvektoren bleiben erhalten, damit Azure die Top-Kandidaten nachbewerten kann.
+    """
+    if kind not in COMPRESSION_NAMES:
+        raise ValueError(f"Unbekannte Vektor-Kompression: '{kind}' (erlaubt: none, scalar, binary)")
+
+    compression = {
+        "name": COMPRESSION_NAMES[kind],
+        "kind": "scalarQuantization" if kind == "scalar" else "binaryQuantization",
+        "rescoringOptions": {
+            "enableRescoring": True,
+            "defaultOversampling": oversampling,
+            "rescoreStorageMethod": "preserveOriginals"
+        }
+    }
+    if kind == "scalar":
+        compression["scalarQuantizationParameters"] = {"quantizedDataType": "int8"}
+    return compression
+
+def build_index_schema(name: str = INDEX_NAME, dimensions: int = EMBEDDING_DIMENSIONS, compression: str = VECTOR_COMPRESSION,
+                       hnsw_parameters: dict = None) -> dict:
+    """Baut das Index-Schema (REST Format) für die gewünschte Dimension, Kompression und HNSW-Parameter (Default: Profil)."""
+    profile = { "name": "my-vector-profile", "algorithm": "hnsw-config" }
+    vector_search = {
+        "algorithms": [{ "name": "hnsw-config", "kind": "hnsw", "hnswParameters": dict(hnsw_parameters or HNSW_PARAMETERS) }],
+        "profiles": [profile]
+    }
+    if compression != "none":
+        vector_search["compressions"] = [build_vector_compression(compression)]
+        profile["compression"] = COMPRESSION_NAMES[compression]
+
+    return {
+      "name": name,
+      "fields": [
+        { "name": "id", "type": "Edm.String", "key": True, "searchable": False },
+        { "name": "title", "type": "Edm.String", "searchable": True, "analyzer": "de.microsoft" },
+        { "name": "content", "type": "Edm.String", "searchable": True, "analyzer": "de.microsoft" },
+        {
+          "name": "contentVector",
+          "type": "Collection(Edm.Single)",
+          "searchable": True,
+          "dimensions": dimensions,
+          "vectorSearchProfile": "my-vector-profile"
+        },
+        { "name": "source_type", "type": "Edm.String", "filterable": True, "facetable": True },
+        { "name": "url", "type": "Edm.String", "retrievable": True },
+        { "name": "chapter", "type": "Edm.String", "searchable": True, "filterable": True, "facetable": True, "analyzer": "de.microsoft" },
+        { "name": "valid_from", "type": "Edm.DateTimeOffset", "filterable": True, "sortable": True }
+      ],
+      "semantic": {
+        "configurations": [
+          {
+            "name": "my-semantic-config",
+            "prioritizedFields": {
+              "titleField": { "fieldName": "title" },
+              "contentFields": [{ "fieldName": "content" }],
+              "keywordsFields": [{ "fieldName": "chapter" }]
+            }
+          }
+        ]
+      },
+      "vectorSearch": vector_search
+    }
+
+INDEX_SCHEMA = build_index_schema()
+
 def get_index_schema():
     return INDEX_SCHEMA
 
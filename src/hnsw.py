@@ -0,0 +1,150 @@
+import heapq
+import math
+import numpy as np
+
+class HNSWIndex:
+    """
+    Kompakte HNSW-Implementierung (Malkov & Yashunin) für Offline-Benchmarks.
+
+    Parameter-Semantik wie in Azure AI Search:
+      - m:               Links pro Knoten und Layer (Layer 0: 2 * m)
+      - ef_construction: Kandidatenliste beim Aufbau
+      - ef_search:       Kandidatenliste bei der Suche (wird pro Query übergeben)
+    Metrik: Cosine (die Vektoren werden beim Einfügen normalisiert).
+    Nicht auf Durchsatz optimiert - Ziel ist der relative Vergleich von Parametern.
+    """
+
+    def __init__(self, dims: int, m: int = 4, ef_construction: int = 400, seed: int = 42):
+        self.dims = dims
+        self.m = m
+        self.m0 = 2 * m
+        self.ef_construction = ef_construction
+        self.level_mult = 1 / math.log(max(m, 2))
+        self.rng = np.random.default_rng(seed)
+
+        self.vectors = np.empty((0, dims), dtype=np.float32)
+        self.graph = []  # graph[layer][node] -> Liste der Nachbarn
+        self.entry_point = None
+        self.max_level = -1
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    def _similarities(self, query: np.ndarray, nodes: list) -> np.ndarray:
+        return self.vectors[nodes] @ query
+
+    def _search_layer(self, query: np.ndarray, entry_points: list, ef: int, layer: int) -> list:
+        """Greedy Beam Search in einem Layer. Rückgabe: [(similarity, node)] absteigend."""
+        visited = set(entry_points)
+        sims = self._similarities(query, entry_points)
+        candidates = [(-s, n) for s, n in zip(sims.tolist(), entry_points)]  # Max-Heap über -sim
+        results = [(s, n) for s, n in zip(sims.tolist(), entry_points)]      # Min-Heap über sim
+        heapq.heapify(candidates)
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        neighbors_of = self.graph[layer]
+        while candidates:
+            neg_sim, node = heapq.heappop(candidates)
+            if -neg_sim < results[0][0] and len(results) >= ef:
+                break
+
+            fresh = [n for n in neighbors_of.get(node, ()) if n not in visited]
+            if not fresh:
+                continue
+            visited.update(fresh)
+
+            for sim, n in zip(self._similarities(query, fresh).tolist(), fresh):
+                if len(results) < ef or sim > results[0][0]:
+                    heapq.heappush(candidates, (-sim, n))
+                    heapq.heappush(results, (sim, n))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+
+        return sorted(results, reverse=True)
+
+    def _select_neighbors(self, candidates: list, m: int) -> list:
+        """
+        Heuristik aus dem HNSW-Paper: Ein Kandidat wird nur verlinkt, wenn er näher an der
+        Query liegt als an allen bereits gewählten Nachbarn (sorgt für Diversität).
+        """
+        selected = []
+        for sim, node in candidates:
+            if len(selected) >= m:
+                break
+            if selected:
+                to_selected = self._similarities(self.vectors[node], selected)
+                if to_selected.max() > sim:
+                    continue
+            selected.append(node)
+
+        # Mit den besten verworfenen Kandidaten auffüllen (keepPrunedConnections)
+        if len(selected) < m:
+            for _, node in candidates:
+                if node not in selected:
+                    selected.append(node)
+                    if len(selected) >= m:
+                        break
+        return selected
+
+    def _shrink(self, node: int, layer: int):
+        limit = self.m0 if layer == 0 else self.m
+        neighbors = self.graph[layer][node]
+        if len(neighbors) <= limit:
+            return
+        sims = self._similarities(self.vectors[node], neighbors)
+        candidates = sorted(zip(sims.tolist(), neighbors), reverse=True)
+        self.graph[layer][node] = self._select_neighbors(candidates, limit)
+
+    def add_items(self, matrix: np.ndarray):
+        matrix = np.asarray(matrix, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        start = len(self)
+        self.vectors = np.vstack([self.vectors, matrix / norms])
+
+        for node in range(start, len(self)):
+            self._insert(node)
+
+    def _insert(self, node: int):
+        query = self.vectors[node]
+        level = int(-math.log(1.0 - self.rng.random()) * self.level_mult)
+        while len(self.graph) <= level:
+            self.graph.append({})
+        for layer in range(level + 1):
+            self.graph[layer][node] = []
+
+        if self.entry_point is None:
+            self.entry_point, self.max_level = node, level
+            return
+
+        entry = [self.entry_point]
+        # Oberhalb des Ziel-Layers nur greedy absteigen (ef = 1)
+        for layer in range(self.max_level, level, -1):
+            entry = [self._search_layer(query, entry, 1, layer)[0][1]]
+
+        for layer in range(min(level, self.max_level), -1, -1):
+            candidates = self._search_layer(query, entry, self.ef_construction, layer)
+            neighbors = self._select_neighbors(candidates, self.m)
+            self.graph[layer][node] = neighbors
+            for n in neighbors:
+                self.graph[layer][n].append(node)
+                self._shrink(n, layer)
+            entry = [n for _, n in candidates]
+
+        if level > self.max_level:
+            self.entry_point, self.max_level = node, level
+
+    def search(self, query: np.ndarray, k: int, ef_search: int = 100) -> list:
+        """Top-k Knoten-IDs (Einfügereihenfolge) für eine Query."""
+        if self.entry_point is None:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+
+        entry = [self.entry_point]
+        for layer in range(self.max_level, 0, -1):
+            entry = [self._search_layer(query, entry, 1, layer)[0][1]]
+        results = self._search_layer(query, entry, max(ef_search, k), 0)
+        return [n for _, n in results[:k]]
@@ -0,0 +1,143 @@
+import os
+import glob
+import json
+import time
+import datetime
+from dotenv import set_key
+
+from src.create_index_definition import build_index_schema, VECTOR_COMPRESSION
+from src.json_stream import iter_json_array
+from src.vector_store import LocalVectorStore, content_hash
+
+# Felder, die im Index existieren (alles andere aus den JSON-Chunks wird ignoriert)
+INDEX_FIELDS = ["id", "title", "content", "source_type", "url", "chapter", "valid_from"]
+
+class RebuildError(Exception):
+    pass
+
+def versioned_index_name(base_name: str, now: datetime.datetime = None) -> str:
+    """z.B. 'mdr-legal-index' -> 'mdr-legal-index-20261019-143000'"""
+    now = now or datetime.datetime.now()
+    return f"{base_name}-{now.strftime('%Y%m%d-%H%M%S')}"
+
+def iter_chunks(source: str):
+    """Chunks aus einem Ordner mit JSON-Dateien (Pipeline Output) oder einer einzelnen JSON-Array-Datei."""
+    if os.path.isdir(source):
+        for file_path in sorted(glob.glob(os.path.join(source, "*.json"))):
+            with open(file_path, "r", encoding="utf-8") as f:
+                yield from json.load(f)
+    else:
+        yield from iter_json_array(source)
+
+def iter_backfill_batches(source: str, store: LocalVectorStore, batch_size: int, missing: list, embed=None):
+    """
+    Baut Index-Dokumente aus Chunk-Metadaten + lokal gespeicherten Vektoren.
+    Ein Vektor zählt nur, wenn er zum aktuellen Chunk-Text passt (ID + Content-Hash wie im
+    Upload-Checkpoint). Chunks ohne passenden Vektor werden mit embed(text) neu embedded und
+    im Store abgelegt; ohne embed landen sie in 'missing'.
+    """
+    batch, seen = [], set()
+    for chunk in iter_chunks(source):
+        chunk_id = chunk["id"]
+        if chunk_id in seen:
+            continue
+        seen.add(chunk_id)
+
+        text_hash = content_hash(chunk.get("content"))
+        vector = store.get(chunk_id, text_hash)
+        if vector is None and embed is not None:
+            vector = embed(chunk.get("content"))
+            if vector is not None:
+                store.add(chunk_id, vector, text_hash)
+        if vector is None:
+            missing.append(chunk_id)
+            continue
+
+        doc = {field: chunk.get(field) for field in INDEX_FIELDS}
+        if not doc["valid_from"]:
+            doc["valid_from"] = "2024-01-01T00:00:00Z"
+        doc["contentVector"] = vector
+        batch.append(doc)
+
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def wait_for_document_count(rest, index_name: str, expected: int, timeout: float, poll_interval: float) -> int:
+    """Der Dokumentzähler von Azure Search läuft dem Upload etwas hinterher -> pollen."""
+    deadline = time.time() + timeout
+    count = rest.document_count(index_name)
+    while count != expected and time.time() < deadline:
+        time.sleep(poll_interval)
+        count = rest.document_count(index_name)
+    return count
+
+def switch_traffic(rest, new_index: str, alias: str = None, env_file: str = None) -> str:
+    """Alias auf den neuen Index umbiegen, sonst AZURE_SEARCH_INDEX in der .env Datei setzen."""
+    if alias:
+        rest.create_or_update_alias(alias, new_index)
+        return f"alias '{alias}'"
+    if env_file:
+        set_key(env_file, "AZURE_SEARCH_INDEX", new_index, quote_mode="always")
+        return f"config '{env_file}'"
+    raise RebuildError("Weder Alias noch .env-Datei angegeben - Traffic kann nicht umgeschaltet werden.")
+
+def discard_index(rest, index_name: str):
+    """Versionierten Index eines abgebrochenen Rebuilds löschen (Live-Index bleibt unberührt)."""
+    try:
+        rest.delete_index(index_name)
+        print(f"🧹 Index '{index_name}' des abgebrochenen Rebuilds gelöscht.")
+    except Exception as e:
+        print(f"⚠️ Index '{index_name}' konnte nicht gelöscht werden ({e}) - bitte manuell entfernen.")
+
+def rebuild_index(rest, base_name: str, chunk_source: str, store: LocalVectorStore,
+                  alias: str = None, env_file: str = None, compression: str = VECTOR_COMPRESSION,
+                  batch_size: int = 500, allow_missing: bool = False,
+                  count_timeout: float = 120, poll_interval: float = 2, embed=None) -> dict:
+    """
+    Blue/Green Rebuild:
+      1. Neuen, versionierten Index neben dem Live-Index anlegen
+      2. Aus lokalen Vektoren befüllen (Embedding Calls nur für Chunks, deren Text sich geändert hat)
+      3. Dokumentanzahl prüfen
+      4. Traffic per Alias oder Config umschalten
+    Der bisherige Index bleibt unangetastet und dient als Rollback. Scheitert ein Schritt,
+    wird der neue Index wieder gelöscht.
+    """
+    new_index = versioned_index_name(base_name)
+    print(f"🏗  Erstelle Index '{new_index}' ({store.dims} Dimensionen, Kompression: {compression})...")
+    rest.create_index(build_index_schema(name=new_index, dimensions=store.dims, compression=compression))
+
+    try:
+        missing = []
+        uploaded = 0
+        failed = []
+        for batch in iter_backfill_batches(chunk_source, store, batch_size, missing, embed):
+            results = rest.upload_documents(new_index, batch)
+            for r in results:
+                if r.get("status"):
+                    uploaded += 1
+                else:
+                    failed.append(r.get("key"))
+            print(f"   ⬆️ Backfill: {uploaded} Dokumente")
+
+        if failed:
+            raise RebuildError(f"{len(failed)} Dokumente wurden abgelehnt (z.B. {failed[:5]}). Traffic bleibt auf dem alten Index.")
+        if missing and not allow_missing:
+            raise RebuildError(f"{len(missing)} Chunks haben keinen aktuellen lokalen Vektor (z.B. {missing[:5]}). "
+                               "Erst upload_manager.py laufen lassen oder --allow-missing setzen.")
+
+        print(f"🔎 Prüfe Dokumentanzahl (erwartet: {uploaded})...")
+        count = wait_for_document_count(rest, new_index, uploaded, count_timeout, poll_interval)
+        if count != uploaded:
+            raise RebuildError(f"Index '{new_index}' enthält {count} statt {uploaded} Dokumente. Traffic bleibt auf dem alten Index.")
+
+        switched_via = switch_traffic(rest, new_index, alias=alias, env_file=env_file)
+        print(f"✅ Traffic umgeschaltet via {switched_via} -> '{new_index}'")
+    except BaseException:
+        # Auch bei Ctrl-C: kein verwaister Index, jeder Fehlversuch würde sonst einen vollen Index zurücklassen
+        discard_index(rest, new_index)
+        raise
+
+    return {"index": new_index, "documents": count, "missing": len(missing), "switched_via": switched_via}
@@ -0,0 +1,65 @@
+import json
+
+def iter_json_array(path: str, buffer_size: int = 1 << 16):
+    """
+    Liest ein JSON-Array (z.B. output/compliance_data.json) Element für Element.
+    Es liegt immer nur der Lese-Puffer plus das aktuelle Element im Speicher,
+    unabhängig von der Dateigröße.
+    """
+    decoder = json.JSONDecoder()
+
+    with open(path, "r", encoding="utf-8") as f:
+        buf, pos, eof = "", 0, False
+
+        def fill():
+            nonlocal buf, pos, eof
+            data = f.read(buffer_size)
+            if not data:
+                eof = True
+            buf = buf[pos:] + data
+            pos = 0
+
+        def next_char():
+            """Überspringt Whitespace und liefert das nächste Zeichen ('' am Dateiende)."""
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos].isspace():
+                    pos += 1
+                if pos < len(buf):
+                    return buf[pos]
+                if eof:
+                    return ""
+                fill()
+
+        if next_char() != "[":
+            raise ValueError(f"'{path}' enthält kein JSON-Array.")
+        pos += 1
+        if next_char() == "]":
+            return
+
+        while True:
+            next_char()
+            while True:
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    fill()
+                    continue
+                # Zahlen/Literale am Pufferende könnten abgeschnitten sein -> erst nachladen
+                if end >= len(buf) and not eof:
+                    fill()
+                    continue
+                break
+
+            pos = end
+            yield item
+
+            separator = next_char()
+            if separator == ",":
+                pos += 1
+            elif separator == "]":
+                return
+            else:
+                raise ValueError(f"Unerwartetes Zeichen '{separator}' in '{path}' (Position {pos}).")
@@ -1,4 +1,5 @@
 import os
+import sys
 import json
 import re
 import uuid
@@ -9,7 +10,13 @@ from pydantic import BaseModel, Field
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 # --- CONFIG LOADING ---
+# Vor dem Import von src.xref_graph: XREF_GRAPH_PATH folgt OUTPUT_JSON_PATH aus der .env (Graph neben den Chunks)
 load_dotenv()
+
+# Repo-Root in den Pfad, damit 'src' auch bei 'python src/mdr_parser.py' importierbar ist
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.xref_graph import XrefGraph, XREF_GRAPH_PATH
+
 OUTPUT_JSON_PATH = os.getenv("OUTPUT_JSON_PATH", "data/json") 
 
 # PFAD ZUR LOKALEN DATEI (Lösung A)
@@ -167,7 +174,13 @@ if __name__ == "__main__":
                 json.dump(data, f, indent=2, ensure_ascii=False)
             
             print(f"✅ Success! Saved {len(data)} chunks to '{output_file}'")
+
+            # Verweis-Graph (Artikel/Anhänge) neben den Chunks für die Kontext-Expansion im Auditor
+            graph = XrefGraph.build(data)
+            graph.save(XREF_GRAPH_PATH)
+            print(f"🔗 Verweis-Graph: {len(graph.nodes)} Elemente, {graph.edge_count} Verweise -> '{XREF_GRAPH_PATH}'")
             print("👉 NEXT STEP: Run 'python upload_manager.py' to index these chunks.")
 
     except Exception as e:
-        print(f"❌ Error: {e}")
\ No newline at end of file
+        print(f"❌ Error: {e}")
+        sys.exit(1)
\ No newline at end of file
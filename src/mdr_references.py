@@ -0,0 +1,77 @@
+import re
+
+# "Artikel 83", "Art. 83 Absatz 1", "Artikeln 83 bis 86", "Artikel 52, 54 und 61"
+_ARTICLE_RE = re.compile(
+    r"\b(?:Artikeln?|Art\.)\s*(\d+[a-z]?(?:\s*(?:,|und|oder|bis|sowie)\s*(?:Artikel\s*)?\d+[a-z]?)*)")
+# "Anhang XIV", "Anhang II Abschnitt 3", "Anhänge II und III"
+_ANNEX_RE = re.compile(
+    r"\bAnh(?:ang|änge|ängen|\.)\s+([IVXL]+(?:\s*(?:,|und|oder|bis|sowie)\s*[IVXL]+)*)\b")
+# Verweise auf andere Rechtsakte ("Artikel 5 der Richtlinie 93/42/EWG") gehören nicht in die MDR
+_EXTERNAL_RE = re.compile(r"\s*(?:Absatz\s*\d+\s*)?(?:Buchstabe\s*\w\s*)?(?:der|des)\s+(?:Richtlinie|Verordnung\s*\((?:EG|EWG|EU)\)|Beschlusses|Entscheidung)")
+_CHUNK_ELEMENT_RE = re.compile(r"^mdr_(art_\d+[a-z]?|anx_[ivxlc]+)(?:_\d+)?$", re.IGNORECASE)
+_TITLE_RE = re.compile(r"^\s*(?:Artikel\s+(\d+[a-z]?)|ANHANG\s+([IVXLC]+))\b", re.IGNORECASE)
+
+_ROMAN = {"I": 1, "V": 5, "X": 10, "L": 50, "C": 100}
+MAX_RANGE = 20
+
+def roman_to_int(numeral: str) -> int:
+    total = 0
+    for i, char in enumerate(numeral):
+        value = _ROMAN[char]
+        total += -value if i + 1 < len(numeral) and _ROMAN[numeral[i + 1]] > value else value
+    return total
+
+def int_to_roman(number: int) -> str:
+    parts = []
+    for value, numeral in ((100, "C"), (90, "XC"), (50, "L"), (40, "XL"), (10, "X"), (9, "IX"), (5, "V"), (4, "IV"), (1, "I")):
+        while number >= value:
+            parts.append(numeral)
+            number -= value
+    return "".join(parts)
+
+def _expand(match_text: str, token_re: str, to_int, from_int) -> list:
+    """'83 bis 86' -> [83, 84, 85, 86]; '52, 54 und 61' -> [52, 54, 61] (Ranges max. MAX_RANGE)."""
+    tokens = re.findall(rf"{token_re}|bis", match_text)
+    values, i = [], 0
+    while i < len(tokens):
+        if tokens[i] == "bis" and values and i + 1 < len(tokens):
+            start, end = to_int(values[-1]), to_int(tokens[i + 1])
+            if start is not None and end is not None and 0 < end - start <= MAX_RANGE:
+                values.extend(from_int(n) for n in range(start + 1, end + 1))
+            else:
+                values.append(tokens[i + 1])
+            i += 2
+            continue
+        if tokens[i] != "bis":
+            values.append(tokens[i])
+        i += 1
+    return values
+
+def _article_number(token):
+    return int(token) if token.isdigit() else None
+
+def extract_references(text: str) -> list:
+    """
+    MDR-interne Verweise in einem Text als Element-Keys in Text-Reihenfolge (ohne Dubletten):
+    'gemäß Artikel 83 und Anhang XIV' -> ['art_83', 'anx_xiv']. Die Keys entsprechen den
+    Element-IDs des EUR-Lex HTML (Chunk-ID 'mdr_<key>_<i>').
+    """
+    found = []
+    for match in _ARTICLE_RE.finditer(text or ""):
+        if not _EXTERNAL_RE.match(text, match.end()):
+            found.extend((match.start(), f"art_{n}") for n in _expand(match.group(1), r"\d+[a-z]?", _article_number, str))
+    for match in _ANNEX_RE.finditer(text or ""):
+        if not _EXTERNAL_RE.match(text, match.end()):
+            found.extend((match.start(), f"anx_{n.lower()}") for n in _expand(match.group(1), r"[IVXL]+", roman_to_int, int_to_roman))
+    return list(dict.fromkeys(key for _, key in sorted(found, key=lambda item: item[0])))
+
+def chunk_element(hit) -> str:
+    """Element-Key eines Treffers ('mdr_art_83_1' -> 'art_83'); Fallback über den Titel. None für Nicht-MDR."""
+    match = _CHUNK_ELEMENT_RE.match(hit.get("id") or "")
+    if match:
+        return match.group(1).lower()
+    if hit.get("source_type") == "MDR":
+        match = _TITLE_RE.match(hit.get("title") or "")
+        if match:
+            return f"art_{match.group(1).lower()}" if match.group(1) else f"anx_{match.group(2).lower()}"
+    return None
@@ -14,7 +14,7 @@ class MDRChunk(BaseModel):
     valid_from: str = Field(..., description="ISO 8601 Date, e.g. 2025-01-10T00:00:00Z")
 
     # Vector field
-    contentVector: Optional[List[float]] = Field(default=None, description="Embedding vector (3072 dimensions)")
+    contentVector: Optional[List[float]] = Field(default=None, description="Embedding vector (AZURE_OPENAI_EMBEDDING_DIMENSIONS, default 3072)")
 
 class ComplianceData(BaseModel):
     chunks: list[MDRChunk]
@@ -0,0 +1,60 @@
+import os
+import json
+import time
+import threading
+
+# Optionales JSONL-Log pro Request (Prompt-/Cache-Tokens, Latenz) für Auswertungen über mehrere Läufe
+PROMPT_USAGE_LOG = os.getenv("PROMPT_USAGE_LOG")
+
+def usage_counts(response) -> dict:
+    """Token-Zählung aus einer Chat Completion (prompt_tokens_details.cached_tokens = Prompt-Cache Treffer)."""
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None) or 0,
+        "cached_tokens": getattr(details, "cached_tokens", None) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", None) or 0,
+    }
+
+class PromptUsage:
+    """
+    Summiert Prompt-, Cache- und Output-Tokens sowie die Latenz pro Call-Art (thread-sicher).
+
+    Azure OpenAI cached automatisch identische Prompt-Präfixe ab 1024 Tokens; die Prompts
+    sind deshalb als statischer System-Prompt + variabler User-Teil aufgebaut. Die Cache-Quote
+    zeigt, ob das greift (gecachte Tokens sind günstiger und verkürzen die Time-to-First-Token).
+    """
+
+    def __init__(self, log_path: str = PROMPT_USAGE_LOG):
+        self.log_path = log_path
+        self.totals = {}
+        self._lock = threading.Lock()
+
+    def record(self, label: str, response, seconds: float = None):
+        counts = usage_counts(response)
+        with self._lock:
+            total = self.totals.setdefault(label, {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0,
+                                                   "completion_tokens": 0, "seconds": 0.0})
+            total["requests"] += 1
+            for key, value in counts.items():
+                total[key] += value
+            total["seconds"] += seconds or 0.0
+            if self.log_path:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"ts": time.time(), "label": label, "seconds": seconds, **counts}) + "\n")
+        return response
+
+    def call(self, label: str, fn, *args, **kwargs):
+        """Führt den Chat Call aus (z.B. limiter.call) und zeichnet Usage + Latenz auf."""
+        start = time.perf_counter()
+        response = fn(*args, **kwargs)
+        return self.record(label, response, time.perf_counter() - start)
+
+    def summary(self) -> str:
+        with self._lock:
+            parts = []
+            for label, t in self.totals.items():
+                share = 100 * t["cached_tokens"] / t["prompt_tokens"] if t["prompt_tokens"] else 0
+                parts.append(f"{label}: {t['requests']} Requests, {t['cached_tokens']}/{t['prompt_tokens']} Prompt-Tokens "
+                             f"aus dem Cache ({share:.0f}%), Ø {t['seconds'] / t['requests']:.2f}s")
+            return "Prompt Cache: " + ("; ".join(parts) if parts else "keine Requests")
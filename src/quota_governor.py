@@ -0,0 +1,261 @@
+import os
+import time
+import uuid
+import sqlite3
+import threading
+from types import SimpleNamespace
+from functools import lru_cache
+
+# Konfiguration wird erst beim Aufruf gelesen: die Tools importieren dieses Modul vor ihrem load_dotenv()
+def quota_db_path() -> str:
+    """Gemeinsame Quota-Datei für alle Prozesse (Refinement, Upload, CLI/Batch Audit, Streamlit)."""
+    return os.getenv("QUOTA_DB_PATH", "data/cache/quota_governor.sqlite")
+
+def quota_budgets() -> dict:
+    """(TPM, RPM) pro Deployment aus QUOTA_*_TPM/RPM (0 = ungeregelt, Default -> bisheriges Verhalten)."""
+    return {
+        os.getenv("AZURE_OPENAI_CHAT_DEPLOYMENT", "gpt-5.1-chat"): (
+            int(os.getenv("QUOTA_CHAT_TPM", "0")), int(os.getenv("QUOTA_CHAT_RPM", "0"))),
+        os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT", "text-embedding-3-large"): (
+            int(os.getenv("QUOTA_EMBEDDING_TPM", "0")), int(os.getenv("QUOTA_EMBEDDING_RPM", "0"))),
+    }
+
+def quota_priority():
+    """Priorität des Prozesses (überschreibt den Default des Tools): interactive | normal | batch."""
+    return os.getenv("QUOTA_PRIORITY") or None
+
+def quota_interactive_reserve() -> float:
+    """Anteil des Budgets, den nur interaktive Requests nutzen dürfen (sofortige Antwort auch bei voller Batch-Last)."""
+    return float(os.getenv("QUOTA_INTERACTIVE_RESERVE", "0.05"))
+
+def quota_completion_tokens() -> int:
+    """Geschätzte Output-Tokens, wenn der Request kein max_tokens setzt (wird nach der Antwort verrechnet)."""
+    return int(os.getenv("QUOTA_COMPLETION_TOKENS", "1000"))
+
+PRIORITIES = {"interactive": 0, "normal": 5, "batch": 10}
+# Wartende ohne Heartbeat seit so vielen Sekunden gelten als tot (abgestürzter Prozess)
+WAITER_TIMEOUT = 5.0
+POLL_SECONDS = 0.25
+# Grants zählen etwas länger als das Fenster: Azure stempelt den Request erst bei Ankunft (Netzwerk, Uhrversatz)
+WINDOW_MARGIN = 0.02
+
+def is_throttled(error: Exception) -> bool:
+    """429 von Azure OpenAI (openai.RateLimitError) oder Azure Search (HttpResponseError)."""
+    return getattr(error, "status_code", None) == 429
+
+def retry_after_seconds(error: Exception):
+    """Retry-After Header der 429-Antwort in Sekunden oder None."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+def estimate_tokens(kwargs: dict) -> int:
+    """Grobe Token-Schätzung vor dem Call (≈ 4 Zeichen pro Token), wie sie auch Azure für das TPM-Limit ansetzt."""
+    if "messages" in kwargs:
+        chars = sum(len(m.get("content") or "") for m in kwargs["messages"])
+        completion = kwargs.get("max_tokens") or kwargs.get("max_completion_tokens") or quota_completion_tokens()
+        return chars // 4 + 1 + completion
+    texts = kwargs.get("input") or ""
+    texts = [texts] if isinstance(texts, str) else texts
+    return sum(len(t) for t in texts) // 4 + 1
+
+class QuotaGovernor:
+    """
+    Prozessübergreifendes TPM/RPM-Budget pro Deployment als Sliding Window (SQLite, BEGIN IMMEDIATE als Lock):
+      - jeder freigegebene Request steht mit Zeitpunkt und geschätzten Tokens in 'grants'; frei wird
+        ein Request, wenn die Summe der letzten `window` Sekunden inkl. ihm im Budget bleibt (wie das
+        Minutenfenster von Azure - anders als ein Token Bucket kein doppeltes Budget durch Bursts)
+      - nach der Antwort werden die tatsächlichen Tokens eingetragen (settle)
+      - Priorität: solange ein Prozess mit höherer Priorität wartet, nehmen niedrigere nichts;
+        die letzten QUOTA_INTERACTIVE_RESERVE des Budgets sind interaktiven Requests vorbehalten
+      - 429: blocked_until gilt für alle Prozesse (kein 429-Sturm durch parallele Retries)
+    """
+
+    def __init__(self, path: str = None, budgets: dict = None, window: float = 60.0, reserve: float = None):
+        path = path or quota_db_path()
+        self.path = path
+        # 0 = Dimension ungeregelt; Deployments ohne Budget laufen am Governor vorbei
+        self.budgets = {name: budget for name, budget in (budgets if budgets is not None else quota_budgets()).items()
+                        if budget[0] > 0 or budget[1] > 0}
+        self.window = window
+        self.horizon = window * (1 + WINDOW_MARGIN)
+        self.reserve = reserve if reserve is not None else quota_interactive_reserve()
+        self.stats = {"requests": 0, "waited_seconds": 0.0, "throttled": 0}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS grants (
+                id INTEGER PRIMARY KEY,
+                deployment TEXT NOT NULL,
+                ts REAL NOT NULL,
+                tokens REAL NOT NULL
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS grants_window ON grants (deployment, ts)")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS blocks (
+                deployment TEXT PRIMARY KEY,
+                until REAL NOT NULL
+            )""")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS waiters (
+                id TEXT PRIMARY KEY,
+                deployment TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                heartbeat REAL NOT NULL
+            )""")
+
+    def _transaction(self, fn):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(time.time())
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            return result
+
+    def _expiry_wait(self, deployment: str, now: float, tokens_over: float, requests_over: int) -> float:
+        """Sekunden, bis genug alte Grants aus dem Fenster gefallen sind."""
+        wait, freed_tokens, freed_requests = 0.0, 0.0, 0
+        for ts, tokens in self._db.execute("SELECT ts, tokens FROM grants WHERE deployment = ? ORDER BY ts", (deployment,)):
+            if freed_tokens >= tokens_over and freed_requests >= requests_over:
+                break
+            freed_tokens += tokens
+            freed_requests += 1
+            wait = ts + self.horizon - now
+        return wait
+
+    def acquire(self, deployment: str, tokens: int, priority: str = "normal"):
+        """Blockiert, bis das Budget den Request erlaubt. Rückgabe: Grant-ID für settle (None = ungeregelt)."""
+        if deployment not in self.budgets:
+            return None
+        tpm, rpm = self.budgets[deployment]
+        rank = PRIORITIES.get(priority, PRIORITIES["normal"])
+        share = 1.0 if rank <= PRIORITIES["interactive"] else 1.0 - self.reserve
+        token_limit = tpm * share if tpm else float("inf")
+        request_limit = int(rpm * share) if rpm else float("inf")
+        tokens = min(tokens, token_limit)  # Requests über dem Budget würden sonst nie starten
+        waiter_id = uuid.uuid4().hex
+        start = time.monotonic()
+
+        def attempt(now):
+            self._db.execute("INSERT OR REPLACE INTO waiters VALUES (?, ?, ?, ?)", (waiter_id, deployment, rank, now))
+            self._db.execute("DELETE FROM waiters WHERE heartbeat < ?", (now - WAITER_TIMEOUT,))
+            self._db.execute("DELETE FROM grants WHERE deployment = ? AND ts <= ?", (deployment, now - self.horizon))
+
+            block = self._db.execute("SELECT until FROM blocks WHERE deployment = ?", (deployment,)).fetchone()
+            if block and block[0] > now:
+                return block[0] - now, None
+            ahead = self._db.execute("SELECT 1 FROM waiters WHERE deployment = ? AND priority < ? LIMIT 1",
+                                     (deployment, rank)).fetchone()
+            if ahead:
+                return POLL_SECONDS, None
+
+            used_tokens, used_requests = self._db.execute(
+                "SELECT COALESCE(SUM(tokens), 0), COUNT(*) FROM grants WHERE deployment = ?", (deployment,)).fetchone()
+            tokens_over = used_tokens + tokens - token_limit
+            requests_over = used_requests + 1 - request_limit
+            if tokens_over <= 0 and requests_over <= 0:
+                grant = self._db.execute("INSERT INTO grants (deployment, ts, tokens) VALUES (?, ?, ?)",
+                                         (deployment, now, tokens)).lastrowid
+                self._db.execute("DELETE FROM waiters WHERE id = ?", (waiter_id,))
+                return 0.0, grant
+            return max(0.01, self._expiry_wait(deployment, now, max(tokens_over, 0), max(requests_over, 0))), None
+
+        try:
+            while True:
+                wait, grant = self._transaction(attempt)
+                if grant is not None:
+                    break
+                time.sleep(min(wait, POLL_SECONDS))
+        except BaseException:
+            self._transaction(lambda now: self._db.execute("DELETE FROM waiters WHERE id = ?", (waiter_id,)))
+            raise
+
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["waited_seconds"] += time.monotonic() - start
+        return grant
+
+    def settle(self, grant, actual: int):
+        """Geschätzte Tokens eines Grants durch die tatsächlichen ersetzen."""
+        if grant is None or actual is None:
+            return
+        self._transaction(lambda now: self._db.execute("UPDATE grants SET tokens = ? WHERE id = ?", (actual, grant)))
+
+    def backoff(self, deployment: str, seconds: float = None):
+        """429 erhalten: alle Prozesse pausieren das Deployment (Retry-After oder ein Zehntel des Fensters)."""
+        if deployment not in self.budgets:
+            return
+        until = time.time() + (seconds if seconds is not None else self.window / 10)
+        self._transaction(lambda now: self._db.execute(
+            "INSERT INTO blocks VALUES (?, ?) ON CONFLICT(deployment) DO UPDATE SET until = MAX(until, excluded.until)",
+            (deployment, until)))
+        with self._lock:
+            self.stats["throttled"] += 1
+
+    def call(self, deployment: str, fn, *args, priority: str = "normal", tokens: int = None, **kwargs):
+        """fn unter dem Budget ausführen. 429 wird an alle Prozesse gemeldet und weitergereicht (Retry macht der Aufrufer)."""
+        grant = self.acquire(deployment, tokens if tokens is not None else estimate_tokens(kwargs), priority)
+        try:
+            response = fn(*args, **kwargs)
+        except Exception as e:
+            # Abgelehnt/fehlgeschlagen: Azure hat nichts verbraucht -> Grant freigeben, sonst zählt der Retry doppelt
+            self.settle(grant, 0)
+            if is_throttled(e):
+                self.backoff(deployment, retry_after_seconds(e))
+            raise
+        usage = getattr(response, "usage", None)
+        self.settle(grant, getattr(usage, "total_tokens", None))
+        return response
+
+    def summary(self) -> str:
+        requests = self.stats["requests"]
+        waited = self.stats["waited_seconds"] / requests if requests else 0.0
+        return f"Quota Governor: {requests} Requests, Ø {waited:.2f}s gewartet, {self.stats['throttled']}x 429"
+
+class _Endpoint:
+    def __init__(self, governor, create, priority):
+        self._governor = governor
+        self._create = create
+        self._priority = priority
+
+    def create(self, *args, **kwargs):
+        return self._governor.call(kwargs.get("model"), self._create, *args, priority=self._priority, **kwargs)
+
+class GovernedClient:
+    """
+    (Azure)OpenAI Client, dessen chat.completions.create und embeddings.create über den
+    Governor laufen (Deployment = model). Alles andere geht direkt an den Client.
+    """
+
+    def __init__(self, client, governor: QuotaGovernor, priority: str = "normal"):
+        self._client = client
+        self.governor = governor
+        self.priority = priority
+        self.chat = SimpleNamespace(completions=_Endpoint(governor, client.chat.completions.create, priority))
+        self.embeddings = _Endpoint(governor, client.embeddings.create, priority)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+@lru_cache(maxsize=None)
+def default_governor() -> QuotaGovernor:
+    return QuotaGovernor()
+
+def governor_summary():
+    """Zusammenfassung des Prozess-Governors oder None, wenn kein Budget konfiguriert ist."""
+    return default_governor().summary() if default_governor.cache_info().currsize else None
+
+def govern(client, priority: str = "normal"):
+    """Client unter den geteilten Governor stellen - nur wenn ein Budget konfiguriert ist (QUOTA_*_TPM/RPM)."""
+    if not any(tpm > 0 or rpm > 0 for tpm, rpm in quota_budgets().values()):
+        return client
+    return GovernedClient(client, default_governor(), quota_priority() or priority)
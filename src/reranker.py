@@ -0,0 +1,64 @@
+import os
+import numpy as np
+
+from src.bm25 import BM25Index
+from src.mdr_references import extract_references, chunk_element
+
+# Kandidaten aus der Suche, die lokal neu gerankt werden (<= top: kein Reranking)
+RERANK_CANDIDATES = int(os.getenv("AUDIT_RERANK_CANDIDATES", "30"))
+
+# Gewichte der Features (alle Features auf 0..1 normiert)
+RERANK_WEIGHTS = {
+    "retrieval": 1.0,   # Score der Suche (Hybrid/RRF bzw. Cosine), min-max normiert
+    "vector": 1.0,      # Cosine Claim <-> Chunk (nur wenn das Backend die Vektoren lokal hat)
+    "bm25": 0.6,        # BM25 des Claims über die Kandidaten (deutsches Tokenizing, Komposita)
+    "reference": 1.5,   # Claim nennt den Artikel/Anhang explizit ("gemäß Anhang XIV")
+    "source": 0.3,      # Quellen-Priorität (Verordnungstext vor Guidance)
+}
+SOURCE_PRIORITY = {"MDR": 1.0, "MDCG": 0.6}
+
+def _normalize(values) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float32)
+    if values.size == 0:
+        return values
+    low, high = float(values.min()), float(values.max())
+    if high - low < 1e-9:
+        return np.ones_like(values) if high > 0 else np.zeros_like(values)
+    return (values - low) / (high - low)
+
+def rerank_features(claim: str, hits: list, query_vector=None, similarity=None) -> dict:
+    """Feature-Matrix {Name: Array (n,)} für die Kandidaten einer Suche."""
+    n = len(hits)
+    scores = [h.get("@search.score") for h in hits]
+    if all(s is not None for s in scores):
+        retrieval = _normalize(scores)
+    else:
+        # Ohne Score: Rang der Suche (1.0 für den ersten Treffer)
+        retrieval = 1.0 - np.arange(n, dtype=np.float32) / max(n, 1)
+
+    vector = np.zeros(n, dtype=np.float32)
+    if similarity is not None and query_vector is not None:
+        vector = _normalize(similarity(query_vector, [h.get("id") for h in hits]))
+
+    index = BM25Index.build((i, " ".join(filter(None, [h.get("title"), h.get("content")]))) for i, h in enumerate(hits))
+    lexical = _normalize(index.score(claim))
+
+    references = set(extract_references(claim))
+    reference = np.array([1.0 if chunk_element(h) in references else 0.0 for h in hits], dtype=np.float32)
+    source = np.array([SOURCE_PRIORITY.get(h.get("source_type"), 0.0) for h in hits], dtype=np.float32)
+
+    return {"retrieval": retrieval, "vector": vector, "bm25": lexical, "reference": reference, "source": source}
+
+def rerank(claim: str, hits: list, top: int, query_vector=None, similarity=None, weights: dict = None) -> list:
+    """
+    Rankt die Kandidaten einer breiten Suche lokal neu und liefert die besten `top`.
+    similarity(query_vector, chunk_ids) -> Cosine Scores ist optional (lokaler Vector Store).
+    Bei Gleichstand bleibt die Reihenfolge der Suche erhalten.
+    """
+    if len(hits) <= 1:
+        return list(hits[:top])
+    weights = weights or RERANK_WEIGHTS
+    features = rerank_features(claim, hits, query_vector, similarity)
+    total = sum(weights.get(name, 0.0) * values for name, values in features.items())
+    order = np.argsort(-total, kind="stable")[:top]
+    return [hits[i] for i in order]
@@ -0,0 +1,166 @@
+import os
+import numpy as np
+
+from src.index_rebuild import iter_chunks
+from src.vector_store import LocalVectorStore
+from src.vector_math import top_k_from_scores
+from src.bm25 import BM25Index, reciprocal_rank_fusion
+
+# "azure" (Hybrid Search im Azure AI Search Index) | "local" (Vektor + BM25 Hybrid im Prozess)
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "azure").lower()
+LOCAL_VECTOR_STORE_PATH = os.getenv("LOCAL_VECTOR_STORE_PATH", "data/vectors")
+CHUNK_SOURCE = os.getenv("OUTPUT_JSON_PATH", "data/json")
+
+# Chunk-Felder, die der lokale Backend für Treffer im Speicher hält
+METADATA_FIELDS = ["id", "title", "content", "source_type", "url", "chapter"]
+# Kandidaten pro Ranking (Vektor / BM25), die per Reciprocal Rank Fusion gemischt werden
+HYBRID_CANDIDATES = int(os.getenv("LOCAL_HYBRID_CANDIDATES", "50"))
+
+class AzureSearchBackend:
+    """Hybrid Search (Keyword + Vektor) gegen Azure AI Search - ein Round Trip pro Query."""
+
+    def __init__(self, search_client, version: str = None):
+        self.search_client = search_client
+        self.version = version or getattr(search_client, "_index_name", "azure")
+
+    def search(self, text: str, vector, top: int = 3, select: list = None) -> list:
+        from azure.search.documents.models import VectorizedQuery
+        vector_query = VectorizedQuery(vector=vector, k_nearest_neighbors=top, fields="contentVector")
+        results = self.search_client.search(
+            search_text=text,
+            vector_queries=[vector_query],
+            select=select,
+            top=top
+        )
+        return [dict(res) for res in results]
+
+class LocalVectorBackend:
+    """
+    Exakte Cosine-Suche im Prozess über den lokalen Vector Store (kein Netzwerk).
+
+    Die Vektoren bleiben memory-mapped (vectors.f32); beim Laden werden nur die
+    Zeilen-Normen berechnet. Die Chunk-Metadaten kommen aus dem Pipeline Output
+    (JSON-Ordner oder JSON-Array) und werden über die ID zugeordnet.
+
+    Mit lexical=True wird zusätzlich ein BM25 Index (deutsches Tokenizing, Komposita)
+    über Titel/Kapitel/Content gehalten und wie in Azure per RRF mit der Vektorsuche
+    fusioniert. Der Index wird im Store-Ordner ('bm25/') gespeichert und nur neu
+    gebaut, wenn sich der Vector Store geändert hat.
+    """
+
+    def __init__(self, store_folder: str = LOCAL_VECTOR_STORE_PATH, chunk_source: str = CHUNK_SOURCE,
+                 block_rows: int = 65536, lexical: bool = True):
+        self.block_rows = block_rows
+        self.ids, self.matrix = LocalVectorStore(store_folder).load()
+        self.dims = self.matrix.shape[1]
+        self.inv_norms = self._inverse_norms()
+
+        wanted = set(self.ids)
+        self.metadata = {}
+        for chunk in iter_chunks(chunk_source):
+            if chunk.get("id") in wanted:
+                self.metadata[chunk["id"]] = {field: chunk.get(field) for field in METADATA_FIELDS}
+
+        missing = len(self.ids) - len(self.metadata)
+        if missing:
+            print(f"⚠️ {missing} Vektoren ohne Chunk-Metadaten in '{chunk_source}' (werden übersprungen).")
+        self.version = f"local-{len(self.ids)}-{int(os.path.getmtime(os.path.join(store_folder, 'ids.jsonl'))) if self.ids else 0}"
+
+        self.lexical = None
+        if lexical:
+            self.lexical = self._load_lexical_index(os.path.join(store_folder, "bm25"))
+        self._rows = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+
+    def _load_lexical_index(self, folder: str) -> BM25Index:
+        index = BM25Index.load(folder, self.version)
+        if index is None:
+            print(f"🔤 Baue lokalen BM25 Index über {len(self.metadata)} Chunks...")
+            index = BM25Index.build(
+                (chunk_id, " ".join(filter(None, [meta.get("title"), meta.get("chapter"), meta.get("content")])))
+                for chunk_id, meta in self.metadata.items()
+            )
+            index.save(folder, self.version)
+        return index
+
+    def _inverse_norms(self) -> np.ndarray:
+        norms = np.empty(len(self.ids), dtype=np.float32)
+        for start in range(0, len(self.ids), self.block_rows):
+            block = self.matrix[start:start + self.block_rows]
+            norms[start:start + len(block)] = np.linalg.norm(block, axis=1)
+        norms[norms == 0] = 1.0
+        return 1.0 / norms
+
+    def score(self, queries: np.ndarray) -> np.ndarray:
+        """Cosine Scores (q, n). Der Corpus wird blockweise gelesen, damit der memmap nicht komplett kopiert wird."""
+        queries = np.asarray(queries, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        if queries.shape[1] != self.dims:
+            raise ValueError(f"Query hat {queries.shape[1]} Dimensionen, Vector Store: {self.dims}.")
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+        scores = np.empty((queries.shape[0], len(self.ids)), dtype=np.float32)
+        for start in range(0, len(self.ids), self.block_rows):
+            block = self.matrix[start:start + self.block_rows]
+            scores[:, start:start + len(block)] = queries @ block.T
+        return scores * self.inv_norms
+
+    def search_vectors(self, queries: np.ndarray, k: int):
+        """Top-k für mehrere Queries auf einmal (Benchmarks, Bulk Audits). Rückgabe: (Indizes, Scores)."""
+        scores = self.score(queries)
+        if scores.shape[1] == 0:
+            empty = np.empty((scores.shape[0], 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+        top = top_k_from_scores(scores, k)
+        return top, np.take_along_axis(scores, top, axis=1)
+
+    def similarity(self, vector, chunk_ids: list) -> np.ndarray:
+        """Cosine zwischen Query und einzelnen Chunks (für das Reranking der Kandidaten). Unbekannte IDs -> 0."""
+        known = [i for i, chunk_id in enumerate(chunk_ids) if chunk_id in self._rows]
+        scores = np.zeros(len(chunk_ids), dtype=np.float32)
+        if known:
+            rows = np.array([self._rows[chunk_ids[i]] for i in known])
+            query = np.asarray(vector, dtype=np.float32)
+            query = query / max(float(np.linalg.norm(query)), 1e-12)
+            scores[known] = (self.matrix[rows] @ query) * self.inv_norms[rows]
+        return scores
+
+    def _hit(self, row: int, score: float, select: list = None):
+        meta = self.metadata.get(self.ids[row])
+        if meta is None:
+            return None
+        hit = {field: meta.get(field) for field in select} if select else dict(meta)
+        hit["@search.score"] = float(score)
+        return hit
+
+    def search(self, text: str, vector, top: int = 3, select: list = None) -> list:
+        if not text or self.lexical is None:
+            # Ein paar Kandidaten mehr, falls Vektoren ohne Metadaten dazwischen liegen
+            rows, scores = self.search_vectors(vector, top + 8)
+            hits = [self._hit(int(r), s, select) for r, s in zip(rows[0], scores[0])]
+            return [h for h in hits if h is not None][:top]
+
+        # Hybrid: Vektor- und BM25-Ranking getrennt, dann Reciprocal Rank Fusion
+        candidates = max(HYBRID_CANDIDATES, top)
+        rows, _ = self.search_vectors(vector, candidates)
+        vector_ranking = [self.ids[int(r)] for r in rows[0]]
+        lexical_ranking = [doc_id for doc_id, _ in self.lexical.search(text, candidates)]
+
+        hits = []
+        for chunk_id, score in reciprocal_rank_fusion([vector_ranking, lexical_ranking]):
+            hit = self._hit(self._rows[chunk_id], score, select)
+            if hit is not None:
+                hits.append(hit)
+            if len(hits) == top:
+                break
+        return hits
+
+def create_retrieval_backend(kind: str = RETRIEVAL_BACKEND, search_client=None, version: str = None):
+    """Factory für RETRIEVAL_BACKEND=azure|local."""
+    if kind == "local":
+        return LocalVectorBackend()
+    if kind == "azure":
+        if search_client is None:
+            raise ValueError("RETRIEVAL_BACKEND=azure braucht einen SearchClient.")
+        return AzureSearchBackend(search_client, version)
+    raise ValueError(f"Unbekanntes Retrieval Backend: '{kind}' (erlaubt: azure, local)")
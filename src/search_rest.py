@@ -0,0 +1,59 @@
+import requests
+
+# REST API statt SDK: Aliase gibt es nur in Preview-Versionen, und ein schlanker
+# HTTP-Client lässt sich gegen einen lokalen Stand-in des Search Service testen.
+DEFAULT_API_VERSION = "2025-09-01"
+ALIAS_API_VERSION = "2025-08-01-preview"
+
+class SearchRestError(Exception):
+    pass
+
+class SearchRestClient:
+    """Minimaler Client für die Azure AI Search REST API (Index-Verwaltung, Upload, Aliase)."""
+
+    def __init__(self, endpoint: str, key: str, api_version: str = DEFAULT_API_VERSION, alias_api_version: str = ALIAS_API_VERSION, timeout: int = 60):
+        self.endpoint = endpoint.rstrip("/")
+        self.api_version = api_version
+        self.alias_api_version = alias_api_version
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({"api-key": key, "Content-Type": "application/json"})
+
+    def _request(self, method: str, path: str, api_version: str = None, expected=(200, 201, 204), **kwargs):
+        url = f"{self.endpoint}{path}"
+        params = {"api-version": api_version or self.api_version}
+        response = self.session.request(method, url, params=params, timeout=self.timeout, **kwargs)
+        if response.status_code not in expected:
+            raise SearchRestError(f"{method} {path} -> HTTP {response.status_code}: {response.text[:500]}")
+        return response
+
+    # --- Indexe ---
+    def index_exists(self, name: str) -> bool:
+        response = self._request("GET", f"/indexes/{name}", expected=(200, 404))
+        return response.status_code == 200
+
+    def create_index(self, schema: dict):
+        self._request("PUT", f"/indexes/{schema['name']}", json=schema)
+
+    def delete_index(self, name: str):
+        self._request("DELETE", f"/indexes/{name}", expected=(204, 404))
+
+    def document_count(self, name: str) -> int:
+        response = self._request("GET", f"/indexes/{name}/docs/$count")
+        return int(response.content.decode("utf-8-sig").strip())
+
+    def upload_documents(self, name: str, documents: list) -> list:
+        """mergeOrUpload eines Batches. Rückgabe: Liste der Ergebnisse pro Dokument (key, status, errorMessage)."""
+        payload = {"value": [{"@search.action": "mergeOrUpload", **doc} for doc in documents]}
+        # 207 = Multi-Status (einzelne Dokumente fehlgeschlagen)
+        response = self._request("POST", f"/indexes/{name}/docs/index", json=payload, expected=(200, 207))
+        return response.json()["value"]
+
+    # --- Aliase ---
+    def get_alias(self, name: str):
+        response = self._request("GET", f"/aliases/{name}", api_version=self.alias_api_version, expected=(200, 404))
+        return response.json() if response.status_code == 200 else None
+
+    def create_or_update_alias(self, name: str, index_name: str):
+        self._request("PUT", f"/aliases/{name}", api_version=self.alias_api_version,
+                      json={"name": name, "indexes": [index_name]})
@@ -0,0 +1,70 @@
+import numpy as np
+
+# --- VECTOR HELPERS (Offline Benchmarks & lokale Suche) ---
+# Alle Funktionen arbeiten auf float32 Matrizen der Form (n_vectors, dims).
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-Normalisierung pro Zeile, damit das Skalarprodukt der Cosine Similarity entspricht."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def truncate_dimensions(matrix: np.ndarray, dims: int) -> np.ndarray:
+    """
+    Verkürzt text-embedding-3 Vektoren auf 'dims' Dimensionen und normalisiert neu.
+    Entspricht dem 'dimensions' Parameter der Embedding API (Matryoshka Embeddings).
+    """
+    if dims > matrix.shape[1]:
+        raise ValueError(f"Kann nicht auf {dims} Dimensionen verkürzen (Vektor hat {matrix.shape[1]}).")
+    return normalize_rows(matrix[:, :dims])
+
+def quantize_scalar_int8(matrix: np.ndarray):
+    """
+    Skalare Quantisierung auf int8 (wie 'scalarQuantization' in Azure AI Search).
+    Min/Max werden pro Dimension bestimmt. Rückgabe: (codes, minimum, scale).
+    """
+    minimum = matrix.min(axis=0)
+    scale = (matrix.max(axis=0) - minimum) / 255.0
+    scale[scale == 0] = 1.0
+    codes = np.round((matrix - minimum) / scale - 128).astype(np.int8)
+    return codes, minimum.astype(np.float32), scale.astype(np.float32)
+
+def dequantize_scalar_int8(codes: np.ndarray, minimum: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    return (codes.astype(np.float32) + 128) * scale + minimum
+
+def quantize_binary(matrix: np.ndarray) -> np.ndarray:
+    """Binäre Quantisierung (1 Bit pro Dimension, Vorzeichen), gepackt in uint8."""
+    return np.packbits(matrix > 0, axis=1)
+
+def hamming_similarity(codes: np.ndarray, query_codes: np.ndarray) -> np.ndarray:
+    """Negative Hamming-Distanz zwischen Query-Codes (q, bytes) und Corpus-Codes (n, bytes)."""
+    distances = np.empty((query_codes.shape[0], codes.shape[0]), dtype=np.int32)
+    for i, q in enumerate(query_codes):
+        distances[i] = np.bitwise_count(np.bitwise_xor(codes, q)).sum(axis=1)
+    return -distances
+
+def top_k_from_scores(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indizes der k höchsten Scores pro Zeile, absteigend sortiert."""
+    k = min(k, scores.shape[1])
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1)
+    return np.take_along_axis(part, order, axis=1)
+
+def exact_top_k(matrix: np.ndarray, queries: np.ndarray, k: int, block_size: int = 256) -> np.ndarray:
+    """
+    Exakte Top-k Suche (Brute Force, Skalarprodukt) über normalisierte Vektoren.
+    Die Queries werden blockweise verarbeitet, damit die Score-Matrix klein bleibt.
+    """
+    results = []
+    for start in range(0, queries.shape[0], block_size):
+        scores = queries[start:start + block_size] @ matrix.T
+        results.append(top_k_from_scores(scores, k))
+    return np.vstack(results) if results else np.empty((0, k), dtype=np.int64)
+
+def recall_at_k(approx_ids: np.ndarray, exact_ids: np.ndarray) -> float:
+    """Anteil der exakten Top-k Treffer, die auch in der approximativen Liste stehen."""
+    hits = 0
+    for approx, exact in zip(approx_ids, exact_ids):
+        hits += len(set(approx.tolist()) & set(exact.tolist()))
+    return hits / max(exact_ids.size, 1)
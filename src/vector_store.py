@@ -0,0 +1,125 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+def content_hash(text: str) -> str:
+    """Hash über den Text, aus dem das Embedding erzeugt wird."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+class LocalVectorStore:
+    """
+    Append-only Ablage für Embeddings auf der lokalen Platte.
+
+    Layout im Ordner:
+      - meta.json     -> {"dims": 3072}
+      - vectors.f32   -> float32 Rohdaten, eine Zeile pro Eintrag (memory-mappable)
+      - ids.jsonl     -> {"id": ..., "hash": ...} pro Zeile, gleiche Reihenfolge wie vectors.f32
+
+    Wird ein Chunk erneut gespeichert, gewinnt der letzte Eintrag. Ein Absturz mitten im
+    Schreiben hinterlässt höchstens eine unvollständige letzte Zeile, die beim Öffnen
+    abgeschnitten wird.
+    """
+
+    def __init__(self, folder: str, dims: int = None):
+        self.folder = folder
+        self.vectors_path = os.path.join(folder, "vectors.f32")
+        self.ids_path = os.path.join(folder, "ids.jsonl")
+        self.meta_path = os.path.join(folder, "meta.json")
+        os.makedirs(folder, exist_ok=True)
+
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                stored_dims = json.load(f)["dims"]
+            if dims and dims != stored_dims:
+                raise ValueError(f"Vector Store '{folder}' hat {stored_dims} Dimensionen, erwartet: {dims}.")
+            self.dims = stored_dims
+        else:
+            if not dims:
+                raise ValueError(f"Vector Store '{folder}' existiert nicht und 'dims' fehlt.")
+            self.dims = dims
+            with open(self.meta_path, "w", encoding="utf-8") as f:
+                json.dump({"dims": dims}, f)
+
+        self._row_bytes = self.dims * 4
+        self._rows = {}    # id -> Zeile in vectors.f32
+        self._hashes = {}  # id -> content hash
+        self._count = 0
+        self._recover()
+
+    def _recover(self):
+        """Liest ids.jsonl ein und schneidet halb geschriebene Einträge ab."""
+        entries = []
+        line_lengths = []
+        if os.path.exists(self.ids_path):
+            with open(self.ids_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    entries.append(json.loads(line))
+                    line_lengths.append(len(line))
+
+        vector_rows = os.path.getsize(self.vectors_path) // self._row_bytes if os.path.exists(self.vectors_path) else 0
+        entries = entries[:vector_rows]
+        valid_bytes = sum(line_lengths[:len(entries)])
+
+        if os.path.exists(self.ids_path):
+            with open(self.ids_path, "r+b") as f:
+                f.truncate(valid_bytes)
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(len(entries) * self._row_bytes)
+
+        for row, entry in enumerate(entries):
+            self._rows[entry["id"]] = row
+            self._hashes[entry["id"]] = entry.get("hash")
+        self._count = len(entries)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, chunk_id):
+        return chunk_id in self._rows
+
+    def has(self, chunk_id: str, content_hash: str = None) -> bool:
+        """True, wenn ein Vektor für die ID existiert (und ggf. der Content Hash passt)."""
+        if chunk_id not in self._rows:
+            return False
+        return content_hash is None or self._hashes.get(chunk_id) == content_hash
+
+    def add(self, chunk_id: str, vector, content_hash: str = None):
+        vec = np.asarray(vector, dtype=np.float32)
+        if vec.shape != (self.dims,):
+            raise ValueError(f"Vektor für '{chunk_id}' hat {vec.shape[0]} Dimensionen, erwartet: {self.dims}.")
+
+        # Erst der Vektor, dann die ID-Zeile: so zeigt nie eine ID auf einen fehlenden Vektor
+        with open(self.vectors_path, "ab") as f:
+            f.write(vec.tobytes())
+        with open(self.ids_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"id": chunk_id, "hash": content_hash}, ensure_ascii=False) + "\n")
+
+        self._rows[chunk_id] = self._count
+        self._hashes[chunk_id] = content_hash
+        self._count += 1
+
+    def get(self, chunk_id: str, content_hash: str = None):
+        """Liefert den Vektor als Liste (für den Upload) oder None."""
+        if not self.has(chunk_id, content_hash):
+            return None
+        vec = np.fromfile(self.vectors_path, dtype=np.float32, count=self.dims,
+                          offset=self._rows[chunk_id] * self._row_bytes)
+        return vec.tolist()
+
+    def load(self):
+        """
+        Memory-mapped Sicht auf alle aktuellen Vektoren.
+        Rückgabe: (ids, matrix) - matrix ist ein np.memmap bzw. ein Array ohne Duplikate.
+        """
+        if self._count == 0:
+            return [], np.empty((0, self.dims), dtype=np.float32)
+
+        matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self._count, self.dims))
+        ids = sorted(self._rows, key=self._rows.get)
+        if len(ids) == self._count:
+            return ids, matrix
+        # Überschriebene Einträge ausblenden (letzter gewinnt)
+        return ids, matrix[[self._rows[i] for i in ids]]
@@ -0,0 +1,110 @@
+import os
+import json
+import numpy as np
+
+from src.mdr_references import extract_references, chunk_element
+
+CHUNK_SOURCE = os.getenv("OUTPUT_JSON_PATH", "data/json")
+# Verweis-Graph liegt neben den Chunks (Unterordner -> wird von iter_chunks nicht als Chunk-Datei gelesen)
+XREF_GRAPH_PATH = os.getenv("XREF_GRAPH_PATH", os.path.join(CHUNK_SOURCE, "mdr_xref"))
+# Textauszug pro Artikel/Anhang, der bei der Expansion in den Kontext geht
+XREF_EXCERPT_CHARS = int(os.getenv("XREF_EXCERPT_CHARS", "1200"))
+
+class XrefGraph:
+    """
+    Verweise zwischen MDR Artikeln und Anhängen ("gemäß Anhang XIV") als CSR-Adjazenz:
+      offsets[n]..offsets[n+1] -> targets (int32, Knoten-Indizes) für Knoten n
+    Pro Knoten (Element-Key 'art_83' / 'anx_xiv') werden Titel, erste Chunk-ID und ein
+    Textauszug gehalten, damit der Auditor referenzierte Vorschriften ohne weitere Suche
+    in den Kontext nehmen kann.
+    """
+
+    def __init__(self, nodes, offsets, targets, titles, chunk_ids, excerpts):
+        self.nodes = list(nodes)
+        self.offsets = offsets
+        self.targets = targets
+        self.titles = list(titles)
+        self.chunk_ids = list(chunk_ids)
+        self.excerpts = list(excerpts)
+        self._index = {node: i for i, node in enumerate(self.nodes)}
+
+    @classmethod
+    def build(cls, chunks, excerpt_chars: int = XREF_EXCERPT_CHARS):
+        """chunks: MDR Chunks (dicts wie aus parse_mdr). Verweise auf nicht vorhandene Elemente fallen weg."""
+        nodes, titles, chunk_ids, excerpts, references = [], [], [], [], {}
+        for chunk in chunks:
+            element = chunk_element(chunk)
+            if element is None:
+                continue
+            if element not in references:
+                nodes.append(element)
+                # Titel ohne "(Part i/n)", Auszug vom Anfang des Elements
+                titles.append((chunk.get("title") or "").split(" (Part ")[0])
+                chunk_ids.append(chunk.get("id"))
+                excerpts.append((chunk.get("content") or "")[:excerpt_chars])
+                references[element] = []
+            references[element].extend(extract_references(chunk.get("content") or ""))
+
+        index = {node: i for i, node in enumerate(nodes)}
+        offsets = np.zeros(len(nodes) + 1, dtype=np.int64)
+        targets = []
+        for i, node in enumerate(nodes):
+            linked = [index[ref] for ref in dict.fromkeys(references[node]) if ref in index and ref != node]
+            targets.extend(linked)
+            offsets[i + 1] = len(targets)
+        return cls(nodes, offsets, np.asarray(targets, dtype=np.int32), titles, chunk_ids, excerpts)
+
+    @property
+    def edge_count(self) -> int:
+        return int(self.targets.size)
+
+    def nbytes(self) -> int:
+        """Speicher der Adjazenz (ohne Titel/Auszüge)."""
+        return int(self.offsets.nbytes + self.targets.nbytes)
+
+    def neighbors(self, element: str) -> list:
+        i = self._index.get(element)
+        if i is None:
+            return []
+        return [self.nodes[t] for t in self.targets[self.offsets[i]:self.offsets[i + 1]]]
+
+    def expand(self, hits: list, limit: int, claim: str = None) -> list:
+        """
+        Referenzierte Vorschriften, die noch nicht unter den Treffern sind, als zusätzliche Treffer.
+        Priorität: im Claim genannte Elemente, dann Verweise der Treffer (gewichtet nach Rang).
+        """
+        if limit <= 0:
+            return []
+        present = {chunk_element(h) for h in hits}
+        scores = {}
+        for element in extract_references(claim or ""):
+            scores[element] = scores.get(element, 0.0) + 10.0
+        for rank, hit in enumerate(hits):
+            for element in self.neighbors(chunk_element(hit)):
+                scores[element] = scores.get(element, 0.0) + 1.0 / (rank + 1)
+
+        ranked = sorted((e for e in scores if e in self._index and e not in present), key=lambda e: -scores[e])
+        expansions = []
+        for element in ranked[:limit]:
+            i = self._index[element]
+            expansions.append({"id": self.chunk_ids[i], "title": self.titles[i], "content": self.excerpts[i],
+                               "source_type": "MDR", "chapter": None})
+        return expansions
+
+    def save(self, folder: str = XREF_GRAPH_PATH):
+        os.makedirs(folder, exist_ok=True)
+        np.savez(os.path.join(folder, "xref.npz"), offsets=self.offsets, targets=self.targets)
+        with open(os.path.join(folder, "xref_meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"nodes": self.nodes, "titles": self.titles, "chunk_ids": self.chunk_ids,
+                       "excerpts": self.excerpts}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, folder: str = XREF_GRAPH_PATH):
+        """Lädt den Graphen; None, wenn (noch) keiner gebaut wurde."""
+        meta_path = os.path.join(folder, "xref_meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = np.load(os.path.join(folder, "xref.npz"))
+        return cls(meta["nodes"], arrays["offsets"], arrays["targets"], meta["titles"], meta["chunk_ids"], meta["excerpts"])
@@ -0,0 +1,128 @@
+import os
+import glob
+import json
+import hashlib
+import datetime
+import threading
+from typing import Callable, NamedTuple, Optional
+
+# Manifest aller Pipeline-Artefakte (PDF -> MD -> refined MD -> JSON -> Index)
+BUILD_MANIFEST_PATH = os.getenv("BUILD_MANIFEST_PATH", "data/build_manifest.json")
+
+def file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def config_hash(config: dict) -> str:
+    """Hash über die Stage-Konfiguration (Prompt, Modell, Splitter, ...)."""
+    return hashlib.sha256(json.dumps(config, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+class StageSpec(NamedTuple):
+    name: str
+    input_folder: str
+    pattern: str
+    output_for: Callable[[str], Optional[str]]   # Input-Pfad -> Output-Pfad (None: kein Datei-Output, z.B. Index)
+    config: dict
+
+class BuildManifest:
+    """
+    Content-adressiertes Manifest pro Artefakt:
+      {"artifacts": {"<stage>:<input path>": {"input": <sha256>, "config": <sha256>,
+                                              "output": <path>, "output_hash": <sha256>, "built": <iso>}}}
+    Ein Artefakt wird neu gebaut, wenn es neu ist, sein Output fehlt oder sich Input-Inhalt
+    bzw. Stage-Konfiguration geändert haben (make-Prinzip, aber über Hashes statt mtimes).
+    """
+
+    def __init__(self, path: str = BUILD_MANIFEST_PATH):
+        self.path = path
+        self.artifacts = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.artifacts = json.load(f).get("artifacts", {})
+
+    @staticmethod
+    def _key(stage: str, input_path: str) -> str:
+        return f"{stage}:{os.path.normpath(input_path)}"
+
+    def status(self, stage: str, input_path: str, output_path: Optional[str], config: dict) -> Optional[str]:
+        """Grund für einen Rebuild oder None, wenn das Artefakt aktuell ist."""
+        entry = self.artifacts.get(self._key(stage, input_path))
+        if entry is None:
+            return "neu"
+        if output_path and not os.path.exists(output_path):
+            return "Output fehlt"
+        if entry.get("config") != config_hash(config):
+            return "Config geändert"
+        if not os.path.exists(input_path) or entry.get("input") != file_hash(input_path):
+            return "Input geändert"
+        return None
+
+    def record(self, stage: str, input_path: str, output_path: Optional[str], config: dict):
+        entry = {
+            "input": file_hash(input_path),
+            "config": config_hash(config),
+            "output": output_path,
+            "output_hash": file_hash(output_path) if output_path and os.path.exists(output_path) else None,
+            "built": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        with self._lock:
+            self.artifacts[self._key(stage, input_path)] = entry
+
+    def save(self):
+        """Atomar schreiben (tmp + replace), wie der Upload-Checkpoint."""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"artifacts": self.artifacts}, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+
+def select_stale(manifest: BuildManifest, spec: StageSpec, files: list, force: bool = False) -> list:
+    """Die Dateien einer Stage, die neu gebaut werden müssen (mit Grund)."""
+    stale = []
+    for path in files:
+        reason = "erzwungen" if force else manifest.status(spec.name, path, spec.output_for(path), spec.config)
+        if reason:
+            stale.append((path, reason))
+    skipped = len(files) - len(stale)
+    if skipped:
+        print(f"⏭️ {skipped} von {len(files)} Dateien unverändert (Build-Manifest), werden übersprungen.")
+    return stale
+
+def build_plan(manifest: BuildManifest, specs: list, force: bool = False) -> list:
+    """
+    Plan für eine Kette von Stages: [(stage, [(input, grund), ...], anzahl inputs), ...].
+    Outputs einer Stage, die neu gebaut wird, sind Inputs der nächsten ("Upstream"); ob die
+    Folge-Stage wirklich läuft, entscheidet sich beim Ausführen am tatsächlichen Hash.
+    """
+    plan = []
+    upstream = set()
+    for spec in specs:
+        found = glob.glob(os.path.join(spec.input_folder, spec.pattern)) if os.path.isdir(spec.input_folder or "") else []
+        files = {os.path.normpath(path) for path in found}
+        files |= upstream
+        entries = []
+        for path in sorted(files):
+            if path in upstream and not force:
+                reason = "Upstream"
+            else:
+                reason = "erzwungen" if force else manifest.status(spec.name, path, spec.output_for(path), spec.config)
+            if reason:
+                entries.append((path, reason))
+        plan.append((spec.name, entries, len(files)))
+        upstream = {os.path.normpath(out) for out in (spec.output_for(path) for path, _ in entries) if out}
+    return plan
+
+def format_plan(plan: list) -> str:
+    lines = ["📋 Build-Plan:"]
+    for stage, entries, total in plan:
+        lines.append(f"   {stage:<8} {len(entries)} von {total} neu zu bauen")
+        for path, reason in entries:
+            lines.append(f"      • {os.path.basename(path)} ({reason})")
+    if not any(entries for _, entries, _ in plan):
+        lines.append("   ✅ Alles aktuell, nichts zu tun.")
+    return "\n".join(lines)
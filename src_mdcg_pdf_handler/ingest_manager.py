@@ -4,6 +4,7 @@ from azure.core.credentials import AzureKeyCredential
 from azure.ai.documentintelligence import DocumentIntelligenceClient
 from azure.ai.documentintelligence.models import AnalyzeResult
 from dotenv import load_dotenv
+from build_manifest import BuildManifest, StageSpec, select_stale, BUILD_MANIFEST_PATH
 
 # Load environment variables from .env file
 load_dotenv()
@@ -15,6 +16,7 @@ DOC_INT_KEY = os.getenv("AZURE_DOCUMENT_INTELLIGENCE_KEY")
 # CONFIG - Folder Paths (Anpassbar)
 INPUT_FOLDER = os.getenv("INPUT_PDF_PATH")  # Hier liegen deine PDFs
 OUTPUT_FOLDER = os.getenv("OUTPUT_MD_PATH")  # Hier landen die Markdown Files
+ADI_MODEL = "prebuilt-layout"
 
 def table_to_markdown(table) -> str:
     """
@@ -57,7 +59,7 @@ def process_pdf_to_markdown(file_path: str, client: DocumentIntelligenceClient)
     
     with open(file_path, "rb") as f:
         poller = client.begin_analyze_document(
-            "prebuilt-layout", 
+            ADI_MODEL, 
             body=f, 
             content_type="application/pdf"
         )
@@ -116,16 +118,39 @@ def process_pdf_to_markdown(file_path: str, client: DocumentIntelligenceClient)
         "content": output_content
     }
 
-def run_batch_processing():
+def create_client() -> DocumentIntelligenceClient:
+    return DocumentIntelligenceClient(
+        endpoint=ENDPOINT, 
+        credential=AzureKeyCredential(DOC_INT_KEY)
+    )
+
+def output_path_for(pdf_path: str, output_folder: str = None) -> str:
+    # Output Filename: original.pdf -> original.md
+    return os.path.join(output_folder or OUTPUT_FOLDER, os.path.basename(pdf_path).replace(".pdf", ".md"))
+
+def stage_spec() -> StageSpec:
+    """Input, Output und Konfiguration der Phase für das Build-Manifest."""
+    return StageSpec("ingest", INPUT_FOLDER, "*.pdf", output_path_for, {"model": ADI_MODEL})
+
+def ingest_pdf(pdf_path: str, client: DocumentIntelligenceClient, output_folder: str = None) -> str:
+    """Ein PDF -> Markdown Datei im Output Ordner. Gibt den Pfad der MD Datei zurück."""
+    result = process_pdf_to_markdown(pdf_path, client)
+    output_path = output_path_for(pdf_path, output_folder)
+    
+    # Speichern (UTF-8 ist wichtig!)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(result["content"])
+        
+    print(f"✅ Gespeichert: {output_path}\n")
+    return output_path
+
+def run_batch_processing(force: bool = False):
     # 1. Client initialisieren (nur einmal)
     if not ENDPOINT or not DOC_INT_KEY:
         print("FEHLER: Bitte .env Variablen setzen (ENDPOINT, KEY).")
         return
 
-    client = DocumentIntelligenceClient(
-        endpoint=ENDPOINT, 
-        credential=AzureKeyCredential(DOC_INT_KEY)
-    )
+    client = create_client()
 
     # 2. Ordner checken
     if not os.path.exists(INPUT_FOLDER):
@@ -143,23 +168,19 @@ def run_batch_processing():
         print(f"Keine PDFs in {INPUT_FOLDER} gefunden.")
         return
 
-    print(f"--- Starte Batch Processing für {len(pdf_files)} Dateien ---")
+    # 4. Nur neue/geänderte PDFs (Build-Manifest)
+    spec = stage_spec()
+    manifest = BuildManifest(BUILD_MANIFEST_PATH)
+    stale = select_stale(manifest, spec, pdf_files, force)
+
+    print(f"--- Starte Batch Processing für {len(stale)} Dateien ---")
 
-    # 4. Loop
-    for pdf_path in pdf_files:
+    # 5. Loop
+    for pdf_path, _ in stale:
         try:
-            result = process_pdf_to_markdown(pdf_path, client)
-            
-            # Output Filename: original.pdf -> original.md
-            md_filename = result["filename"].replace(".pdf", ".md")
-            output_path = os.path.join(OUTPUT_FOLDER, md_filename)
-            
-            # Speichern (UTF-8 ist wichtig!)
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(result["content"])
-                
-            print(f"✅ Gespeichert: {output_path}\n")
-            
+            output_path = ingest_pdf(pdf_path, client)
+            manifest.record(spec.name, pdf_path, output_path, spec.config)
+            manifest.save()
         except Exception as e:
             print(f"❌ Fehler bei {pdf_path}: {e}\n")
 
@@ -1,27 +1,89 @@
 import os
 import sys
+import glob
 import time
+import importlib
 import argparse
 from dotenv import load_dotenv
 
 # Lade Umgebungsvariablen einmal zentral
 load_dotenv()
 
-# Importiere die Module (Passe Funktionsnamen ggf. an deine Scripts an)
-try:
-    from ingest_manager import run_batch_processing as step_1_ingest
-    from refine_manager import run_refinement_pipeline as step_2_refine
-    from mdcg_to_json import convert_md_to_json_structure as step_3_convert
-    from upload_manager import run_upload_pipeline as step_4_upload
-except ImportError as e:
-    print(f"❌ Critical Error: Konnte Module nicht importieren. {e}")
-    sys.exit(1)
+from stream_pipeline import Stage, StreamingPipeline
+from build_manifest import BuildManifest, build_plan, format_plan, BUILD_MANIFEST_PATH
+
+# Stage-Module werden erst geladen, wenn ihr Schritt läuft: '--step convert' braucht weder
+# Document Intelligence noch openai/tiktoken (Startzeit siehe tests/test_startup_time.py)
+STAGE_MODULES = {
+    "ingest": "ingest_manager",
+    "refine": "refine_manager",
+    "convert": "mdcg_to_json",
+    "upload": "upload_manager",
+}
+
+def load_stage(step: str):
+    try:
+        return importlib.import_module(STAGE_MODULES[step])
+    except ImportError as e:
+        print(f"❌ Critical Error: Konnte Modul '{STAGE_MODULES[step]}' nicht importieren. {e}")
+        sys.exit(1)
+
+# Streaming-Modus: Worker pro Stufe (OCR und LLM sind I/O-gebunden, Upload hat genau einen Writer)
+STREAM_INGEST_WORKERS = int(os.getenv("STREAM_INGEST_WORKERS", "2"))
+STREAM_REFINE_WORKERS = int(os.getenv("STREAM_REFINE_WORKERS", "4"))
+STREAM_CONVERT_WORKERS = int(os.getenv("STREAM_CONVERT_WORKERS", "1"))
 
 def print_header(step_name):
     print("\n" + "="*60)
     print(f"🚀 STARTING PHASE: {step_name}")
     print("="*60 + "\n")
 
+def print_build_plan(step: str, force: bool = False):
+    """Zeigt vor dem Start, welche Artefakte neu gebaut werden (Build-Manifest, make-Prinzip)."""
+    specs = [load_stage(name).stage_spec() for name in STAGE_MODULES if step in (name, "all")]
+    print(format_plan(build_plan(BuildManifest(BUILD_MANIFEST_PATH), specs, force)))
+
+def build_stream_stages(upload_session) -> list:
+    """Die vier Phasen als Stufen, die jeweils ein Dokument (Dateipfad) verarbeiten."""
+    ingest_manager, refine_manager, mdcg_to_json = load_stage("ingest"), load_stage("refine"), load_stage("convert")
+    for folder in (ingest_manager.OUTPUT_FOLDER, refine_manager.OUTPUT_FOLDER, mdcg_to_json.OUTPUT_FOLDER):
+        os.makedirs(folder, exist_ok=True)
+
+    doc_client = ingest_manager.create_client()
+    llm_client = refine_manager.create_client()
+    splitter = mdcg_to_json.create_splitter()
+
+    def upload(json_path):
+        upload_session.process_file(json_path)
+        # Pro Dokument hochladen, damit "fertig" im Dashboard auch "indexiert" heißt
+        upload_session.flush()
+
+    return [
+        Stage("ingest", lambda pdf: ingest_manager.ingest_pdf(pdf, doc_client), STREAM_INGEST_WORKERS),
+        Stage("refine", lambda md: refine_manager.refine_file(llm_client, md), STREAM_REFINE_WORKERS),
+        Stage("convert", lambda md: mdcg_to_json.convert_file(md, splitter), STREAM_CONVERT_WORKERS),
+        Stage("upload", upload, 1),
+    ]
+
+def run_streaming():
+    """Jedes PDF läuft einzeln durch alle vier Phasen; die Phasen überlappen sich über die Dokumente."""
+    print_header("STREAMING (Ingest -> Refine -> Convert -> Upload pro Dokument)")
+    ingest_manager, upload_manager = load_stage("ingest"), load_stage("upload")
+    if not upload_manager.check_credentials():
+        sys.exit(1)
+    pdf_files = sorted(glob.glob(os.path.join(ingest_manager.INPUT_FOLDER, "*.pdf")))
+    if not pdf_files:
+        print(f"⚠️ Keine PDFs in '{ingest_manager.INPUT_FOLDER}' gefunden.")
+        return
+
+    upload_session = upload_manager.UploadSession()
+    pipeline = StreamingPipeline(build_stream_stages(upload_session))
+    print(f"🚀 {len(pdf_files)} Dokumente, Worker: " + ", ".join(f"{s.name}={s.workers}" for s in pipeline.stages))
+    pipeline.run(pdf_files)
+    upload_session.finish()
+    if pipeline.errors:
+        print(f"⚠️ {len(pipeline.errors)} Dokumente mit Fehlern (siehe oben).")
+
 def main():
     parser = argparse.ArgumentParser(description="MedTech Compliance Engine - Data Ingestion Pipeline")
     parser.add_argument(
@@ -30,6 +92,16 @@ def main():
         default="all",
         help="Specific pipeline step to execute. Default: all"
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream each document through all four steps (overlapping stages, only with --step all)"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild all artifacts, ignoring the build manifest"
+    )
     args = parser.parse_args()
     step = args.step
 
@@ -37,13 +109,21 @@ def main():
     
     print("🏥 MedTech Compliance Engine - Data Ingestion Pipeline")
     print("------------------------------------------------------")
-    print(f"Executing: {step}")
+    print(f"Executing: {step}{' (streaming)' if args.stream else ''}")
+
+    if args.stream:
+        if step != "all":
+            parser.error("--stream benötigt --step all")
+        run_streaming()
+        step = None
+    else:
+        print_build_plan(step, args.force)
 
     # --- SCHRITT 1: INGESTION (PDF -> MD) ---
     if step in ["ingest", "all"]:
         print_header("1. INGESTION (Azure ADI)")
         try:
-            step_1_ingest()
+            load_stage("ingest").run_batch_processing(force=args.force)
         except Exception as e:
             print(f"❌ Abbruch in Phase 1: {e}")
             sys.exit(1)
@@ -52,7 +132,7 @@ def main():
     if step in ["refine", "all"]:
         print_header("2. REFINEMENT (GPT-5 Cleaning)")
         try:
-            step_2_refine()
+            load_stage("refine").run_refinement_pipeline(force=args.force)
         except Exception as e:
             print(f"❌ Abbruch in Phase 2: {e}")
             sys.exit(1)
@@ -61,7 +141,7 @@ def main():
     if step in ["convert", "all"]:
         print_header("3. CONVERSION (Semantic Chunking)")
         try:
-            step_3_convert()
+            load_stage("convert").convert_md_to_json_structure(force=args.force)
         except Exception as e:
             print(f"❌ Abbruch in Phase 3: {e}")
             sys.exit(1)
@@ -70,7 +150,7 @@ def main():
     if step in ["upload", "all"]:
         print_header("4. INDEXING (Vector Upload)")
         try:
-            step_4_upload()
+            load_stage("upload").run_upload_pipeline(force=args.force)
         except Exception as e:
             print(f"❌ Abbruch in Phase 4: {e}")
             sys.exit(1)
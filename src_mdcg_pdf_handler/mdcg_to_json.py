@@ -7,6 +7,7 @@ from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 from langchain_text_splitters import MarkdownHeaderTextSplitter
+from build_manifest import BuildManifest, StageSpec, select_stale, BUILD_MANIFEST_PATH
 
 load_dotenv()
 
@@ -14,6 +15,7 @@ load_dotenv()
 INPUT_FOLDER = os.getenv("OUTPUT_MD_PATH_REFINED")
 OUTPUT_FOLDER = os.getenv("OUTPUT_JSON_PATH")
 DEFAULT_VALID_FROM = datetime.datetime.now().strftime("%Y-%m-%dT00:00:00Z")
+BLOB_URL_PREFIX = "https://dein-storage.blob.core.windows.net/pdfs/"
 
 # --- DATA MODEL ---
 class MDRChunk(BaseModel):
@@ -26,7 +28,89 @@ class MDRChunk(BaseModel):
     valid_from: str = Field(..., description="ISO 8601 Date")
     contentVector: Optional[List[float]] = Field(default=None)
 
-def convert_md_to_json_structure():
+# Splitter Konfiguration
+HEADERS_TO_SPLIT_ON = [
+    ("#", "Title"),
+    ("##", "Chapter"),
+    ("###", "Section"),
+]
+
+def create_splitter() -> MarkdownHeaderTextSplitter:
+    return MarkdownHeaderTextSplitter(headers_to_split_on=HEADERS_TO_SPLIT_ON)
+
+def doc_name(file_path: str) -> str:
+    # Basis-Name ohne Endungen (z.B. "MDCG_2021-6_Rev_1")
+    return os.path.basename(file_path).replace("_cleaned.md", "").replace(".md", "")
+
+def output_path_for(file_path: str, output_folder: str = None) -> str:
+    return os.path.join(output_folder or OUTPUT_FOLDER, f"{doc_name(file_path)}.json")
+
+def stage_spec() -> StageSpec:
+    """Input, Output und Konfiguration der Phase für das Build-Manifest (valid_from bleibt außen vor)."""
+    config = {"headers": HEADERS_TO_SPLIT_ON, "source_type": "MDCG", "url_prefix": BLOB_URL_PREFIX}
+    return StageSpec("convert", INPUT_FOLDER, "*.md", output_path_for, config)
+
+def convert_file(file_path: str, markdown_splitter: MarkdownHeaderTextSplitter = None, output_folder: str = None) -> str:
+    """Eine bereinigte Markdown Datei -> JSON Chunks. Gibt den Pfad der JSON Datei zurück."""
+    markdown_splitter = markdown_splitter or create_splitter()
+    filename = os.path.basename(file_path)
+    doc_name_clean = doc_name(file_path)
+    
+    # Container für DIESES Dokument
+    doc_chunks = []
+    
+    # URL Simulation
+    fake_url = f"{BLOB_URL_PREFIX}{doc_name_clean}.pdf"
+
+    print(f"   ...processing {filename}")
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    # Splitting
+    splits = markdown_splitter.split_text(text)
+    
+    for split in splits:
+        content = split.page_content
+        metadata = split.metadata
+        
+        # Mapping Logic
+        chunk_title = metadata.get("Title", doc_name_clean)
+        
+        # Chapter Path Building
+        chapter_parts = []
+        if "Chapter" in metadata: chapter_parts.append(metadata["Chapter"])
+        if "Section" in metadata: chapter_parts.append(metadata["Section"])
+        chapter_text = " > ".join(chapter_parts) if chapter_parts else "General"
+
+        # ID Generation
+        chunk_id = f"mdcg_{uuid.uuid4().hex[:8]}"
+
+        # Pydantic Model
+        chunk_obj = MDRChunk(
+            id=chunk_id,
+            source_type="MDCG",
+            title=chunk_title,
+            content=content,
+            url=fake_url,
+            chapter=chapter_text,
+            valid_from=DEFAULT_VALID_FROM,
+            contentVector=None
+        )
+        
+        doc_chunks.append(chunk_obj.dict())
+
+    # Speichern pro Dokument
+    output_path = output_path_for(file_path, output_folder)
+    json_filename = os.path.basename(output_path)
+    
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(doc_chunks, f, indent=2, ensure_ascii=False)
+    
+    print(f"      -> Saved {len(doc_chunks)} chunks to {json_filename}")
+    return output_path
+
+def convert_md_to_json_structure(force: bool = False):
     # 1. Ordner Checks
     if not os.path.exists(INPUT_FOLDER):
         print(f"❌ Ordner {INPUT_FOLDER} nicht gefunden.")
@@ -37,80 +121,24 @@ def convert_md_to_json_structure():
         print(f"✅ Output Ordner '{OUTPUT_FOLDER}' erstellt.")
 
     md_files = glob.glob(os.path.join(INPUT_FOLDER, "*.md"))
-    print(f"🚀 Konvertiere {len(md_files)} Markdown-Dateien in separate JSONs...")
+    # Nur geänderte Dateien: Chunk-IDs sind zufällig, ein unnötiger Re-Convert erzwingt Re-Embedding
+    spec = stage_spec()
+    manifest = BuildManifest(BUILD_MANIFEST_PATH)
+    stale = select_stale(manifest, spec, md_files, force)
+    print(f"🚀 Konvertiere {len(stale)} Markdown-Dateien in separate JSONs...")
 
-    # Splitter Konfiguration
-    headers_to_split_on = [
-        ("#", "Title"),
-        ("##", "Chapter"),
-        ("###", "Section"),
-    ]
-    markdown_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=headers_to_split_on)
+    markdown_splitter = create_splitter()
 
     # 2. Loop über Files
-    for file_path in md_files:
-        filename = os.path.basename(file_path)
-        # Basis-Name ohne Endungen (z.B. "MDCG_2021-6_Rev_1")
-        doc_name_clean = filename.replace("_cleaned.md", "").replace(".md", "")
-        
-        # Container für DIESES Dokument
-        doc_chunks = []
-        
-        # URL Simulation
-        fake_url = f"https://dein-storage.blob.core.windows.net/pdfs/{doc_name_clean}.pdf"
-
-        print(f"   ...processing {filename}")
-
+    for file_path, _ in stale:
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                text = f.read()
-
-            # Splitting
-            splits = markdown_splitter.split_text(text)
-            
-            for split in splits:
-                content = split.page_content
-                metadata = split.metadata
-                
-                # Mapping Logic
-                chunk_title = metadata.get("Title", doc_name_clean)
-                
-                # Chapter Path Building
-                chapter_parts = []
-                if "Chapter" in metadata: chapter_parts.append(metadata["Chapter"])
-                if "Section" in metadata: chapter_parts.append(metadata["Section"])
-                chapter_text = " > ".join(chapter_parts) if chapter_parts else "General"
-
-                # ID Generation
-                chunk_id = f"mdcg_{uuid.uuid4().hex[:8]}"
-
-                # Pydantic Model
-                chunk_obj = MDRChunk(
-                    id=chunk_id,
-                    source_type="MDCG",
-                    title=chunk_title,
-                    content=content,
-                    url=fake_url,
-                    chapter=chapter_text,
-                    valid_from=DEFAULT_VALID_FROM,
-                    contentVector=None
-                )
-                
-                doc_chunks.append(chunk_obj.dict())
-
-            # 3. Speichern pro Dokument
-            json_filename = f"{doc_name_clean}.json"
-            output_path = os.path.join(OUTPUT_FOLDER, json_filename)
-            
-            with open(output_path, "w", encoding="utf-8") as f:
-                json.dump(doc_chunks, f, indent=2, ensure_ascii=False)
-            
-            print(f"      -> Saved {len(doc_chunks)} chunks to {json_filename}")
-
+            output_path = convert_file(file_path, markdown_splitter)
+            manifest.record(spec.name, file_path, output_path, spec.config)
+            manifest.save()
         except Exception as e:
-            print(f"❌ Fehler bei {filename}: {e}")
+            print(f"❌ Fehler bei {os.path.basename(file_path)}: {e}")
 
     print(f"\n✅ Fertig. JSONs liegen in '{OUTPUT_FOLDER}'.")
 
 if __name__ == "__main__":
-    convert_md_to_json_structure()
\ No newline at end of file
+    convert_md_to_json_structure()
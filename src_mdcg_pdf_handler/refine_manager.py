@@ -1,9 +1,16 @@
 import os
+import sys
 import glob
 import re
 import tiktoken
 from dotenv import load_dotenv
 from openai import AzureOpenAI
+from build_manifest import BuildManifest, StageSpec, select_stale, BUILD_MANIFEST_PATH
+
+# Repo-Root in den Pfad, damit das gemeinsame 'src' Package importierbar ist
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.prompt_usage import PromptUsage
+from src.quota_governor import govern, governor_summary
 
 # Load environment variables
 load_dotenv()
@@ -21,6 +28,9 @@ OUTPUT_FOLDER =  os.getenv("OUTPUT_MD_PATH_REFINED")
 MAX_OUTPUT_TOKENS = 128000 # Safety buffer unter 16.384
 SAFE_CHUNK_SIZE = 110000   # Zielgröße für Input Chunks um Output Limit nicht zu reißen
 
+# Prompt-/Cache-Tokens und Latenz der Refinement Calls
+prompt_usage = PromptUsage()
+
 def count_tokens(text: str, model: str = "gpt-4o") -> int:
     """
     Zählt Tokens mit tiktoken. 
@@ -32,18 +42,13 @@ def count_tokens(text: str, model: str = "gpt-4o") -> int:
         encoding = tiktoken.get_encoding("o200k_base") # Annahme für GPT-5
     return len(encoding.encode(text))
 
-def clean_chunk_with_llm(client: AzureOpenAI, chunk_text: str, doc_context: str) -> str:
-    """
-    Sendet einen Chunk an das LLM.
-    """
-    if not chunk_text.strip():
-        return ""
-
-    system_prompt = f"""
+# Statischer System-Prompt: identischer Präfix für alle Chunks aller Dokumente -> Prompt-Cache.
+# Der Dokumentname steht im User-Teil.
+REFINE_SYSTEM_PROMPT = """
     You are a Data Cleaning Expert for Medical Device Regulation (MDR/IVDR) documents.
     Your task is to refine a specific section of a document into clean, semantic Markdown.
     
-    CONTEXT: This section belongs to the document "{doc_context}".
+    CONTEXT: The user message names the document the section belongs to.
     
     STRICT RULES:
     1. NO DATA LOSS: Preserve all regulatory content verbatim. Do NOT summarize.
@@ -52,16 +57,25 @@ def clean_chunk_with_llm(client: AzureOpenAI, chunk_text: str, doc_context: str)
     4. INTEGRATE FOOTNOTES: Move footnote explanations from the bottom to their reference point in the text: "word[1]" -> "word [Note: explanation]".
     5. FORMATTING: Ensure tables are valid Markdown.
     
-    INPUT: Raw Markdown chunk.
+    INPUT: Document name and raw Markdown chunk.
     OUTPUT: Cleaned Markdown chunk only.
     """
 
+def clean_chunk_with_llm(client: AzureOpenAI, chunk_text: str, doc_context: str) -> str:
+    """
+    Sendet einen Chunk an das LLM.
+    """
+    if not chunk_text.strip():
+        return ""
+
     try:
-        response = client.chat.completions.create(
+        response = prompt_usage.call(
+            "Refinement",
+            client.chat.completions.create,
             model=AOAI_DEPLOYMENT,
             messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": chunk_text}
+                {"role": "system", "content": REFINE_SYSTEM_PROMPT},
+                {"role": "user", "content": f'DOCUMENT: "{doc_context}"\n\nRAW MARKDOWN CHUNK:\n{chunk_text}'}
             ],
             # Kein temperature Parameter für reasoning models/preview
         )
@@ -110,16 +124,57 @@ def recursive_split_and_process(client, text, doc_name):
         
     return processed_text
 
-def run_refinement_pipeline():
+def create_client() -> AzureOpenAI:
+    # Batch-Priorität am gemeinsamen Chat-Deployment (Quota Governor, falls QUOTA_CHAT_TPM/RPM gesetzt)
+    return govern(AzureOpenAI(
+        azure_endpoint=AOAI_ENDPOINT,
+        api_key=AOAI_KEY,
+        api_version=AOAI_API_VERSION
+    ), "batch")
+
+def output_path_for(file_path: str, output_folder: str = None) -> str:
+    return os.path.join(output_folder or OUTPUT_FOLDER, os.path.basename(file_path))
+
+def stage_spec() -> StageSpec:
+    """Input, Output und Konfiguration der Phase für das Build-Manifest (Prompt/Modell-Wechsel -> Rebuild)."""
+    config = {"prompt": REFINE_SYSTEM_PROMPT, "model": AOAI_DEPLOYMENT, "safe_chunk_size": SAFE_CHUNK_SIZE}
+    return StageSpec("refine", INPUT_FOLDER, "*.md", output_path_for, config)
+
+def refine_file(client: AzureOpenAI, file_path: str, output_folder: str = None) -> str:
+    """Eine Markdown Datei bereinigen und im Output Ordner speichern. Gibt den Zielpfad zurück."""
+    filename = os.path.basename(file_path)
+    print(f"\n📄 Processing: {filename}")
+    
+    with open(file_path, "r", encoding="utf-8") as f:
+        raw_content = f.read()
+
+    # Step 1: Grob-Split nach Headern (Semantisch bester Split)
+    # Wir splitten vor jedem ## Header
+    sections = re.split(r"(?=\n## )", raw_content)
+    
+    full_clean_doc = ""
+    print(f"   ...Found {len(sections)} semantic sections.")
+
+    for i, section in enumerate(sections):
+        # Step 2: Safe Process (mit Token Check)
+        clean_part = recursive_split_and_process(client, section, filename)
+        full_clean_doc += clean_part + "\n\n"
+        
+        if i % 5 == 0: print(f"   ...section {i+1}/{len(sections)} done.")
+
+    output_path = output_path_for(file_path, output_folder)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(full_clean_doc)
+    
+    print(f"✅ Saved: {output_path}")
+    return output_path
+
+def run_refinement_pipeline(force: bool = False):
     if not AOAI_ENDPOINT or not AOAI_KEY:
         print("❌ Error: Azure OpenAI Credentials missing.")
         return
 
-    client = AzureOpenAI(
-        azure_endpoint=AOAI_ENDPOINT,
-        api_key=AOAI_KEY,
-        api_version=AOAI_API_VERSION
-    )
+    client = create_client()
 
     if not os.path.exists(INPUT_FOLDER):
         print(f"❌ Input folder missing.")
@@ -128,34 +183,19 @@ def run_refinement_pipeline():
         os.makedirs(OUTPUT_FOLDER)
 
     md_files = glob.glob(os.path.join(INPUT_FOLDER, "*.md"))
-    print(f"🚀 Refinement Pipeline for {len(md_files)} docs (Model: {AOAI_DEPLOYMENT})")
+    spec = stage_spec()
+    manifest = BuildManifest(BUILD_MANIFEST_PATH)
+    stale = select_stale(manifest, spec, md_files, force)
+    print(f"🚀 Refinement Pipeline for {len(stale)} docs (Model: {AOAI_DEPLOYMENT})")
 
-    for file_path in md_files:
-        filename = os.path.basename(file_path)
-        print(f"\n📄 Processing: {filename}")
-        
-        with open(file_path, "r", encoding="utf-8") as f:
-            raw_content = f.read()
+    for file_path, _ in stale:
+        output_path = refine_file(client, file_path)
+        manifest.record(spec.name, file_path, output_path, spec.config)
+        manifest.save()
 
-        # Step 1: Grob-Split nach Headern (Semantisch bester Split)
-        # Wir splitten vor jedem ## Header
-        sections = re.split(r"(?=\n## )", raw_content)
-        
-        full_clean_doc = ""
-        print(f"   ...Found {len(sections)} semantic sections.")
-
-        for i, section in enumerate(sections):
-            # Step 2: Safe Process (mit Token Check)
-            clean_part = recursive_split_and_process(client, section, filename)
-            full_clean_doc += clean_part + "\n\n"
-            
-            if i % 5 == 0: print(f"   ...section {i+1}/{len(sections)} done.")
-
-        output_path = os.path.join(OUTPUT_FOLDER, filename)
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(full_clean_doc)
-        
-        print(f"✅ Saved: {output_path}")
+    print(f"ℹ️ {prompt_usage.summary()}")
+    if governor_summary():
+        print(f"ℹ️ {governor_summary()}")
 
 if __name__ == "__main__":
-    run_refinement_pipeline()
\ No newline at end of file
+    run_refinement_pipeline()
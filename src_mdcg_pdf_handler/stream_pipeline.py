@@ -0,0 +1,134 @@
+import os
+import time
+import queue
+import threading
+
+# Worker pro Stufe und Queue-Größe zwischen den Stufen (Backpressure: volle Queue bremst die Stufe davor)
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "4"))
+STREAM_DASHBOARD_SECONDS = float(os.getenv("STREAM_DASHBOARD_SECONDS", "10"))
+
+_DONE = object()
+
+class Stage:
+    """Eine Pipeline-Stufe: fn(item) -> Item für die nächste Stufe (None = Dokument endet hier)."""
+
+    def __init__(self, name: str, fn, workers: int = 1):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.queue = None
+        self.active = 0
+        self.done = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def snapshot(self, elapsed: float) -> dict:
+        with self._lock:
+            return {"name": self.name, "queued": self.queue.qsize() if self.queue else 0, "active": self.active,
+                    "done": self.done, "failed": self.failed, "workers": self.workers,
+                    "per_minute": 60.0 * self.done / elapsed if elapsed > 0 else 0.0}
+
+class StreamingPipeline:
+    """
+    Jedes Dokument läuft einzeln durch alle Stufen: OCR, LLM-Cleaning und Embedding laufen
+    gleichzeitig für verschiedene Dokumente statt als Barrieren über den ganzen Corpus.
+    Jede Stufe hat einen eigenen Worker Pool und eine begrenzte Eingangs-Queue.
+    Ein Fehler beendet nur das betroffene Dokument.
+    """
+
+    def __init__(self, stages: list, queue_size: int = STREAM_QUEUE_SIZE, dashboard_seconds: float = STREAM_DASHBOARD_SECONDS,
+                 printer=print):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.dashboard_seconds = dashboard_seconds
+        self.printer = printer
+        self.errors = []
+        self._start = None
+
+    def _worker(self, index: int, remaining: list, remaining_lock):
+        stage = self.stages[index]
+        next_queue = self.stages[index + 1].queue if index + 1 < len(self.stages) else None
+        while True:
+            item = stage.queue.get()
+            if item is _DONE:
+                break
+            with stage._lock:
+                stage.active += 1
+            start = time.perf_counter()
+            try:
+                result = stage.fn(item)
+                ok = True
+            except Exception as e:
+                ok, result = False, None
+                self.errors.append((stage.name, item, e))
+                self.printer(f"❌ [{stage.name}] {os.path.basename(str(item))}: {e}")
+            with stage._lock:
+                stage.active -= 1
+                stage.busy_seconds += time.perf_counter() - start
+                if ok:
+                    stage.done += 1
+                else:
+                    stage.failed += 1
+            if ok and result is not None and next_queue is not None:
+                next_queue.put(result)
+
+        # Letzter Worker der Stufe gibt das Ende an die nächste Stufe weiter
+        with remaining_lock:
+            remaining[index] -= 1
+            last = remaining[index] == 0
+        if last and next_queue is not None:
+            for _ in range(self.stages[index + 1].workers):
+                next_queue.put(_DONE)
+
+    def snapshot(self) -> list:
+        elapsed = time.perf_counter() - self._start if self._start else 0.0
+        return [stage.snapshot(elapsed) for stage in self.stages]
+
+    def _dashboard(self, stop: threading.Event):
+        while not stop.wait(self.dashboard_seconds):
+            self.printer(render_dashboard(self.snapshot()))
+
+    def run(self, items) -> list:
+        """Schickt alle Items durch die Stufen und wartet, bis alles durch ist. Rückgabe: finaler Snapshot."""
+        for stage in self.stages:
+            stage.queue = queue.Queue(maxsize=self.queue_size)
+        self._start = time.perf_counter()
+
+        remaining = [stage.workers for stage in self.stages]
+        remaining_lock = threading.Lock()
+        threads = [threading.Thread(target=self._worker, args=(i, remaining, remaining_lock), daemon=True,
+                                    name=f"{stage.name}-{n}")
+                   for i, stage in enumerate(self.stages) for n in range(stage.workers)]
+        for thread in threads:
+            thread.start()
+
+        stop = threading.Event()
+        dashboard = None
+        if self.dashboard_seconds and self.dashboard_seconds > 0:
+            dashboard = threading.Thread(target=self._dashboard, args=(stop,), daemon=True)
+            dashboard.start()
+
+        first = self.stages[0]
+        for item in items:
+            first.queue.put(item)
+        for _ in range(first.workers):
+            first.queue.put(_DONE)
+
+        for thread in threads:
+            thread.join()
+        stop.set()
+        if dashboard is not None:
+            dashboard.join()
+
+        final = self.snapshot()
+        self.printer(render_dashboard(final))
+        return final
+
+def render_dashboard(snapshot: list) -> str:
+    """Backlog und Durchsatz pro Stufe als Textblock."""
+    lines = [f"📊 {'Stufe':<10} {'Queue':>6} {'Aktiv':>8} {'Fertig':>7} {'Fehler':>7} {'Docs/min':>9}"]
+    for s in snapshot:
+        lines.append(f"   {s['name']:<10} {s['queued']:>6} {s['active']:>4}/{s['workers']:<3} {s['done']:>7} "
+                     f"{s['failed']:>7} {s['per_minute']:>9.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,105 @@
+import os
+import sys
+import json
+import hashlib
+import datetime
+
+# Repo-Root in den Pfad: content_hash kommt aus dem Vector Store (gleicher Schlüssel wie der Index-Rebuild)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.vector_store import content_hash
+
+def document_hash(chunk: dict) -> str:
+    """Hash über alle Index-Felder außer dem Vektor (Änderung -> Re-Upload, aber kein Re-Embedding)."""
+    fields = {k: v for k, v in chunk.items() if k != "contentVector"}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+class UploadCheckpoint:
+    """
+    Manifest für einen Upload-Lauf:
+      {"index": "<index name>", "chunks": {"<chunk id>": {"embedded": "<content hash>", "indexed": "<doc hash>"}}}
+
+    Die Vektoren selbst liegen im LocalVectorStore. Wechselt der Index-Name,
+    gelten alle Chunks als nicht indexiert (die Embeddings bleiben gültig).
+    """
+
+    def __init__(self, path: str, index_name: str):
+        self.path = path
+        self.index_name = index_name
+        self.chunks = {}
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.chunks = state.get("chunks", {})
+            if state.get("index") != index_name:
+                print(f"   ℹ️ Manifest gehört zu Index '{state.get('index')}'. Indexierungs-Status wird zurückgesetzt.")
+                for entry in self.chunks.values():
+                    entry.pop("indexed", None)
+
+    def is_indexed(self, chunk_id: str, doc_hash: str) -> bool:
+        return self.chunks.get(chunk_id, {}).get("indexed") == doc_hash
+
+    def mark_embedded(self, chunk_id: str, text_hash: str):
+        self.chunks.setdefault(chunk_id, {})["embedded"] = text_hash
+
+    def mark_indexed(self, chunk_id: str, doc_hash: str):
+        self.chunks.setdefault(chunk_id, {})["indexed"] = doc_hash
+
+    def counts(self):
+        embedded = sum(1 for e in self.chunks.values() if e.get("embedded"))
+        indexed = sum(1 for e in self.chunks.values() if e.get("indexed"))
+        return embedded, indexed
+
+    def save(self):
+        """Atomar schreiben (tmp + replace), damit ein Absturz kein halbes Manifest hinterlässt."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"index": self.index_name, "chunks": self.chunks}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+class DeadLetterQueue:
+    """JSONL-Datei mit fehlgeschlagenen Chunks (Stage 'embed' oder 'upload') für einen gezielten Retry."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def add(self, chunk_id: str, stage: str, error: str, source_file: str = None):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        record = {
+            "id": chunk_id,
+            "stage": stage,
+            "error": str(error),
+            "file": source_file,
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds")
+        }
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    @property
+    def retry_path(self) -> str:
+        return self.path + ".retrying"
+
+    def load(self, path: str = None) -> list:
+        path = path or self.path
+        if not os.path.exists(path):
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def drain(self) -> set:
+        """
+        Liefert alle IDs für den Retry-Lauf. Die Einträge wandern nach '<datei>.retrying' und bleiben dort,
+        bis release() den Retry abschließt - ein Abbruch (Crash, Ctrl-C) verliert keine Fehler, der nächste
+        drain() nimmt sie wieder mit. Erneute Fehler landen wieder in der Dead-Letter-Datei.
+        """
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as src, open(self.retry_path, "a", encoding="utf-8") as dst:
+                dst.write(src.read())
+            os.remove(self.path)
+        return {record["id"] for record in self.load(self.retry_path)}
+
+    def release(self):
+        """Retry-Lauf vollständig durchgelaufen: die abgearbeiteten Einträge löschen."""
+        if os.path.exists(self.retry_path):
+            os.remove(self.retry_path)
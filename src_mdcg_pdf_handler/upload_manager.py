@@ -1,11 +1,20 @@
 import os
+import sys
 import glob
 import json
 import time
+import argparse
 from dotenv import load_dotenv
 from openai import AzureOpenAI
 from azure.core.credentials import AzureKeyCredential
 from azure.search.documents import SearchClient
+from upload_checkpoint import UploadCheckpoint, DeadLetterQueue, content_hash, document_hash
+from build_manifest import BuildManifest, StageSpec, select_stale, BUILD_MANIFEST_PATH
+
+# Repo-Root in den Pfad, damit das gemeinsame 'src' Package importierbar ist
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.vector_store import LocalVectorStore
+from src.quota_governor import govern, governor_summary
 
 load_dotenv()
 
@@ -23,47 +32,178 @@ AOAI_ENDPOINT = os.getenv("AZURE_OPENAI_EMBEDDING_ENDPOINT")
 AOAI_KEY = os.getenv("AZURE_OPENAI_EMBEDDING_KEY")
 AOAI_VERSION = os.getenv("AZURE_OPENAI_EMBEDDING_API_VERSION", "2024-02-01")
 EMBEDDING_DEPLOYMENT = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT")
+EMBEDDING_DIMENSIONS = int(os.getenv("AZURE_OPENAI_EMBEDDING_DIMENSIONS", "3072"))
+
+# --- CHECKPOINT (Resume nach Absturz) ---
+# Lokale Vektoren, Manifest (embedded/indexiert) und Dead-Letter-Datei für fehlgeschlagene Chunks
+VECTOR_STORE_PATH = os.getenv("LOCAL_VECTOR_STORE_PATH", "data/vectors")
+MANIFEST_PATH = os.path.join(VECTOR_STORE_PATH, f"upload_manifest_{INDEX_NAME}.json")
+DEAD_LETTER_PATH = os.path.join(VECTOR_STORE_PATH, "dead_letter.jsonl")
 
 def get_embedding(client: AzureOpenAI, text: str) -> list:
+    """Liefert den Vektor oder None bei leerem Text. API-Fehler werden an den Aufrufer weitergereicht."""
     if not text or not isinstance(text, str):
         return None
     
     clean_text = text.replace("\n", " ")
     safe_text = clean_text[:8000]
 
+    response = client.embeddings.create(
+        input=safe_text,
+        model=EMBEDDING_DEPLOYMENT,
+        dimensions=EMBEDDING_DIMENSIONS
+    )
+    return response.data[0].embedding
+
+def upload_batch(search_client: SearchClient, batch: list, checkpoint: UploadCheckpoint, dead_letter: DeadLetterQueue, source_files: dict) -> int:
+    """
+    Lädt einen Batch hoch und wertet das Ergebnis pro Dokument aus.
+    Erfolgreiche Dokumente landen im Manifest, fehlgeschlagene in der Dead-Letter-Datei.
+    """
+    doc_hashes = {doc["id"]: document_hash(doc) for doc in batch}
     try:
-        response = client.embeddings.create(
-            input=safe_text,
-            model=EMBEDDING_DEPLOYMENT
-        )
-        return response.data[0].embedding
+        results = search_client.upload_documents(documents=batch)
     except Exception as e:
-        print(f"   ❌ Embedding Error: {e}")
-        return None
+        print(f"   ❌ Fehler beim Upload Batch: {e}")
+        for doc in batch:
+            dead_letter.add(doc["id"], "upload", e, source_files.get(doc["id"]))
+        return 0
+
+    succeeded = 0
+    for r in results:
+        if r.succeeded:
+            checkpoint.mark_indexed(r.key, doc_hashes[r.key])
+            succeeded += 1
+        else:
+            dead_letter.add(r.key, "upload", r.error_message, source_files.get(r.key))
+
+    checkpoint.save()
+    print(f"   ⬆️ Batch hochgeladen: {succeeded}/{len(batch)} erfolgreich.")
+    return succeeded
+
+class UploadSession:
+    """
+    Clients, lokaler Vector Store, Checkpoint und offener Upload-Batch eines Laufs.
+    Dateien werden einzeln über process_file() hinzugefügt (Batch- und Streaming-Modus).
+    Nicht thread-safe: genau ein Writer pro Session.
+    """
+
+    BATCH_SIZE = 50
+
+    def __init__(self):
+        self.search_client = SearchClient(
+            endpoint=SEARCH_ENDPOINT,
+            index_name=INDEX_NAME,
+            credential=AzureKeyCredential(SEARCH_KEY)
+        )
+        # Batch-Priorität am gemeinsamen Embedding-Deployment (Quota Governor, falls QUOTA_EMBEDDING_TPM/RPM gesetzt)
+        self.aoai_client = govern(AzureOpenAI(
+            azure_endpoint=AOAI_ENDPOINT,
+            api_key=AOAI_KEY,
+            api_version=AOAI_VERSION
+        ), "batch")
+
+        # Checkpoint: lokale Vektoren + Manifest + Dead-Letter-Datei
+        self.store = LocalVectorStore(VECTOR_STORE_PATH, dims=EMBEDDING_DIMENSIONS)
+        self.checkpoint = UploadCheckpoint(MANIFEST_PATH, INDEX_NAME)
+        self.dead_letter = DeadLetterQueue(DEAD_LETTER_PATH)
+        self.retry_ids = None
 
-def run_upload_pipeline():
+        self.total_uploaded = 0
+        self.skipped = 0
+        self.batch = []
+        self.source_files = {}
+
+    def process_file(self, file_path: str) -> int:
+        """Embedded die Chunks einer JSON Datei und reiht sie in den Upload-Batch ein. Rückgabe: Anzahl Chunks."""
+        filename = os.path.basename(file_path)
+        print(f"\n📄 Lade Datei: {filename}")
+
+        with open(file_path, "r", encoding="utf-8") as f:
+            chunks = json.load(f)
+        
+        print(f"   ...verarbeite {len(chunks)} Chunks.")
+
+        for chunk in chunks:
+            chunk_id = chunk["id"]
+            if self.retry_ids is not None and chunk_id not in self.retry_ids:
+                continue
+
+            if not chunk.get("valid_from"):
+                chunk["valid_from"] = "2024-01-01T00:00:00Z"
+
+            # Bereits mit identischem Inhalt indexiert -> nichts zu tun
+            if self.checkpoint.is_indexed(chunk_id, document_hash(chunk)):
+                self.skipped += 1
+                continue
+
+            text_hash = content_hash(chunk.get("content"))
+            if chunk.get("contentVector"):
+                if not self.store.has(chunk_id, text_hash):
+                    self.store.add(chunk_id, chunk["contentVector"], text_hash)
+            else:
+                vector = self.store.get(chunk_id, text_hash)
+                if vector is None:
+                    try:
+                        vector = get_embedding(self.aoai_client, chunk.get("content"))
+                    except Exception as e:
+                        print(f"   ❌ Embedding Error: {e}")
+                        self.dead_letter.add(chunk_id, "embed", e, filename)
+                        continue
+                    if vector is None:
+                        self.dead_letter.add(chunk_id, "embed", "Leerer Content", filename)
+                        continue
+                    self.store.add(chunk_id, vector, text_hash)
+                chunk["contentVector"] = vector
+
+            self.checkpoint.mark_embedded(chunk_id, text_hash)
+            self.batch.append(chunk)
+            self.source_files[chunk_id] = filename
+
+            if len(self.batch) >= self.BATCH_SIZE:
+                self.flush()
+                time.sleep(0.5) 
+
+        return len(chunks)
+
+    def flush(self):
+        """Lädt den offenen Batch hoch."""
+        if self.batch:
+            self.total_uploaded += upload_batch(self.search_client, self.batch, self.checkpoint, self.dead_letter, self.source_files)
+            self.batch = []
+            self.source_files = {}
+
+    def finish(self):
+        self.flush()
+        self.checkpoint.save()
+
+        failed = len(self.dead_letter.load())
+        print(f"\n✅ Pipeline beendet. {self.total_uploaded} Dokumente indexiert, {self.skipped} unverändert übersprungen.")
+        if governor_summary():
+            print(f"ℹ️ {governor_summary()}")
+        if failed:
+            print(f"⚠️ {failed} Chunks in '{DEAD_LETTER_PATH}'. Retry mit: python upload_manager.py --retry-dead-letter")
+
+def check_credentials() -> bool:
     # Check ob wir wirklich die richtigen Keys haben
     if not AOAI_ENDPOINT or not EMBEDDING_DEPLOYMENT:
         print("❌ Error: Embedding Credentials fehlen in .env")
         print(f"   Endpoint: {AOAI_ENDPOINT}")
         print(f"   Deployment: {EMBEDDING_DEPLOYMENT}")
+        return False
+    return True
+
+def stage_spec() -> StageSpec:
+    """Input und Konfiguration der Phase für das Build-Manifest (Output ist der Index, keine Datei)."""
+    config = {"index": INDEX_NAME, "embedding": EMBEDDING_DEPLOYMENT, "dimensions": EMBEDDING_DIMENSIONS}
+    return StageSpec("upload", INPUT_FOLDER, "*.json", lambda path: None, config)
+
+def run_upload_pipeline(retry_dead_letter: bool = False, force: bool = False):
+    if not check_credentials():
         return
 
     print(f"🔌 Verbinde mit Azure Search Index: '{INDEX_NAME}'")
     print(f"🔌 Nutze Embedding Ressource: '{AOAI_ENDPOINT}' -> '{EMBEDDING_DEPLOYMENT}'")
-    
-    # Client Setup
-    search_client = SearchClient(
-        endpoint=SEARCH_ENDPOINT,
-        index_name=INDEX_NAME,
-        credential=AzureKeyCredential(SEARCH_KEY)
-    )
-
-    aoai_client = AzureOpenAI(
-        azure_endpoint=AOAI_ENDPOINT,
-        api_key=AOAI_KEY,
-        api_version=AOAI_VERSION
-    )
 
     # File Handling
     if not os.path.exists(INPUT_FOLDER):
@@ -75,57 +215,47 @@ def run_upload_pipeline():
         print(f"⚠️ Keine JSON-Dateien in '{INPUT_FOLDER}' gefunden.")
         return
 
-    print(f"🚀 Starte Upload für {len(json_files)} Dateien...")
-    
-    total_uploaded = 0
-    batch = []
-    BATCH_SIZE = 50 
-
-    for file_path in json_files:
-        filename = os.path.basename(file_path)
-        print(f"\n📄 Lade Datei: {filename}")
-        
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                chunks = json.load(f)
-            
-            print(f"   ...verarbeite {len(chunks)} Chunks.")
-
-            for chunk in chunks:
-                if not chunk.get("contentVector"):
-                    vector = get_embedding(aoai_client, chunk["content"])
-                    if vector:
-                        chunk["contentVector"] = vector
-                    else:
-                        continue
-                
-                if not chunk.get("valid_from"):
-                    chunk["valid_from"] = "2024-01-01T00:00:00Z"
+    session = UploadSession()
 
-                batch.append(chunk)
+    if retry_dead_letter:
+        session.retry_ids = session.dead_letter.drain()
+        print(f"🔁 Retry-Lauf für {len(session.retry_ids)} Chunks aus der Dead-Letter-Datei.")
+        if not session.retry_ids:
+            session.dead_letter.release()
+            return
 
-                if len(batch) >= BATCH_SIZE:
-                    try:
-                        search_client.upload_documents(documents=batch)
-                        total_uploaded += len(batch)
-                        print(f"   ⬆️ Batch von {len(batch)} hochgeladen.")
-                        batch = [] 
-                        time.sleep(0.5) 
-                    except Exception as e:
-                        print(f"   ❌ Fehler beim Upload Batch: {e}")
+    # Build-Manifest: unveränderte JSONs gar nicht erst lesen (Retry-Lauf geht über die Dead-Letter IDs)
+    spec = stage_spec()
+    manifest = BuildManifest(BUILD_MANIFEST_PATH)
+    stale = select_stale(manifest, spec, json_files, force or retry_dead_letter)
 
-        except Exception as e:
-            print(f"❌ Fehler bei Datei {filename}: {e}")
+    embedded, indexed = session.checkpoint.counts()
+    print(f"🚀 Starte Upload für {len(stale)} Dateien... (Checkpoint: {embedded} embedded, {indexed} indexiert)")
 
-    if batch:
+    processed = []
+    for file_path, _ in stale:
         try:
-            search_client.upload_documents(documents=batch)
-            total_uploaded += len(batch)
-            print(f"   ⬆️ Finaler Batch hochgeladen.")
+            session.process_file(file_path)
+            processed.append(file_path)
         except Exception as e:
-            print(f"   ❌ Fehler beim finalen Upload: {e}")
+            print(f"❌ Fehler bei Datei {os.path.basename(file_path)}: {e}")
+
+    session.finish()
+
+    # Retry abgeschlossen erst, wenn jede Datei durchlief (erneute Fehler stehen wieder in der Dead-Letter-Datei)
+    if retry_dead_letter and len(processed) == len(stale):
+        session.dead_letter.release()
 
-    print(f"\n✅ Pipeline beendet. {total_uploaded} Dokumente indexiert.")
+    # Nur Dateien ohne offene Dead-Letter Chunks gelten als gebaut
+    failed_files = {record.get("file") for record in session.dead_letter.load()}
+    if not retry_dead_letter:
+        for file_path in processed:
+            if os.path.basename(file_path) not in failed_files:
+                manifest.record(spec.name, file_path, None, spec.config)
+        manifest.save()
 
 if __name__ == "__main__":
-    run_upload_pipeline()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Phase 4: JSON Chunks -> Embeddings -> Azure Search")
+    parser.add_argument("--retry-dead-letter", action="store_true", help="Nur die Chunks aus der Dead-Letter-Datei erneut verarbeiten")
+    args = parser.parse_args()
+    run_upload_pipeline(retry_dead_letter=args.retry_dead_letter)
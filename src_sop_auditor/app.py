@@ -1,17 +1,22 @@
 import streamlit as st
 import os
-import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-from azure.core.credentials import AzureKeyCredential
-from azure.search.documents import SearchClient
-from azure.search.documents.models import VectorizedQuery
-from openai import AzureOpenAI
-import docx
 
 # Lade deine bestehende Logik (Kopiere die Funktionen aus sop_audit_pipeline.py hier rein oder importiere sie)
 # Der Einfachheit halber: Wir importieren die Module und nutzen die Logik direkt.
 # WICHTIG: Stelle sicher, dass sop_audit_pipeline.py im selben Ordner liegt und 'docx_to_raw_markdown', 'refine_to_claims' etc. exportiert.
-from sop_audit_pipeline import docx_to_raw_markdown, refine_to_claims, get_embedding
+from sop_audit_pipeline import (
+    docx_to_raw_markdown, refine_to_claims, parse_claims, embed_claims, retrieve_references, create_retriever,
+    create_openai_clients,
+    EMBEDDING_DIMENSIONS, AUDIT_MAX_WORKERS, AUDIT_REQUESTS_PER_SECOND,
+    AUDIT_PROMPT, build_audit_message, prompt_usage, retrieval_cache_scope
+)
+from retrieval_cache import RetrievalCache, EmbeddingCache
+from rate_limiter import AdaptiveRateLimiter
+from src.xref_graph import XrefGraph
+from context_packer import pack_context
 
 load_dotenv()
 
@@ -27,10 +32,76 @@ CHAT_KEY = os.getenv("AZURE_OPENAI_CHAT_KEY")
 CHAT_DEPLOYMENT = os.getenv("AZURE_OPENAI_CHAT_DEPLOYMENT")
 CHAT_VERSION = os.getenv("AZURE_OPENAI_CHAT_API_VERSION")
 
-# Clients
-chat_client = AzureOpenAI(azure_endpoint=CHAT_ENDPOINT, api_key=CHAT_KEY, api_version=CHAT_VERSION)
-emb_client = AzureOpenAI(azure_endpoint=EMBEDDING_ENDPOINT, api_key=EMBEDDING_KEY, api_version="2024-02-01")
-search_client = SearchClient(SEARCH_ENDPOINT, INDEX_NAME, AzureKeyCredential(SEARCH_KEY))
+# Clients: einmal pro Prozess statt bei jedem Streamlit-Rerun (geteilt über alle Sessions).
+# Erst beim ersten Audit gebaut -> die Upload-Seite lädt ohne openai/Azure SDK, Vector Store und Verweis-Graph.
+@st.cache_resource
+def get_clients():
+    # Interaktive Audits haben am Quota Governor Vorrang vor Batch-Refinement/-Audit anderer Prozesse
+    chat_client, emb_client = create_openai_clients(priority="interactive")
+    # Azure AI Search oder lokaler Vector Store (RETRIEVAL_BACKEND)
+    retriever = create_retriever()
+    # Gleiche Caches (SQLite) wie die CLI-Pipeline
+    retrieval_cache = RetrievalCache(retrieval_cache_scope(retriever))
+    embedding_cache = EmbeddingCache(f"{EMBEDDING_DEPLOYMENT}:{EMBEDDING_DIMENSIONS}")
+    # Ein Limiter für alle Sessions -> die Quota gilt pro Deployment, nicht pro Nutzer
+    limiter = AdaptiveRateLimiter(rate=AUDIT_REQUESTS_PER_SECOND)
+    # Verweis-Graph der MDR (None, wenn noch nicht gebaut)
+    xref_graph = XrefGraph.load()
+    return chat_client, emb_client, retriever, retrieval_cache, embedding_cache, limiter, xref_graph
+
+# Markdown pro Datei-Hash: gleiche SOP (auch von anderen Nutzern) wird nur einmal geparst
+@st.cache_data(max_entries=32, show_spinner=False)
+def sop_markdown(file_hash, _data, _name):
+    return docx_to_raw_markdown(_data, name=_name)
+
+def judge_claim(title, content, query_vec):
+    """Retrieval + Urteil für einen Claim (läuft im Worker-Thread, daher keine st.* Aufrufe)."""
+    if query_vec is None:
+        return {"title": title, "content": content, "level": "warning", "decision": "Embedding fehlgeschlagen.", "references": []}
+    try:
+        results = retrieve_references(content, query_vec, retriever, retrieval_cache, xref_graph=xref_graph)
+        references = [f"**{r['source_type']} - {r['title']}**\n>{r['content'][:300]}..." for r in results]
+        if not references:
+            return {"title": title, "content": content, "level": "warning", "decision": "Keine Regulatorik gefunden.", "references": []}
+        # Prompt-Kontext: überlappende Chunks zusammengeführt, im Token-Budget
+        context_str = "\n\n".join(pack_context(results)[0])
+
+        # Audit Prompt: gleicher statischer System-Prompt wie die CLI -> gemeinsamer Prompt-Cache Präfix
+        response = prompt_usage.call(
+            "Urteil (App)", limiter.call,
+            chat_client.chat.completions.create,
+            model=CHAT_DEPLOYMENT,
+            messages=[
+                {"role": "system", "content": AUDIT_PROMPT},
+                {"role": "user", "content": build_audit_message(content, context_str)}
+            ],
+            timeout=45  # wie die CLI: ein hängender Request blockiert sonst einen Worker der Session
+        )
+        decision = response.choices[0].message.content
+        level = "success" if "KONFORM" in decision else "error" if "KRITISCH" in decision else "warning"
+        return {"title": title, "content": content, "level": level, "decision": decision, "references": references}
+    except Exception as e:
+        return {"title": title, "content": content, "level": "exception", "decision": f"Fehler bei {title}: {e}", "references": []}
+
+def render_verdict(verdict):
+    if verdict["level"] == "exception":
+        st.error(verdict["decision"])
+        return
+    if not verdict["references"]:
+        st.warning(f"**{verdict['title']}**: {verdict['decision']}")
+        return
+    with st.expander(f"{verdict['title']}", expanded=True):
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            st.markdown("**SOP Aussage:**")
+            st.info(verdict["content"])
+        with col2:
+            st.markdown("**Audit Ergebnis:**")
+            getattr(st, verdict["level"])(verdict["decision"])
+
+        st.caption("Quellen:")
+        for ref in verdict["references"]:
+            st.markdown(ref)
 
 # --- UI ---
 st.set_page_config(page_title="MedTech Compliance Auditor", layout="wide")
@@ -42,90 +113,63 @@ uploaded_file = st.file_uploader("Lade eine SOP (Word .docx) hoch", type="docx")
 
 if uploaded_file:
     st.info("Datei wird verarbeitet...")
+
+    # Audit-Stand pro Datei-Hash in der Session: Reruns (Widget-Klicks) rechnen nichts neu
+    file_hash = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    audits = st.session_state.setdefault("audits", {})
+    audit = audits.setdefault(file_hash, {"claims": None, "vectors": None, "verdicts": {}})
     
-    # 1. READ
-    # Wir müssen das File temporär speichern für python-docx
-    with open("temp.docx", "wb") as f:
-        f.write(uploaded_file.getbuffer())
-    
-    raw_md = docx_to_raw_markdown("temp.docx")
+    # 1. READ (im Speicher, keine geteilte Temp-Datei zwischen gleichzeitigen Nutzern)
+    raw_md = sop_markdown(file_hash, uploaded_file.getvalue(), uploaded_file.name)
     
     with st.expander("Schritt 1: Rohdaten anzeigen (Debug)"):
         st.text(raw_md[:2000] + "...")
 
     # 2. REFINE
-    if st.button("Audit starten"):
+    start = st.button("Audit starten")
+    if start or audit["verdicts"]:
+        chat_client, emb_client, retriever, retrieval_cache, embedding_cache, limiter, xref_graph = get_clients()
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        status_text.text("🤖 KI extrahiert Claims...")
-        claims_md = refine_to_claims(chat_client, raw_md)
-        
-        claims = claims_md.split("### Claim:")
-        claims = [c.strip() for c in claims if c.strip()]
+        if audit["claims"] is None:
+            status_text.text("🤖 KI extrahiert Claims...")
+            claims_md = refine_to_claims(chat_client, raw_md, limiter=limiter)
+            audit["claims"] = parse_claims(claims_md)
+        claims = audit["claims"]
         
         st.success(f"{len(claims)} prüfbare Claims identifiziert.")
+
+        if audit["vectors"] is None:
+            # Alle Claims vorab gebündelt vektorisieren (statt einem Request pro Claim)
+            status_text.text("🔢 Vektorisiere Claims...")
+            audit["vectors"] = embed_claims(emb_client, [content for _, content in claims],
+                                            limiter=limiter, embedding_cache=embedding_cache)
+        claim_vectors = audit["vectors"]
         
-        # 3. AUDIT LOOP
+        # 3. AUDIT: fertige Urteile sofort zeigen, offene parallel prüfen
         results_container = st.container()
-        
-        for i, claim_text in enumerate(claims):
-            progress = (i + 1) / len(claims)
-            progress_bar.progress(progress)
-            
-            lines = claim_text.split("\n", 1)
-            title = lines[0].strip()
-            content = lines[1].strip() if len(lines) > 1 else title
-            
-            status_text.text(f"Prüfe Claim {i+1}: {title}...")
-            
-            # Search & Compare Logic (Kurzform)
-            try:
-                query_vec = get_embedding(emb_client, content)
-                vector_query = VectorizedQuery(vector=query_vec, k_nearest_neighbors=3, fields="contentVector")
-                results = search_client.search(search_text=content, vector_queries=[vector_query], top=3)
-                
-                references = [f"**{r['source_type']} - {r['title']}**\n>{r['content'][:300]}..." for r in results]
-                context_str = "\n\n".join(references)
-                
-                if not references:
+        verdicts = audit["verdicts"]
+        with results_container:
+            for i in sorted(verdicts):
+                render_verdict(verdicts[i])
+
+        todo = [i for i in range(len(claims)) if i not in verdicts]
+        if todo and start:
+            with ThreadPoolExecutor(max_workers=AUDIT_MAX_WORKERS) as executor:
+                futures = {executor.submit(judge_claim, *claims[i], claim_vectors[i]): i for i in todo}
+                # Rendern im Script-Thread, sobald ein Worker fertig ist (nicht in Claim-Reihenfolge)
+                for future in as_completed(futures):
+                    i = futures[future]
+                    verdicts[i] = future.result()
                     with results_container:
-                        st.warning(f"**{title}**: Keine Regulatorik gefunden.")
-                    continue
-
-                # Audit Prompt
-                audit_prompt = f"""
-                Du bist ein strenger MDR Auditor.
-                SOP: "{content}"
-                FAKTEN: {context_str}
-                AUFGABE: Status (KONFORM/WARNUNG/KRITISCH), Begründung (Deutsch), Zitat.
-                """
-                response = chat_client.chat.completions.create(
-                    model=CHAT_DEPLOYMENT, messages=[{"role":"user", "content":audit_prompt}]
-                )
-                decision = response.choices[0].message.content
-                
-                # Display Result
-                with results_container:
-                    with st.expander(f"{title}", expanded=True):
-                        col1, col2 = st.columns([1, 1])
-                        with col1:
-                            st.markdown("**SOP Aussage:**")
-                            st.info(content)
-                        with col2:
-                            st.markdown("**Audit Ergebnis:**")
-                            if "KONFORM" in decision:
-                                st.success(decision)
-                            elif "KRITISCH" in decision:
-                                st.error(decision)
-                            else:
-                                st.warning(decision)
-                        
-                        st.caption("Quellen:")
-                        for ref in references:
-                            st.markdown(ref)
-
-            except Exception as e:
-                st.error(f"Fehler bei {title}: {e}")
-                
-        status_text.text("✅ Audit abgeschlossen.")
\ No newline at end of file
+                        render_verdict(verdicts[i])
+                    progress_bar.progress(len(verdicts) / len(claims))
+                    status_text.text(f"Geprüft: {len(verdicts)}/{len(claims)} ({claims[i][0]})")
+
+        progress_bar.progress(len(verdicts) / len(claims) if claims else 1.0)
+        if len(verdicts) == len(claims):
+            status_text.text("✅ Audit abgeschlossen.")
+            st.caption(prompt_usage.summary())
+        else:
+            status_text.text(f"⏸️ {len(verdicts)}/{len(claims)} Claims geprüft - 'Audit starten' setzt fort.")
@@ -0,0 +1,98 @@
+import os
+import json
+import hashlib
+import threading
+from retrieval_cache import claim_hash
+
+def chunk_fingerprint(hits: list) -> dict:
+    """Chunk-ID -> Hash des Chunk-Texts. Ändert sich ein Treffer im Index, ändert sich der Fingerprint."""
+    return {
+        (hit.get("id") or hit.get("title") or ""): hashlib.sha256((hit.get("content") or "").encode("utf-8")).hexdigest()[:16]
+        for hit in hits
+    }
+
+class AuditState:
+    """
+    Gedächtnis eines SOP-Audits für inkrementelle Re-Audits (JSON neben dem Report).
+
+      sections: Hash eines Abschnitts -> extrahierte Claims (Markdown)
+      claims:   Hash des Claim-Texts  -> Chunk-Fingerprint + LLM-Urteil
+
+    Bei einer neuen SOP-Version werden nur geänderte Abschnitte neu extrahiert und nur
+    Claims neu beurteilt, deren Text oder deren gefundene Regulatorik sich geändert hat.
+    Ein anderes Chat-Deployment verwirft den Stand.
+    """
+
+    def __init__(self, path: str, model: str = None):
+        self.path = path
+        self.model = model
+        self.sections = {}
+        self.claims = {}
+        self.stats = {"sections_reused": 0, "claims_reused": 0, "claims_judged": 0}
+        self._lock = threading.Lock()
+        self._used_sections = set()
+        self._used_claims = set()
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("model") == model:
+                self.sections = data.get("sections", {})
+                self.claims = data.get("claims", {})
+
+    @staticmethod
+    def section_key(section: str) -> str:
+        return hashlib.sha256(section.encode("utf-8")).hexdigest()
+
+    def get_section(self, section: str):
+        key = self.section_key(section)
+        with self._lock:
+            self._used_sections.add(key)
+            claims_md = self.sections.get(key)
+            if claims_md is not None:
+                self.stats["sections_reused"] += 1
+            return claims_md
+
+    def put_section(self, section: str, claims_md: str):
+        key = self.section_key(section)
+        with self._lock:
+            self._used_sections.add(key)
+            self.sections[key] = claims_md
+
+    def get_verdict(self, content: str, hits: list):
+        """Gespeichertes Urteil, wenn Claim-Text und gefundene Chunks unverändert sind."""
+        key = claim_hash(content)
+        with self._lock:
+            self._used_claims.add(key)
+            entry = self.claims.get(key)
+            if entry and entry["chunks"] == chunk_fingerprint(hits):
+                self.stats["claims_reused"] += 1
+                return entry["decision"]
+            return None
+
+    def put_verdict(self, content: str, hits: list, decision: str):
+        key = claim_hash(content)
+        with self._lock:
+            self._used_claims.add(key)
+            self.claims[key] = {"chunks": chunk_fingerprint(hits), "decision": decision}
+            self.stats["claims_judged"] += 1
+
+    def save(self):
+        """Speichert nur, was in diesem Lauf noch vorkam (gelöschte Claims fallen raus)."""
+        with self._lock:
+            # Stufe lief in diesem Lauf nicht (z.B. Wiederaufnahme nach der Extraktion) -> alles behalten
+            sections = self.sections if not self._used_sections else \
+                {k: v for k, v in self.sections.items() if k in self._used_sections}
+            claims = self.claims if not self._used_claims else \
+                {k: v for k, v in self.claims.items() if k in self._used_claims}
+            data = {"model": self.model, "sections": sections, "claims": claims}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"Re-Audit: {s['claims_reused']} Urteile übernommen, {s['claims_judged']} neu beurteilt, "
+                f"{s['sections_reused']} Abschnitte ohne neue Extraktion")
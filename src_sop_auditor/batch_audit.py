@@ -0,0 +1,202 @@
+"""
+Batch Audit: prüft viele SOPs auf einmal (z.B. zum QMS Release).
+
+    python src_sop_auditor/batch_audit.py "d:/sop/release_2026" --output d:/sop/audit_2026
+    python src_sop_auditor/batch_audit.py "d:/sop/**/*.docx" --docs 3
+
+Alle Dokumente teilen sich einen Rate Limiter, den Retrieval Cache und den
+Embedding Cache. Der Fortschritt steht in <output>/batch_state.json - ein
+abgebrochener Lauf macht beim nächsten Start nur die fehlenden SOPs.
+"""
+import os
+import re
+import glob
+import json
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from sop_audit_pipeline import (
+    CHAT_DEPLOYMENT, EMBEDDING_DEPLOYMENT, EMBEDDING_DIMENSIONS, AUDIT_MAX_WORKERS, AUDIT_REQUESTS_PER_SECOND,
+    docx_to_raw_markdown, refine_to_claims, audit_claims, create_retriever, create_openai_clients, retrieval_cache_scope
+)
+from rate_limiter import AdaptiveRateLimiter
+from retrieval_cache import RetrievalCache, EmbeddingCache
+from audit_state import AuditState
+from src.xref_graph import XrefGraph
+
+BATCH_MAX_DOCUMENTS = int(os.getenv("BATCH_AUDIT_MAX_DOCUMENTS", "2"))
+STATUS_MARKERS = {"konform": "KONFORM", "warnung": "WARNUNG", "kritisch": "KRITISCH"}
+
+def find_sops(source: str) -> list:
+    """Ordner (rekursiv) oder Glob-Muster -> sortierte Liste von .docx Dateien (ohne Word-Lockfiles)."""
+    pattern = os.path.join(source, "**", "*.docx") if os.path.isdir(source) else source
+    return sorted(p for p in glob.glob(pattern, recursive=True)
+                  if p.lower().endswith(".docx") and not os.path.basename(p).startswith("~$"))
+
+def file_hash(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+def report_stem(path: str, root: str) -> str:
+    """Eindeutiger Dateiname pro SOP (Unterordner werden Teil des Namens)."""
+    rel = os.path.relpath(path, root) if root else os.path.basename(path)
+    return re.sub(r"[\\/:]+", "__", os.path.splitext(rel)[0])
+
+def count_verdicts(report: str) -> dict:
+    counts = {key: 0 for key in STATUS_MARKERS}
+    counts["sonstige"] = 0
+    for line in report.splitlines():
+        if not line.startswith("**Status:**"):
+            continue
+        for key, marker in STATUS_MARKERS.items():
+            if marker in line:
+                counts[key] += 1
+                break
+        else:
+            counts["sonstige"] += 1  # übersprungen / Fehler
+    return counts
+
+class BatchState:
+    """Fortschritt pro SOP (Datei-Hash, Claims-/Report-Pfad, Ergebnis), atomar gespeichert."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.documents = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.documents = json.load(f).get("documents", {})
+
+    def get(self, key: str, sha: str):
+        entry = self.documents.get(key)
+        return entry if entry and entry.get("hash") == sha else None
+
+    def update(self, key: str, **fields):
+        with self._lock:
+            self.documents.setdefault(key, {}).update(fields)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"documents": self.documents}, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+def audit_document(path, key, output_dir, state, retriever, emb_client, chat_client, limiter, cache, embedding_cache, max_workers, xref_graph=None):
+    sha = file_hash(path)
+    entry = state.get(key, sha) or {}
+    if entry.get("status") == "done":
+        print(f"⏭️ {key}: bereits geprüft (unverändert).")
+        return entry
+
+    claims_path = os.path.join(output_dir, f"{key}_CLAIMS.md")
+    # Geänderte SOP: nur geänderte Abschnitte/Claims neu prüfen (Stand des letzten Audits)
+    audit_state = AuditState(os.path.join(output_dir, f"{key}_AUDIT_STATE.json"), model=CHAT_DEPLOYMENT)
+    if entry.get("status") == "claims" and os.path.exists(claims_path):
+        # Claim-Extraktion lief schon -> direkt weiter mit dem Audit
+        with open(claims_path, "r", encoding="utf-8") as f:
+            claims_md = f.read()
+    else:
+        raw_md = docx_to_raw_markdown(path)
+        claims_md = refine_to_claims(chat_client, raw_md, max_workers=max_workers, limiter=limiter, strict=True, audit_state=audit_state)
+        with open(claims_path, "w", encoding="utf-8") as f:
+            f.write(claims_md)
+        state.update(key, source=path, hash=sha, status="claims", claims_path=claims_path)
+
+    report_path = os.path.join(output_dir, f"{key}_AUDIT_REPORT.md")
+    final_report = audit_claims(
+        claims_md, retriever, emb_client, chat_client,
+        partial_report_path=os.path.join(output_dir, f"{key}_PARTIAL_REPORT.md"),
+        max_workers=max_workers, limiter=limiter, cache=cache, embedding_cache=embedding_cache,
+        audit_state=audit_state, xref_graph=xref_graph
+    )
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write(f"# Audit Report: {os.path.basename(path)}\n\n{final_report}")
+
+    verdicts = count_verdicts(final_report)
+    state.update(key, source=path, hash=sha, status="done", claims_path=claims_path,
+                 report_path=report_path, verdicts=verdicts, error=None)
+    print(f"✅ {key}: {sum(verdicts.values())} Claims geprüft -> {report_path}")
+    return state.documents[key]
+
+def write_index(output_dir: str, state: BatchState, keys: list) -> str:
+    """Übersicht aller SOPs mit Verdikt-Zählung und Link auf den Einzel-Report."""
+    lines = ["# Batch Audit Übersicht", "",
+             "| SOP | Status | ✅ Konform | ⚠️ Warnung | ❌ Kritisch | ⚪ Sonstige | Report |",
+             "|---|---|---|---|---|---|---|"]
+    totals = {"konform": 0, "warnung": 0, "kritisch": 0, "sonstige": 0}
+    for key in keys:
+        entry = state.documents.get(key, {})
+        verdicts = entry.get("verdicts") or {}
+        for name in totals:
+            totals[name] += verdicts.get(name, 0)
+        report = os.path.basename(entry["report_path"]) if entry.get("report_path") else ""
+        lines.append(f"| {key} | {entry.get('status', 'offen')} | {verdicts.get('konform', '')} | {verdicts.get('warnung', '')} | "
+                     f"{verdicts.get('kritisch', '')} | {verdicts.get('sonstige', '')} | {f'[{report}]({report})' if report else ''} |")
+    lines.append(f"| **Summe** | | {totals['konform']} | {totals['warnung']} | {totals['kritisch']} | {totals['sonstige']} | |")
+
+    index_path = os.path.join(output_dir, "INDEX.md")
+    with open(index_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return index_path
+
+def run_batch(source, output_dir, retriever, emb_client, chat_client, max_documents=BATCH_MAX_DOCUMENTS,
+              max_workers=AUDIT_MAX_WORKERS, limiter=None, cache=None, embedding_cache=None, xref_graph=None):
+    sops = find_sops(source)
+    if not sops:
+        print(f"❌ Keine .docx Dateien gefunden: {source}")
+        return None
+
+    os.makedirs(output_dir, exist_ok=True)
+    root = source if os.path.isdir(source) else os.path.commonpath([os.path.dirname(p) for p in sops])
+    keys = {path: report_stem(path, root) for path in sops}
+    state = BatchState(os.path.join(output_dir, "batch_state.json"))
+    # Ein Limiter für alle Dokumente -> die Quota gilt global, nicht pro SOP
+    limiter = limiter or AdaptiveRateLimiter(rate=AUDIT_REQUESTS_PER_SECOND)
+
+    print(f"🚀 Batch Audit: {len(sops)} SOPs, {max_documents} parallel, {max_workers} Worker pro SOP")
+    failed = []
+    with ThreadPoolExecutor(max_workers=max_documents) as executor:
+        futures = {
+            executor.submit(audit_document, path, keys[path], output_dir, state, retriever, emb_client,
+                            chat_client, limiter, cache, embedding_cache, max_workers, xref_graph): path
+            for path in sops
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                failed.append(path)
+                state.update(keys[path], source=path, error=str(e))
+                print(f"💥 {keys[path]}: {e} (wird beim nächsten Lauf erneut versucht)")
+
+    index_path = write_index(output_dir, state, [keys[p] for p in sops])
+    print(f"\n🎉 Batch fertig: {len(sops) - len(failed)}/{len(sops)} SOPs. Übersicht: {index_path}")
+    return index_path
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch Audit für viele SOPs")
+    parser.add_argument("source", help="Ordner mit SOPs (.docx, rekursiv) oder Glob-Muster")
+    parser.add_argument("--output", default=None, help="Report-Ordner (Default: <Ordner>/audit_reports)")
+    parser.add_argument("--docs", type=int, default=BATCH_MAX_DOCUMENTS, help="SOPs parallel")
+    parser.add_argument("--workers", type=int, default=AUDIT_MAX_WORKERS, help="Claim-Worker pro SOP")
+    args = parser.parse_args()
+
+    base = args.source if os.path.isdir(args.source) else os.path.dirname(args.source.split("*")[0]) or "."
+    output_dir = args.output or os.path.join(base, "audit_reports")
+
+    # Batch-Läufe geben dem interaktiven Auditor (Streamlit) Vorrang am gemeinsamen Deployment
+    chat_client, emb_client = create_openai_clients(priority="batch")
+    retriever = create_retriever()
+
+    run_batch(args.source, output_dir, retriever, emb_client, chat_client,
+              max_documents=args.docs, max_workers=args.workers,
+              cache=RetrievalCache(retrieval_cache_scope(retriever)),
+              embedding_cache=EmbeddingCache(f"{EMBEDDING_DEPLOYMENT}:{EMBEDDING_DIMENSIONS}"),
+              xref_graph=XrefGraph.load())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import os
+import re
+import threading
+from token_counter import count_tokens
+
+# Token-Budget für die Regulatorik im Audit Prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("AUDIT_CONTEXT_TOKENS", "1500"))
+# Chunks überlappen laut Splitter um bis zu 200 Zeichen (mdr_parser.CHUNK_OVERLAP)
+MAX_OVERLAP_CHARS = 400
+
+_PART_ID = re.compile(r"^(?P<base>.+)_(?P<part>\d+)$")
+_PART_TITLE = re.compile(r"\s*\(Part \d+/\d+\)$")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.;:!?])\s+")
+GAP_MARKER = " [...] "
+
+def format_reference(source_type, title, text):
+    return f"QUELLE: {source_type} | {title}\nTEXTAUSZUG: {text}"
+
+def source_key(hit):
+    """(Quelle, Teil-Nr.) - MDR Chunks heißen '<element>_<i>', z.B. 'mdr_art_83_1'."""
+    match = _PART_ID.match(hit.get("id") or "")
+    if match and hit.get("source_type") == "MDR":
+        return match.group("base"), int(match.group("part"))
+    return hit.get("id") or hit.get("url") or hit.get("title"), None
+
+def merge_overlapping(left, right, max_overlap=MAX_OVERLAP_CHARS):
+    """Hängt right an left an und entfernt den Splitter-Overlap (längster Suffix = Präfix)."""
+    for size in range(min(len(left), len(right), max_overlap), 20, -1):
+        if left.endswith(right[:size]):
+            return left + right[size:]
+    return left + " " + right
+
+def _merge_group(hits):
+    """Chunks einer Quelle in Dokument-Reihenfolge zusammenführen; Lücken werden markiert."""
+    hits = sorted(hits, key=lambda h: source_key(h)[1] or 0)
+    text, last_part = hits[0]["content"] or "", source_key(hits[0])[1]
+    for hit in hits[1:]:
+        part = source_key(hit)[1]
+        if last_part is not None and part == last_part + 1:
+            text = merge_overlapping(text, hit["content"] or "")
+        else:
+            text += GAP_MARKER + (hit["content"] or "")
+        last_part = part
+    return text
+
+def _dedupe_sentences(text, seen):
+    """Entfernt Sätze, die schon in einer vorherigen Passage vorkamen (Lücken-Marker bleiben Satzgrenzen)."""
+    segments = []
+    for segment in text.split(GAP_MARKER):
+        kept = []
+        for sentence in _SENTENCE_SPLIT.split(segment):
+            key = " ".join(sentence.lower().split())
+            if len(key) > 30 and key in seen:
+                continue
+            seen.add(key)
+            kept.append(sentence)
+        if kept:
+            segments.append(" ".join(kept))
+    return GAP_MARKER.join(segments)
+
+def _truncate_to_budget(text, budget):
+    """Kürzt an Satzgrenzen auf das Token-Budget."""
+    kept, used = [], 0
+    for sentence in _SENTENCE_SPLIT.split(text):
+        tokens = count_tokens(" " + sentence if kept else sentence)
+        if used + tokens > budget:
+            break
+        kept.append(sentence)
+        used += tokens
+    return " ".join(kept)
+
+def pack_context(hits, token_budget=CONTEXT_TOKEN_BUDGET):
+    """
+    Baut den Regulatorik-Kontext für den Audit Prompt:
+      1. Treffer derselben Quelle (MDR Artikel/Anhang) werden zusammengeführt, benachbarte
+         Teile ohne den doppelten Splitter-Overlap
+      2. Sätze, die bereits in einer relevanteren Passage stehen, fliegen raus
+      3. Passagen in Relevanz-Reihenfolge, bis das Token-Budget voll ist (die letzte gekürzt)
+    Rückgabe: (references, stats) - references als Liste formatierter Passagen.
+    """
+    naive_tokens = sum(count_tokens(format_reference(h["source_type"], h["title"], h["content"])) for h in hits)
+
+    groups, order = {}, []
+    for hit in hits:
+        key = source_key(hit)[0]
+        if key not in groups:
+            groups[key] = []
+            order.append(key)
+        groups[key].append(hit)
+
+    references, used, seen = [], 0, set()
+    for key in order:
+        group = groups[key]
+        text = _dedupe_sentences(_merge_group(group), seen)
+        if not text.strip():
+            continue
+        title = _PART_TITLE.sub("", group[0]["title"] or "") if len(group) > 1 else group[0]["title"]
+        reference = format_reference(group[0]["source_type"], title, text)
+        tokens = count_tokens(reference)
+        if used + tokens > token_budget:
+            remaining = token_budget - used - count_tokens(format_reference(group[0]["source_type"], title, ""))
+            text = _truncate_to_budget(text, remaining) if remaining > 0 else ""
+            if text:
+                reference = format_reference(group[0]["source_type"], title, text)
+                references.append(reference)
+                used += count_tokens(reference)
+            break
+        references.append(reference)
+        used += tokens
+
+    return references, {"naive_tokens": naive_tokens, "packed_tokens": used}
+
+class ContextStats:
+    """Summiert die gesparten Prompt-Tokens über alle Claims eines Audits (thread-sicher)."""
+
+    def __init__(self):
+        self.naive_tokens = 0
+        self.packed_tokens = 0
+        self._lock = threading.Lock()
+
+    def add(self, stats):
+        with self._lock:
+            self.naive_tokens += stats["naive_tokens"]
+            self.packed_tokens += stats["packed_tokens"]
+
+    def summary(self) -> str:
+        saved = self.naive_tokens - self.packed_tokens
+        share = 100 * saved / self.naive_tokens if self.naive_tokens else 0
+        return f"Kontext: {self.packed_tokens} statt {self.naive_tokens} Prompt-Tokens ({saved} gespart, {share:.0f}%)"
@@ -0,0 +1,173 @@
+import io
+import posixpath
+import zipfile
+from lxml import etree
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+_RUN_TEXT = {
+    W + "tab": "\t",
+    W + "ptab": "\t",
+    W + "cr": "\n",
+    W + "noBreakHyphen": "-",
+}
+
+def heading_level(style_name):
+    """Word Überschriften-Formatvorlage -> Markdown Level ('Heading 2'/'Überschrift 2' -> 2, 'Title' -> 1)."""
+    if not style_name:
+        return None
+    name = style_name.strip().lower()
+    if name in ("title", "titel"):
+        return 1
+    for prefix in ("heading ", "überschrift "):
+        if name.startswith(prefix) and name[len(prefix):].isdigit():
+            return min(int(name[len(prefix):]), 6)
+    return None
+
+def _part_paths(archive):
+    """Pfad des Hauptdokuments und der styles.xml laut Package-Relationships."""
+    document, styles = "word/document.xml", None
+    try:
+        rels = etree.fromstring(archive.read("_rels/.rels"))
+        for rel in rels.iter(REL + "Relationship"):
+            if rel.get("Type", "").endswith("/officeDocument"):
+                document = rel.get("Target").lstrip("/")
+    except KeyError:
+        pass
+
+    folder, name = posixpath.split(document)
+    try:
+        rels = etree.fromstring(archive.read(posixpath.join(folder, "_rels", name + ".rels")))
+        for rel in rels.iter(REL + "Relationship"):
+            if rel.get("Type", "").endswith("/styles"):
+                styles = posixpath.normpath(posixpath.join(folder, rel.get("Target")))
+    except KeyError:
+        pass
+    return document, styles
+
+def _paragraph_styles(archive, styles_path):
+    """styleId -> Name für Absatz-Formatvorlagen, plus Name der Standard-Formatvorlage."""
+    names, default = {}, None
+    if not styles_path:
+        return names, default
+    root = etree.fromstring(archive.read(styles_path))
+    for style in root.iter(W + "style"):
+        if style.get(W + "type", "paragraph") != "paragraph":
+            continue
+        name_el = style.find(W + "name")
+        name = name_el.get(W + "val") if name_el is not None else None
+        names[style.get(W + "styleId")] = name
+        if style.get(W + "default") in ("1", "true", "on"):
+            default = name
+    return names, default
+
+def _run_text(run):
+    parts = []
+    for child in run:
+        tag = child.tag
+        if tag == W + "t":
+            parts.append(child.text or "")
+        elif tag == W + "br":
+            parts.append("\n" if child.get(W + "type", "textWrapping") == "textWrapping" else "")
+        elif tag in _RUN_TEXT:
+            parts.append(_RUN_TEXT[tag])
+    return "".join(parts)
+
+def paragraph_text(p):
+    """Wie python-docx: direkte Runs und Hyperlink-Runs (keine Runs in w:ins, w:sdt, ...)."""
+    parts = []
+    for child in p:
+        if child.tag == W + "r":
+            parts.append(_run_text(child))
+        elif child.tag == W + "hyperlink":
+            parts.extend(_run_text(r) for r in child if r.tag == W + "r")
+    return "".join(parts)
+
+def _cell_text(tc):
+    return "\n".join(paragraph_text(p) for p in tc if p.tag == W + "p")
+
+def _int_attr(parent, path, default):
+    el = parent.find(path)
+    if el is None:
+        return default
+    try:
+        return int(el.get(W + "val"))
+    except (TypeError, ValueError):
+        return default
+
+def table_rows(tbl):
+    """
+    Zellen-Texte pro Zeile mit derselben Semantik wie python-docx `row.cells`:
+    gridSpan wiederholt eine Zelle, vMerge='continue' übernimmt die Zelle darüber.
+    Die Zeile darüber wird als {Grid-Offset: (Text, Span)} gehalten -> linear statt
+    der XPath-Suche pro verbundener Zelle.
+    """
+    above = {}
+    for tr in tbl:
+        if tr.tag != W + "tr":
+            continue
+        offset = _int_attr(tr, f"{W}trPr/{W}gridBefore", 0)
+        current, cells = {}, []
+        for tc in tr:
+            if tc.tag != W + "tc":
+                continue
+            span = _int_attr(tc, f"{W}tcPr/{W}gridSpan", 1)
+            v_merge = tc.find(f"{W}tcPr/{W}vMerge")
+            if v_merge is not None and v_merge.get(W + "val", "continue") == "continue":
+                text, root_span = above.get(offset, ("", span))
+            else:
+                text, root_span = _cell_text(tc), span
+            current[offset] = (text, root_span)
+            cells.extend([text] * root_span)
+            offset += span
+        above = current
+        yield cells
+
+def iter_body_elements(stream):
+    """Streamt die direkten Kinder von w:body; bereits verarbeitete Elemente werden freigegeben."""
+    depth, body_depth = 0, None
+    for event, elem in etree.iterparse(stream, events=("start", "end"), huge_tree=True):
+        if event == "start":
+            depth += 1
+            if elem.tag == W + "body":
+                body_depth = depth
+            continue
+        if body_depth is not None and depth == body_depth + 1:
+            yield elem
+            elem.clear()
+            parent = elem.getparent()
+            while elem.getprevious() is not None:
+                del parent[0]
+        elif elem.tag == W + "body":
+            body_depth = None
+        depth -= 1
+
+def read_docx_markdown(source):
+    """
+    Liest eine DOCX (Pfad, Bytes oder File-Objekt) direkt aus dem Zip und liefert dasselbe
+    Markdown wie der python-docx Weg (Überschriften als '#', Tabellen als Pipe-Zeilen).
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    with zipfile.ZipFile(source) as archive:
+        document_path, styles_path = _part_paths(archive)
+        styles, default_style = _paragraph_styles(archive, styles_path)
+
+        md_lines = []
+        with archive.open(document_path) as stream:
+            for element in iter_body_elements(stream):
+                if element.tag.endswith('p'):
+                    text = paragraph_text(element)
+                    if text.strip():
+                        style_id = element.find(f"{W}pPr/{W}pStyle")
+                        style_id = style_id.get(W + "val") if style_id is not None else None
+                        level = heading_level(styles.get(style_id, default_style) if style_id else default_style)
+                        md_lines.append(f"{'#' * level} {text.strip()}" if level else text)
+                elif element.tag.endswith('tbl'):
+                    md_lines.append("\n--- TABELLE START ---")
+                    for cells in table_rows(element):
+                        md_lines.append("| " + " | ".join(c.strip().replace("\n", " ") for c in cells) + " |")
+                    md_lines.append("--- TABELLE ENDE ---\n")
+
+    return "\n\n".join(md_lines)
@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import threading
+
+# Repo-Root in den Pfad: 429-Erkennung ist mit dem Quota Governor geteilt (eine Implementierung)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.quota_governor import is_throttled, retry_after_seconds
+
+class AdaptiveRateLimiter:
+    """
+    Thread-sicherer Rate Limiter mit AIMD-Regelung statt fixer Sleeps:
+      - Requests werden im Abstand 1/rate freigegeben
+      - Erfolg: rate += increase (additiv, bis max_rate)
+      - 429:    rate *= decrease (multiplikativ, bis min_rate) + Pause gemäß Retry-After
+    """
+
+    def __init__(self, rate: float = 2.0, min_rate: float = 0.2, max_rate: float = 10.0,
+                 increase: float = 0.1, decrease: float = 0.5, max_retries: int = 5):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.max_retries = max_retries
+        self.throttle_count = 0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blockiert, bis der nächste Request-Slot frei ist."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1.0 / self.rate
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: float = None):
+        with self._lock:
+            self.throttle_count += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            pause = retry_after if retry_after is not None else 1.0 / self.rate
+            self._next_slot = max(self._next_slot, time.monotonic() + pause)
+
+    def call(self, fn, *args, **kwargs):
+        """Führt fn rate-limitiert aus und wiederholt bei 429 (andere Fehler gehen direkt durch)."""
+        for attempt in range(self.max_retries + 1):
+            self.acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_throttled(e) or attempt == self.max_retries:
+                    raise
+                self.on_throttle(retry_after_seconds(e))
+                continue
+            self.on_success()
+            return result
@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import numpy as np
+
+RETRIEVAL_CACHE_PATH = os.getenv("RETRIEVAL_CACHE_PATH", "data/cache/retrieval_cache.sqlite")
+# Ab dieser Cosine Similarity gilt ein Claim als Near-Duplicate eines gecachten Claims
+RETRIEVAL_CACHE_THRESHOLD = float(os.getenv("RETRIEVAL_CACHE_THRESHOLD", "0.97"))
+# Ablauf: Einträge, die so lange nicht genutzt wurden, fliegen raus; darüber hinaus LRU bis zur Maximalgröße
+RETRIEVAL_CACHE_MAX_AGE_DAYS = float(os.getenv("RETRIEVAL_CACHE_MAX_AGE_DAYS", "30"))
+RETRIEVAL_CACHE_MAX_ENTRIES = int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "50000"))
+
+def claim_hash(text: str) -> str:
+    """Hash über den normalisierten Claim-Text (Whitespace/Groß-Klein egal)."""
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def upload_manifest_hash(index_name: str, store_folder: str = None):
+    """Hash des Upload-Manifests (upload_manager) für den Index oder None, wenn lokal keins liegt."""
+    store_folder = store_folder or os.getenv("LOCAL_VECTOR_STORE_PATH", "data/vectors")
+    path = os.path.join(store_folder, f"upload_manifest_{index_name}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+def resolve_index_version(index_name: str, endpoint: str = None, key: str = None, store_folder: str = None) -> str:
+    """
+    Cache-Scope = konkreter Index + Inhaltsstand. Zeigt AZURE_SEARCH_INDEX auf einen Alias (Blue/Green),
+    wird der Alias aufgelöst, damit ein Umschalten den Cache invalidiert. Dokumentanzahl und Hash des
+    Upload-Manifests ändern sich bei jedem Re-Upload oder Neuanlegen desselben Index.
+    """
+    version = index_name
+    manifest = upload_manifest_hash(index_name, store_folder)
+    if endpoint and key:
+        try:
+            from src.search_rest import SearchRestClient
+            rest = SearchRestClient(endpoint, key, timeout=5)
+            alias = rest.get_alias(index_name)
+            if alias and alias.get("indexes"):
+                version = alias["indexes"][0]
+            version = f"{version}@{rest.document_count(version)}"
+        except Exception:
+            pass
+    return f"{version}:{manifest}" if manifest else version
+
+class RetrievalCache:
+    """
+    Persistenter Retrieval Cache (SQLite), gemeinsam genutzt von CLI und Streamlit App.
+
+    Lookup-Reihenfolge:
+      1. Exakter Treffer über den Claim-Hash
+      2. Near-Duplicate: Cosine Similarity des Claim-Vektors >= threshold
+    Einträge gehören zu einem Scope (Index-Version inkl. Inhaltsstand) - ein Reindex invalidiert
+    den Cache also automatisch. Andere Scopes bleiben erhalten (CLI und App können parallel mit
+    verschiedenen Scopes laufen); alte Einträge laufen nach Alter bzw. LRU ab.
+    """
+
+    def __init__(self, scope: str, path: str = RETRIEVAL_CACHE_PATH, threshold: float = RETRIEVAL_CACHE_THRESHOLD,
+                 max_age_days: float = RETRIEVAL_CACHE_MAX_AGE_DAYS, max_entries: int = RETRIEVAL_CACHE_MAX_ENTRIES):
+        self.scope = scope
+        self.threshold = threshold
+        self.stats = {"exact": 0, "near": 0, "miss": 0}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._db:
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS retrieval (
+                    scope TEXT NOT NULL,
+                    claim_hash TEXT NOT NULL,
+                    vector BLOB,
+                    results TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    PRIMARY KEY (scope, claim_hash)
+                )""")
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(retrieval)")]
+            if "last_used" not in columns:
+                self._db.execute("ALTER TABLE retrieval ADD COLUMN last_used REAL")
+                self._db.execute("UPDATE retrieval SET last_used = created")
+            self._db.execute("CREATE INDEX IF NOT EXISTS retrieval_lru ON retrieval (last_used)")
+            self._expire(max_age_days, max_entries)
+
+        # Vektoren des Scopes im Speicher für den Near-Duplicate Lookup
+        self._hashes = []
+        self._vectors = []
+        self._matrix = None
+        self._last_rowid = 0
+        self._refresh()
+
+    def _expire(self, max_age_days: float, max_entries: int):
+        """Nach Alter und LRU aufräumen (über alle Scopes)."""
+        if max_age_days:
+            self._db.execute("DELETE FROM retrieval WHERE last_used < ?", (time.time() - max_age_days * 86400,))
+        if max_entries:
+            self._db.execute("""
+                DELETE FROM retrieval WHERE rowid IN (
+                    SELECT rowid FROM retrieval ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )""", (max_entries,))
+
+    def _refresh(self):
+        """Lädt neue Einträge nach (auch von anderen Prozessen geschriebene)."""
+        rows = self._db.execute(
+            "SELECT rowid, claim_hash, vector FROM retrieval WHERE scope = ? AND rowid > ? ORDER BY rowid",
+            (self.scope, self._last_rowid)).fetchall()
+        for rowid, hash_, blob in rows:
+            self._last_rowid = max(self._last_rowid, rowid)
+            if blob:
+                self._hashes.append(hash_)
+                self._vectors.append(np.frombuffer(blob, dtype=np.float32))
+        if rows:
+            self._matrix = None
+
+    def _near_duplicate(self, vector):
+        if not self._vectors:
+            return None
+        if self._matrix is None:
+            self._matrix = np.vstack(self._vectors)
+        query = np.asarray(vector, dtype=np.float32)
+        if query.shape[0] != self._matrix.shape[1]:
+            return None
+        query = query / (np.linalg.norm(query) or 1.0)
+        sims = self._matrix @ query
+        best = int(np.argmax(sims))
+        return self._hashes[best] if sims[best] >= self.threshold else None
+
+    def _load_results(self, hash_):
+        row = self._db.execute("SELECT results FROM retrieval WHERE scope = ? AND claim_hash = ?",
+                               (self.scope, hash_)).fetchone()
+        if not row:
+            return None
+        with self._db:
+            self._db.execute("UPDATE retrieval SET last_used = ? WHERE scope = ? AND claim_hash = ?",
+                             (time.time(), self.scope, hash_))
+        return json.loads(row[0])
+
+    def get(self, text: str, vector=None):
+        """Gecachte Suchergebnisse für den Claim oder None."""
+        with self._lock:
+            results = self._load_results(claim_hash(text))
+            if results is not None:
+                self.stats["exact"] += 1
+                return results
+
+            if vector is not None:
+                self._refresh()
+                near = self._near_duplicate(vector)
+                if near:
+                    results = self._load_results(near)
+                    if results is not None:
+                        self.stats["near"] += 1
+                        return results
+
+            self.stats["miss"] += 1
+            return None
+
+    def put(self, text: str, vector, results: list):
+        blob = None
+        if vector is not None:
+            vec = np.asarray(vector, dtype=np.float32)
+            blob = (vec / (np.linalg.norm(vec) or 1.0)).tobytes()
+
+        now = time.time()
+        with self._lock:
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO retrieval (scope, claim_hash, vector, results, created, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.scope, claim_hash(text), blob, json.dumps(results, ensure_ascii=False), now, now))
+            self._refresh()
+
+    def summary(self) -> str:
+        total = sum(self.stats.values())
+        hits = self.stats["exact"] + self.stats["near"]
+        return f"Retrieval Cache: {hits}/{total} Treffer ({self.stats['exact']} exakt, {self.stats['near']} near-duplicate)"
+
+class EmbeddingCache:
+    """
+    Claim-Embeddings (gleiche SQLite Datei wie der Retrieval Cache), geteilt über SOPs
+    und Läufe hinweg. Scope = Deployment + Dimension, damit ein Modellwechsel nichts mischt.
+    """
+
+    def __init__(self, scope: str, path: str = RETRIEVAL_CACHE_PATH):
+        self.scope = scope
+        self.hits = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._db:
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    scope TEXT NOT NULL,
+                    claim_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    PRIMARY KEY (scope, claim_hash)
+                )""")
+
+    def get_many(self, texts: list) -> list:
+        """Vektor (Liste) oder None pro Text."""
+        vectors = []
+        with self._lock:
+            for text in texts:
+                row = self._db.execute("SELECT vector FROM embeddings WHERE scope = ? AND claim_hash = ?",
+                                       (self.scope, claim_hash(text))).fetchone()
+                vectors.append(np.frombuffer(row[0], dtype=np.float32).tolist() if row else None)
+            self.hits += sum(v is not None for v in vectors)
+        return vectors
+
+    def put_many(self, texts: list, vectors: list):
+        rows = [(self.scope, claim_hash(t), np.asarray(v, dtype=np.float32).tobytes())
+                for t, v in zip(texts, vectors) if v is not None]
+        with self._lock:
+            with self._db:
+                self._db.executemany("INSERT OR REPLACE INTO embeddings (scope, claim_hash, vector) VALUES (?, ?, ?)", rows)
@@ -1,14 +1,34 @@
 import os
-import docx
-import time
+import re
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-from openai import AzureOpenAI
-from azure.core.credentials import AzureKeyCredential
-from azure.search.documents import SearchClient
-from azure.search.documents.models import VectorizedQuery
 
+# .env vor den lokalen und 'src' Modulen laden: die lesen ihre Konfiguration beim Import
+# (z.B. retrieval_cache, context_packer, verdict_batcher, src.reranker)
 load_dotenv()
 
+from rate_limiter import AdaptiveRateLimiter
+from token_counter import count_tokens
+from context_packer import pack_context, ContextStats
+from docx_reader import read_docx_markdown, heading_level
+from audit_state import AuditState
+from verdict_batcher import (
+    VERDICT_BATCH_SIZE, BATCH_CONTEXT_TOKEN_BUDGET, RESPONSE_FORMAT, BATCH_AUDIT_PROMPT,
+    group_by_context, merge_hits, build_batch_prompt, parse_verdicts
+)
+from retrieval_cache import RetrievalCache, EmbeddingCache, resolve_index_version
+
+# Repo-Root in den Pfad, damit das gemeinsame 'src' Package importierbar ist
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.retrieval_backend import RETRIEVAL_BACKEND, LocalVectorBackend, create_retrieval_backend
+from src.prompt_usage import PromptUsage
+from src.quota_governor import govern, governor_summary
+from src.reranker import RERANK_CANDIDATES, rerank
+from src.xref_graph import XrefGraph
+
 # --- CONFIG ---
 SOP_PATH = r"d:\sop\sop_test.docx"
 
@@ -20,15 +40,44 @@ INDEX_NAME = os.getenv("AZURE_SEARCH_INDEX", "mdr-legal-index-v1")
 EMBEDDING_ENDPOINT = os.getenv("AZURE_OPENAI_EMBEDDING_ENDPOINT")
 EMBEDDING_KEY = os.getenv("AZURE_OPENAI_EMBEDDING_KEY")
 EMBEDDING_DEPLOYMENT = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT")
+EMBEDDING_DIMENSIONS = int(os.getenv("AZURE_OPENAI_EMBEDDING_DIMENSIONS", "3072"))
 
 CHAT_ENDPOINT = os.getenv("AZURE_OPENAI_CHAT_ENDPOINT")
 CHAT_KEY = os.getenv("AZURE_OPENAI_CHAT_KEY")
 CHAT_DEPLOYMENT = os.getenv("AZURE_OPENAI_CHAT_DEPLOYMENT")
 CHAT_VERSION = os.getenv("AZURE_OPENAI_CHAT_API_VERSION")
 
+# Parallelität: Claims sind unabhängig -> begrenzter Worker Pool + adaptives Rate Limiting
+AUDIT_MAX_WORKERS = int(os.getenv("AUDIT_MAX_WORKERS", "4"))
+AUDIT_REQUESTS_PER_SECOND = float(os.getenv("AUDIT_REQUESTS_PER_SECOND", "2"))
+
+# Batch-Embedding der Claims (API: max. 2048 Inputs pro Request)
+EMBEDDING_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", "50000"))
+EMBEDDING_BATCH_MAX_INPUTS = 256
+
+# Claim-Extraktion: maximale Abschnittsgröße (Tokens) für die Map-Phase
+CLAIM_SECTION_TOKENS = int(os.getenv("CLAIM_SECTION_TOKENS", "6000"))
+
+# Felder, die für Prompt und Report aus dem Index geholt (und gecacht) werden
+RETRIEVAL_FIELDS = ["id", "title", "content", "source_type", "chapter"]
+
+# Direkt referenzierte MDR Vorschriften (Verweis-Graph), die zusätzlich in den Kontext gehen
+XREF_EXPANSION = int(os.getenv("AUDIT_XREF_EXPANSION", "2"))
+
+# Prompt-/Cache-Tokens und Latenz aller Chat Calls (CLI, Batch und App teilen sich den Zähler)
+prompt_usage = PromptUsage()
+
 # --- STEP 1: WORD TO RAW MARKDOWN ---
-def docx_to_raw_markdown(docx_path):
-    print(f"📖 Schritt 1: Lese DOCX '{os.path.basename(docx_path)}'...")
+def docx_to_raw_markdown(source, name=None):
+    """source: Pfad, Bytes (z.B. Streamlit Upload) oder File-Objekt - ohne Umweg über eine Temp-Datei."""
+    name = name or (os.path.basename(source) if isinstance(source, (str, os.PathLike)) else "Upload")
+    print(f"📖 Schritt 1: Lese DOCX '{name}'...")
+    # Streamt word/document.xml direkt aus dem Zip (schnell auch bei 200-Seiten Anhängen)
+    return read_docx_markdown(source)
+
+def docx_to_raw_markdown_legacy(docx_path):
+    """Bisheriger python-docx Weg - Referenz für benchmarks/bench_docx_reader.py und die Tests."""
+    import docx
     doc = docx.Document(docx_path)
     md_lines = []
     
@@ -36,7 +85,9 @@ def docx_to_raw_markdown(docx_path):
         if element.tag.endswith('p'): 
             para = docx.text.paragraph.Paragraph(element, doc)
             if para.text.strip():
-                md_lines.append(para.text)
+                # Überschriften als '#' ausgeben -> Grundlage für das Section-Splitting in Schritt 2
+                level = heading_level(para.style.name if para.style is not None else None)
+                md_lines.append(f"{'#' * level} {para.text.strip()}" if level else para.text)
         elif element.tag.endswith('tbl'):
             table = docx.table.Table(element, doc)
             md_lines.append("\n--- TABELLE START ---")
@@ -48,15 +99,13 @@ def docx_to_raw_markdown(docx_path):
     return "\n\n".join(md_lines)
 
 # --- STEP 2: RAW MD TO CLAIMS ---
-def refine_to_claims(client, raw_text):
-    print("🧠 Schritt 2: Extrahiere prüfbare Claims (KI)...")
-    
-    # PROMPT UPDATE: Deutsch & Präzise
-    system_prompt = """
+# PROMPT UPDATE: Deutsch & Präzise
+CLAIM_EXTRACTION_PROMPT = """
     Du bist ein Senior Quality Manager in der Medizintechnik.
     Deine Aufgabe ist es, "Prüfbare Aussagen" (Claims) aus einer rohen SOP zu extrahieren.
 
     INPUT: Roher Text aus einer DOCX (enthält "Rauschen" wie Versionstabellen, Unterschriften, Verteiler).
+    Du bekommst einen ABSCHNITT der SOP; die Überschriften-Zeile zeigt, wo er im Dokument steht.
     OUTPUT: Eine saubere Markdown-Liste relevanter Prozessdefinitionen.
 
     REGELN:
@@ -65,153 +114,554 @@ def refine_to_claims(client, raw_text):
     3. FORMAT:
        ### Claim: [Kurzer Titel]
        [Der vollständige Text der Anweisung aus der SOP]
+    4. Enthält der Abschnitt keine prüfbaren Aussagen, antworte nur mit: KEINE
     
     Antworte ausschließlich auf DEUTSCH.
     """
 
-    try:
-        response = client.chat.completions.create(
-            model=CHAT_DEPLOYMENT,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"RAW SOP CONTENT:\n{raw_text[:30000]}"}
-            ],
-            timeout=60
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        print(f"❌ Fehler bei Step 2 (Refinement): {e}")
-        return ""
+def _split_oversized(block, max_tokens):
+    """Notfall für einzelne Riesen-Absätze: an Zeilen bzw. hart nach Zeichen teilen."""
+    pieces, current = [], ""
+    for line in block.split("\n"):
+        while count_tokens(line) > max_tokens:
+            cut = max(1, len(line) * max_tokens // count_tokens(line))
+            pieces.append(line[:cut])
+            line = line[cut:]
+        if current and count_tokens(current + "\n" + line) > max_tokens:
+            pieces.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        pieces.append(current)
+    return pieces
+
+def split_sections(raw_md, max_tokens=CLAIM_SECTION_TOKENS):
+    """
+    Zerlegt das Roh-Markdown an den Überschriften in Abschnitte <= max_tokens.
+    Kleine Nachbar-Abschnitte werden zusammengelegt (weniger Calls), zu große an
+    Absatzgrenzen geteilt. Jeder Teil trägt den Überschriften-Pfad als Kontext.
+    Der gesamte Text landet genau einmal in einem Abschnitt.
+    """
+    # 1. Logische Abschnitte an Überschriften
+    logical, headings = [], []
+    current = {"path": "", "blocks": [], "headings_only": True}
+    for block in raw_md.split("\n\n"):
+        match = re.match(r"^(#{1,6}) (.+)$", block.strip())
+        if match:
+            level = len(match.group(1))
+            headings = headings[:level - 1] + [match.group(2)]
+            if current["blocks"] and not current["headings_only"]:
+                logical.append(current)
+                current = {"path": "", "blocks": [], "headings_only": True}
+            # Überschriften ohne eigenen Text bleiben beim folgenden Abschnitt
+            current["path"] = " > ".join(headings)
+            current["blocks"].append(block)
+        elif block.strip():
+            current["blocks"].append(block)
+            current["headings_only"] = False
+    if current["blocks"]:
+        logical.append(current)
+
+    # 2. Zu große Abschnitte an Absatzgrenzen teilen
+    pieces = []
+    for section in logical:
+        prefix = f"[Abschnitt: {section['path']}]\n\n" if section["path"] else ""
+        budget = max_tokens - count_tokens(prefix)
+        text = ""
+        for block in section["blocks"]:
+            for part in (_split_oversized(block, budget) if count_tokens(block) > budget else [block]):
+                if text and count_tokens(text + "\n\n" + part) > budget:
+                    pieces.append(prefix + text)
+                    text = ""
+                text = f"{text}\n\n{part}" if text else part
+        if text:
+            pieces.append(prefix + text)
+
+    # 3. Kleine Nachbarn zusammenlegen
+    sections = []
+    for piece in pieces:
+        if sections and count_tokens(sections[-1] + "\n\n" + piece) <= max_tokens:
+            sections[-1] += "\n\n" + piece
+        else:
+            sections.append(piece)
+    return sections
+
+def extract_section_claims(client, section, limiter):
+    """Map: Claims aus einem Abschnitt (ein Chat Call, rate-limitiert)."""
+    response = prompt_usage.call(
+        "Claim-Extraktion", limiter.call,
+        client.chat.completions.create,
+        model=CHAT_DEPLOYMENT,
+        messages=[
+            {"role": "system", "content": CLAIM_EXTRACTION_PROMPT},
+            {"role": "user", "content": f"RAW SOP CONTENT:\n{section}"}
+        ],
+        timeout=60
+    )
+    return response.choices[0].message.content or ""
+
+def _claim_key(content):
+    return re.sub(r"[^\w]+", " ", content.lower()).strip()
+
+def merge_claims(section_claims):
+    """Reduce: Claims aller Abschnitte in Dokument-Reihenfolge, Dubletten (gleicher Text) entfernt."""
+    merged, seen = [], set()
+    for claims_md in section_claims:
+        for title, content in parse_claims(claims_md or ""):
+            if title.upper() == "KEINE":
+                continue
+            key = _claim_key(content)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            merged.append(f"### Claim: {title}\n{content}")
+    return "\n\n".join(merged)
+
+def refine_to_claims(client, raw_text, max_workers=AUDIT_MAX_WORKERS, limiter=None, max_tokens=CLAIM_SECTION_TOKENS, strict=False, audit_state=None):
+    """
+    Map-Reduce statt eines einzelnen, abgeschnittenen Calls: das Dokument wird an den
+    Überschriften in Abschnitte zerlegt, die parallel extrahiert und danach zusammengeführt werden.
+    strict=True: fehlgeschlagene Abschnitte lösen einen Fehler aus, statt Claims zu verlieren.
+    Mit audit_state werden unveränderte Abschnitte (Re-Audit) nicht erneut extrahiert.
+    """
+    sections = split_sections(raw_text, max_tokens)
+    print(f"🧠 Schritt 2: Extrahiere prüfbare Claims (KI) aus {len(sections)} Abschnitt(en)...")
+    limiter = limiter or AdaptiveRateLimiter(rate=AUDIT_REQUESTS_PER_SECOND)
+
+    section_claims = [audit_state.get_section(section) if audit_state else None for section in sections]
+    todo = [i for i, claims_md in enumerate(section_claims) if claims_md is None]
+    if len(todo) < len(sections):
+        print(f"   ♻️ {len(sections) - len(todo)} unveränderte Abschnitte aus dem letzten Audit übernommen.")
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(extract_section_claims, client, sections[i], limiter): i for i in todo}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                section_claims[i] = future.result()
+                if audit_state is not None:
+                    audit_state.put_section(sections[i], section_claims[i])
+            except Exception as e:
+                failed.append(i + 1)
+                print(f"❌ Fehler bei Step 2 (Abschnitt {i+1}/{len(sections)}): {e}")
+
+    if failed:
+        print(f"⚠️ {len(failed)} von {len(sections)} Abschnitten ohne Claims (fehlgeschlagen): {sorted(failed)}")
+        if strict:
+            raise RuntimeError(f"Claim-Extraktion unvollständig: Abschnitte {sorted(failed)} fehlgeschlagen")
+    return merge_claims(section_claims)
 
 # --- STEP 3: AUDIT LOOP ---
 def get_embedding(client, text):
     response = client.embeddings.create(
         input=text, 
         model=EMBEDDING_DEPLOYMENT,
+        dimensions=EMBEDDING_DIMENSIONS,
         timeout=10 
     )
     return response.data[0].embedding
 
-def audit_claims(claims_md, search_client, emb_client, chat_client):
-    print("⚖️ Schritt 3: Prüfe Claims gegen Azure Index...")
+def batch_by_token_budget(texts, token_budget=EMBEDDING_BATCH_TOKENS, max_inputs=EMBEDDING_BATCH_MAX_INPUTS):
+    """Gruppiert Text-Indizes so, dass jeder Batch unter dem Token-Budget bleibt."""
+    batches, current, current_tokens = [], [], 0
+    for i, text in enumerate(texts):
+        tokens = count_tokens(text)
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_inputs):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def get_embeddings_batch(client, texts):
+    """Ein Request für mehrere Texte. Die API liefert die Vektoren mit Index zurück."""
+    response = client.embeddings.create(
+        input=texts,
+        model=EMBEDDING_DEPLOYMENT,
+        dimensions=EMBEDDING_DIMENSIONS,
+        timeout=30
+    )
+    return [d.embedding for d in sorted(response.data, key=lambda d: d.index)]
+
+def embed_claims(emb_client, texts, limiter=None, token_budget=EMBEDDING_BATCH_TOKENS, embedding_cache=None):
+    """
+    Vektorisiert alle Claims vorab in wenigen Batch-Requests (statt einem Request pro Claim).
+    Schlägt ein Batch fehl, werden dessen Texte einzeln nachgeholt. Rückgabe: Vektor oder None pro Text.
+    Mit embedding_cache werden nur Claims ohne gecachten Vektor angefragt.
+    """
+    limiter = limiter or AdaptiveRateLimiter(rate=AUDIT_REQUESTS_PER_SECOND)
+    vectors = embedding_cache.get_many(texts) if embedding_cache is not None else [None] * len(texts)
+    missing = [i for i, vec in enumerate(vectors) if vec is None]
+    if not missing:
+        print(f"   🔢 Alle {len(texts)} Claim-Vektoren aus dem Cache.")
+        return vectors
+
+    missing_texts = [texts[i] for i in missing]
+    batches = batch_by_token_budget(missing_texts, token_budget)
+    cached_note = f" ({len(texts) - len(missing)} aus dem Cache)" if embedding_cache is not None else ""
+    print(f"   🔢 Vektorisiere {len(missing)} Claims in {len(batches)} Batch-Request(s){cached_note}...")
+
+    for batch in batches:
+        try:
+            batch_vectors = limiter.call(get_embeddings_batch, emb_client, [missing_texts[j] for j in batch])
+            for j, vec in zip(batch, batch_vectors):
+                vectors[missing[j]] = vec
+        except Exception as e:
+            print(f"   ⚠️ Batch-Embedding fehlgeschlagen ({e}). Einzeln nachholen...")
+            for j in batch:
+                try:
+                    vectors[missing[j]] = limiter.call(get_embedding, emb_client, missing_texts[j])
+                except Exception as single_error:
+                    print(f"   ❌ Emb Error (Claim {missing[j]+1}): {single_error}")
+
+    if embedding_cache is not None:
+        embedding_cache.put_many(missing_texts, [vectors[i] for i in missing])
+    return vectors
+
+def parse_claims(claims_md):
+    """Zerlegt die Claim-Liste aus refine_to_claims in (Titel, Text) Paare."""
+    claims = [c.strip() for c in claims_md.split("### Claim:") if c.strip()]
+    parsed = []
+    for claim_text in claims:
+        lines = claim_text.split("\n", 1)
+        title = lines[0].strip()
+        content = lines[1].strip() if len(lines) > 1 else title
+        parsed.append((title, content))
+    return parsed
+
+def create_openai_clients(priority="normal"):
+    """
+    Chat- und Embedding-Client. openai wird erst hier importiert (Startzeit von CLI und App).
+    Mit QUOTA_*_TPM/RPM laufen beide über den prozessübergreifenden Quota Governor (priority: interactive|normal|batch).
+    """
+    from openai import AzureOpenAI
+    chat_client = AzureOpenAI(azure_endpoint=CHAT_ENDPOINT, api_key=CHAT_KEY, api_version=CHAT_VERSION)
+    emb_client = AzureOpenAI(azure_endpoint=EMBEDDING_ENDPOINT, api_key=EMBEDDING_KEY, api_version="2024-02-01")
+    return govern(chat_client, priority), govern(emb_client, priority)
+
+def create_retriever(kind=RETRIEVAL_BACKEND):
+    """Retrieval Backend laut RETRIEVAL_BACKEND: Azure AI Search (Default) oder lokaler Vector Store."""
+    if kind == "local":
+        return create_retrieval_backend("local")
+    from azure.core.credentials import AzureKeyCredential
+    from azure.search.documents import SearchClient
+    search_client = SearchClient(endpoint=SEARCH_ENDPOINT, index_name=INDEX_NAME, credential=AzureKeyCredential(SEARCH_KEY))
+    return create_retrieval_backend("azure", search_client, resolve_index_version(INDEX_NAME, SEARCH_ENDPOINT, SEARCH_KEY))
+
+def retrieval_cache_scope(retriever):
+    """Cache-Scope: Index-Version + Kandidatenzahl (der Cache hält die Kandidaten vor dem Reranking)."""
+    return f"{retriever.version}:k{RERANK_CANDIDATES}"
+
+def retrieve_references(content, query_vec, retriever, cache=None, top=3, candidates=RERANK_CANDIDATES, xref_graph=None):
+    """
+    Suche der Regulatorik für einen Claim über das Retrieval Backend (Azure Hybrid Search oder lokal).
+    Retrieve-then-Rerank: die Suche liefert `candidates` Treffer, lokal gerankt gehen nur die
+    besten `top` in den Prompt (bessere Recall bei Claims über mehrere Artikel, gleiche Tokens).
+    Mit Cache: erst exakter/near-duplicate Treffer, nur bei Miss eine Suche.
+    Mit xref_graph kommen referenzierte Artikel/Anhänge dazu (lokaler Lookup statt weiterer Suchen).
+    """
+    hits = cache.get(content, query_vec) if cache is not None else None
+    if hits is None:
+        results = retriever.search(content, query_vec, top=max(top, candidates), select=RETRIEVAL_FIELDS)
+        hits = []
+        for res in results:
+            hit = {field: res.get(field) for field in RETRIEVAL_FIELDS}
+            # Score der Suche bleibt für das Reranking erhalten (auch im Cache)
+            if res.get("@search.score") is not None:
+                hit["@search.score"] = res["@search.score"]
+            hits.append(hit)
+        if cache is not None and hits:
+            cache.put(content, query_vec, hits)
+
+    if candidates <= top:
+        hits = [{field: hit.get(field) for field in RETRIEVAL_FIELDS} for hit in hits[:top]]
+    else:
+        # Cosine pro Kandidat gibt es nur lokal (Azure liefert die Vektoren nicht mit)
+        similarity = retriever.similarity if isinstance(retriever, LocalVectorBackend) else None
+        hits = [{field: hit.get(field) for field in RETRIEVAL_FIELDS}
+                for hit in rerank(content, hits, top, query_vec, similarity)]
+
+    if xref_graph is not None and hits:
+        hits += xref_graph.expand(hits, XREF_EXPANSION, claim=content)
+    return hits
+
+# PROMPT UPDATE: Deutsch, Zitate, Strenge. Statisch (ohne Claim/Fakten), damit alle Urteils-Requests
+# denselben Präfix haben. Azure OpenAI cached ab 1024 identischen Tokens, also wenn Claims dieselben
+# Fakten bekommen (System-Prompt + Fakten vor dem Claim).
+AUDIT_PROMPT = """
+    Du bist ein strenger MDR/IVDR Auditor für Medizintechnik.
+
+    Du bekommst eine SOP AUSSAGE DES HERSTELLERS und REGULATORISCHE FAKTEN (Aus der Datenbank).
+
+    AUFGABE:
+    Prüfe die SOP-Aussage auf Konformität mit den Fakten.
+
+    FORMAT VORGABE (Strikt einhalten):
+    **Status:** [✅ KONFORM | ⚠️ WARNUNG | ❌ KRITISCH]
+    **Begründung:** [Deine Analyse auf Deutsch. Warum ist es konform oder nicht?]
+    **Zitat / Referenz:** [Nenne Artikel/Guideline UND kopiere den relevanten Satz wörtlich aus den "REGULATORISCHE FAKTEN". Wenn der Text dort steht, zitiere ihn!]
+    """
+
+def build_audit_message(content, context_str):
+    """Variabler User-Teil zum statischen AUDIT_PROMPT: erst die Fakten, der Claim zuletzt (längerer gemeinsamer Präfix)."""
+    return f'REGULATORISCHE FAKTEN (Aus der Datenbank):\n{context_str}\n\nSOP AUSSAGE DES HERSTELLERS:\n"{content}"'
+
+def claim_entry(title, content, decision):
+    # OUTPUT FORMAT UPDATE: Kein Slicing mehr beim Content!
+    return f"## Claim: {title}\n\n**SOP Text:**\n> {content}\n\n{decision}\n"
+
+def audit_single_claim(title, content, query_vec, retriever, chat_client, limiter, cache=None, context_stats=None, audit_state=None, results=None, xref_graph=None):
+    """Hybrid Search -> LLM Urteil für einen (bereits vektorisierten) Claim. Liefert den Report-Eintrag."""
+    # A. Vector Search (entfällt, wenn die Treffer schon vorliegen)
+    if query_vec is None and results is None:
+        return f"## {title}\n**Status:** ⚪ ÜBERSPRUNGEN (Embedding Fehler)"
+
+    if results is None:
+        results = retrieve_references(content, query_vec, retriever, cache, xref_graph=xref_graph)
+
+    # Kontext für das LLM: überlappende Chunks zusammenführen, Dubletten raus, Token-Budget
+    references, stats = pack_context(results)
+    if context_stats is not None:
+        context_stats.add(stats)
+
+    if not references:
+        return f"## {title}\n**Status:** ⚪ ÜBERSPRUNGEN (Keine Regulatorik gefunden)"
+
+    # Re-Audit: gleicher Claim-Text + gleiche Regulatorik -> Urteil übernehmen
+    if audit_state is not None:
+        decision = audit_state.get_verdict(content, results)
+        if decision is not None:
+            return claim_entry(title, content, decision)
+
+    # B. Comparator (LLM): statische Anweisungen als System-Prompt, Claim + Fakten im User-Teil
+    response = prompt_usage.call(
+        "Urteil", limiter.call,
+        chat_client.chat.completions.create,
+        model=CHAT_DEPLOYMENT,
+        messages=[
+            {"role": "system", "content": AUDIT_PROMPT},
+            {"role": "user", "content": build_audit_message(content, "\n\n".join(references))}
+        ],
+        timeout=45
+    )
     
-    claims = claims_md.split("### Claim:")
-    audit_results = []
+    decision = response.choices[0].message.content
+    if audit_state is not None:
+        audit_state.put_verdict(content, results, decision)
     
-    claims = [c.strip() for c in claims if c.strip()]
+    return claim_entry(title, content, decision)
 
-    print(f"   {len(claims)} Claims gefunden.")
-    
-    partial_report_path = SOP_PATH.replace(".docx", "_PARTIAL_REPORT.md")
-    with open(partial_report_path, "w", encoding="utf-8") as f:
-        f.write("# PARTIAL AUDIT LOG\n\n")
+def audit_claim_group(group, claims, hit_lists, retriever, chat_client, limiter, context_stats=None, audit_state=None):
+    """
+    Ein Urteils-Request (Structured Output) für mehrere Claims mit überlappender Regulatorik:
+    die Anweisungen und der gemeinsame Kontext gehen nur einmal in den Prompt.
+    Claims ohne gültiges Urteil in der Antwort werden einzeln nachgeprüft.
+    Liefert die Report-Einträge in Gruppen-Reihenfolge (Exception statt Eintrag, wenn die Einzelprüfung scheitert).
+    """
+    entries, pending = {}, []
+    for i in group:
+        title, content = claims[i]
+        decision = audit_state.get_verdict(content, hit_lists[i]) if audit_state is not None else None
+        if decision is not None:
+            entries[i] = claim_entry(title, content, decision)
+        else:
+            pending.append(i)
 
-    for i, claim_text in enumerate(claims):
+    verdicts = {}
+    if len(pending) > 1:
+        references, stats = pack_context(merge_hits([hit_lists[i] for i in pending]), BATCH_CONTEXT_TOKEN_BUDGET)
+        if context_stats is not None:
+            context_stats.add(stats)
         try:
-            lines = claim_text.split("\n", 1)
-            title = lines[0].strip()
-            content = lines[1].strip() if len(lines) > 1 else title
-            
-            print(f"\n   [{i+1}/{len(claims)}] Prüfe: '{title}'...", end=" ", flush=True)
+            response = prompt_usage.call(
+                "Urteil (gruppiert)", limiter.call,
+                chat_client.chat.completions.create,
+                model=CHAT_DEPLOYMENT,
+                messages=[
+                    {"role": "system", "content": BATCH_AUDIT_PROMPT},
+                    {"role": "user", "content": build_batch_prompt([claims[i][1] for i in pending], "\n\n".join(references))}
+                ],
+                response_format=RESPONSE_FORMAT,
+                timeout=90
+            )
+            verdicts = parse_verdicts(response.choices[0].message.content, len(pending))
+        except Exception as e:
+            # z.B. Deployment ohne json_schema response_format -> alle Claims der Gruppe einzeln prüfen
+            print(f"   ⚠️ Gruppierter Urteils-Request fehlgeschlagen ({e}), prüfe {len(pending)} Claims einzeln.")
 
-            # A. Vector Search
+    for pos, i in enumerate(pending):
+        title, content = claims[i]
+        decision = verdicts.get(pos)
+        if decision is None:
+            # Einzel-Claim oder Urteil fehlt in der Antwort -> Einzelprüfung
             try:
-                query_vec = get_embedding(emb_client, content)
+                entries[i] = audit_single_claim(title, content, None, retriever, chat_client, limiter,
+                                                context_stats=context_stats, audit_state=audit_state, results=hit_lists[i])
             except Exception as e:
-                print(f"❌ Emb Error: {e}")
-                audit_results.append(f"## {title}\n**Status:** ⚪ ÜBERSPRUNGEN (Embedding Fehler)")
-                continue
+                # Fehler pro Claim (audit_claims macht daraus "💥 ERROR"), gültige Gruppen-Urteile bleiben
+                entries[i] = e
+            continue
+        if audit_state is not None:
+            audit_state.put_verdict(content, hit_lists[i], decision)
+        entries[i] = claim_entry(title, content, decision)
 
-            vector_query = VectorizedQuery(vector=query_vec, k_nearest_neighbors=3, fields="contentVector")
-            results = search_client.search(
-                search_text=content,
-                vector_queries=[vector_query],
-                select=["title", "content", "source_type", "chapter"],
-                top=3
-            )
+    return [entries[i] for i in group]
 
-            references = []
-            for res in results:
-                # Wir bereiten den Kontext vor, damit das LLM ihn zitieren kann
-                references.append(f"QUELLE: {res['source_type']} | {res['title']}\nTEXTAUSZUG: {res['content']}")
+def submit_claim_groups(executor, claims, vectors, retriever, chat_client, limiter, cache, context_stats, audit_state, max_group, xref_graph=None):
+    """
+    Batched Verdicts: erst alle Claims suchen, dann nach gemeinsamen Chunks gruppieren.
+    Rückgabe: {Future: Claim-Indizes}; jedes Future liefert die Einträge in Index-Reihenfolge.
+    """
+    def search(i):
+        # Fehler pro Claim festhalten: eine fehlgeschlagene Suche darf nicht die ganze SOP abbrechen
+        try:
+            return retrieve_references(claims[i][1], vectors[i], retriever, cache, xref_graph=xref_graph)
+        except Exception as e:
+            return e
 
-            if not references:
-                print("⚠️ Kein Kontext", end="")
-                audit_results.append(f"## {title}\n**Status:** ⚪ ÜBERSPRUNGEN (Keine Regulatorik gefunden)")
-                continue
+    searchable = [i for i, vec in enumerate(vectors) if vec is not None]
+    hit_lists, futures = {}, {}
+    for i, hits in zip(searchable, executor.map(search, searchable)):
+        if isinstance(hits, Exception):
+            # Gleicher Fehler-Eintrag wie im Einzelpfad (audit_claims macht daraus "💥 ERROR")
+            futures[executor.submit(lambda e=hits: [e])] = [i]
+        else:
+            hit_lists[i] = hits
 
-            context_str = "\n\n".join(references)
+    for i, vec in enumerate(vectors):
+        # Ohne Embedding/Treffer gibt es nichts zu gruppieren -> Einzelpfad liefert den Skip-Eintrag
+        if vec is None or (i in hit_lists and not hit_lists[i]):
+            future = executor.submit(audit_single_claim, *claims[i], vec, retriever, chat_client, limiter,
+                                     cache, context_stats, audit_state, hit_lists.get(i))
+            futures[future] = [i]
 
-            # B. Comparator (LLM) - PROMPT UPDATE: Deutsch, Zitate, Strenge
-            audit_prompt = f"""
-            Du bist ein strenger MDR/IVDR Auditor für Medizintechnik.
-            
-            SOP AUSSAGE DES HERSTELLERS:
-            "{content}"
-            
-            REGULATORISCHE FAKTEN (Aus der Datenbank):
-            {context_str}
-            
-            AUFGABE:
-            Prüfe die SOP-Aussage auf Konformität mit den Fakten.
-            
-            FORMAT VORGABE (Strikt einhalten):
-            **Status:** [✅ KONFORM | ⚠️ WARNUNG | ❌ KRITISCH]
-            **Begründung:** [Deine Analyse auf Deutsch. Warum ist es konform oder nicht?]
-            **Zitat / Referenz:** [Nenne Artikel/Guideline UND kopiere den relevanten Satz wörtlich aus den "REGULATORISCHE FAKTEN". Wenn der Text dort steht, zitiere ihn!]
-            """
+    with_hits = [i for i in searchable if hit_lists.get(i)]
+    groups = group_by_context([hit_lists[i] for i in with_hits], max_group)
+    print(f"   {len(with_hits)} Claims in {len(groups)} Urteils-Requests (max. {max_group} pro Request)")
+    for group in groups:
+        indices = [with_hits[g] for g in group]
+        future = executor.submit(audit_claim_group, indices, claims, hit_lists, retriever, chat_client,
+                                 limiter, context_stats, audit_state)
+        futures[future] = indices
+    return futures
 
-            response = chat_client.chat.completions.create(
-                model=CHAT_DEPLOYMENT,
-                messages=[{"role": "user", "content": audit_prompt}],
-                timeout=45
-            )
-            
-            decision = response.choices[0].message.content
-            
-            # OUTPUT FORMAT UPDATE: Kein Slicing mehr beim Content!
-            entry = f"## Claim: {title}\n\n**SOP Text:**\n> {content}\n\n{decision}\n"
-            
-            audit_results.append(entry)
-            print("✅ Fertig", end="")
+def audit_claims(claims_md, retriever, emb_client, chat_client, partial_report_path=None, max_workers=AUDIT_MAX_WORKERS, limiter=None, cache=None, embedding_cache=None, audit_state=None, verdict_batch_size=VERDICT_BATCH_SIZE, xref_graph=None):
+    """
+    Prüft alle Claims parallel (begrenzter Worker Pool, adaptives Rate Limiting statt fixer Sleeps).
+    Der Report bleibt in Claim-Reihenfolge; der Partial Report wird fortlaufend geschrieben,
+    sobald alle vorherigen Claims fertig sind. Mit audit_state (Re-Audit) werden nur geänderte
+    Claims neu beurteilt; der Stand wird am Ende gespeichert. verdict_batch_size > 1 beurteilt
+    Claims mit überlappender Regulatorik gemeinsam in einem Request.
+    """
+    print(f"⚖️ Schritt 3: Prüfe Claims gegen den Index ({RETRIEVAL_BACKEND})...")
+    
+    claims = parse_claims(claims_md)
+    limiter = limiter or AdaptiveRateLimiter(rate=AUDIT_REQUESTS_PER_SECOND)
+    context_stats = ContextStats()
 
-            with open(partial_report_path, "a", encoding="utf-8") as f:
-                f.write(entry + "\n---\n")
+    print(f"   {len(claims)} Claims gefunden. ({max_workers} Worker)")
+
+    # Alle Claim-Texte sind bekannt -> vorab gebündelt vektorisieren
+    vectors = embed_claims(emb_client, [content for _, content in claims], limiter, embedding_cache=embedding_cache)
+    
+    partial_report_path = partial_report_path or SOP_PATH.replace(".docx", "_PARTIAL_REPORT.md")
+    with open(partial_report_path, "w", encoding="utf-8") as f:
+        f.write("# PARTIAL AUDIT LOG\n\n")
 
-            time.sleep(2)
+    audit_results = [None] * len(claims)
+    next_to_write = 0
+    done = 0
 
-        except Exception as e:
-            print(f"\n   ❌ CRITICAL ERROR on Claim {i+1}: {e}")
-            audit_results.append(f"## {title}\n**Status:** 💥 ERROR ({str(e)})")
-            time.sleep(5) 
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        if verdict_batch_size > 1:
+            futures = submit_claim_groups(executor, claims, vectors, retriever, chat_client, limiter,
+                                          cache, context_stats, audit_state, verdict_batch_size, xref_graph)
+        else:
+            futures = {
+                executor.submit(lambda *args: [audit_single_claim(*args)], title, content, vectors[i], retriever,
+                                chat_client, limiter, cache, context_stats, audit_state, None, xref_graph): [i]
+                for i, (title, content) in enumerate(claims)
+            }
+
+        for future in as_completed(futures):
+            indices = futures[future]
+            try:
+                entries = future.result()
+            except Exception as e:
+                entries = [e] * len(indices)
+            for i, entry in zip(indices, entries):
+                done += 1
+                title = claims[i][0]
+                if isinstance(entry, Exception):
+                    print(f"   [{done}/{len(claims)}] ❌ CRITICAL ERROR on Claim {i+1}: {entry}")
+                    audit_results[i] = f"## {title}\n**Status:** 💥 ERROR ({str(entry)})"
+                else:
+                    audit_results[i] = entry
+                    print(f"   [{done}/{len(claims)}] ✅ Fertig: '{title}'")
+
+            # Partial Report in Reihenfolge fortschreiben
+            with open(partial_report_path, "a", encoding="utf-8") as f:
+                while next_to_write < len(claims) and audit_results[next_to_write] is not None:
+                    f.write(audit_results[next_to_write] + "\n---\n")
+                    next_to_write += 1
+
+    print(f"   ℹ️ {context_stats.summary()}")
+    print(f"   ℹ️ {prompt_usage.summary()}")
+    if audit_state is not None:
+        audit_state.save()
+        print(f"   ℹ️ {audit_state.summary()}")
+    if cache is not None:
+        print(f"   ℹ️ {cache.summary()}")
+    if limiter.throttle_count:
+        print(f"   ℹ️ {limiter.throttle_count}x gedrosselt (429), finale Rate: {limiter.rate:.2f} req/s")
+    if governor_summary():
+        print(f"   ℹ️ {governor_summary()}")
 
     return "\n---\n".join(audit_results)
 
 # --- ORCHESTRATOR ---
 def main():
-    chat_client = AzureOpenAI(azure_endpoint=CHAT_ENDPOINT, api_key=CHAT_KEY, api_version=CHAT_VERSION)
-    emb_client = AzureOpenAI(azure_endpoint=EMBEDDING_ENDPOINT, api_key=EMBEDDING_KEY, api_version="2024-02-01")
-    search_client = SearchClient(SEARCH_ENDPOINT, INDEX_NAME, AzureKeyCredential(SEARCH_KEY))
+    parser = argparse.ArgumentParser(description="SOP Audit gegen MDR/MDCG")
+    parser.add_argument("sop", nargs="?", default=SOP_PATH, help="SOP (.docx)")
+    parser.add_argument("--full", action="store_true", help="Alles neu prüfen (gespeicherte Claim-Urteile ignorieren)")
+    args = parser.parse_args()
+    sop_path = args.sop
+
+    chat_client, emb_client = create_openai_clients()
+    retriever = create_retriever()
 
-    if not os.path.exists(SOP_PATH):
-        print(f"❌ SOP File not found: {SOP_PATH}")
+    if not os.path.exists(sop_path):
+        print(f"❌ SOP File not found: {sop_path}")
         return
+
+    # Re-Audit: Stand des letzten Audits dieser SOP (Abschnitte, Claims, Urteile)
+    audit_state = AuditState(sop_path.replace(".docx", "_AUDIT_STATE.json"), model=CHAT_DEPLOYMENT)
+    if args.full:
+        audit_state.sections, audit_state.claims = {}, {}
         
-    raw_md = docx_to_raw_markdown(SOP_PATH)
+    raw_md = docx_to_raw_markdown(sop_path)
     
-    claims_md = refine_to_claims(chat_client, raw_md)
+    claims_md = refine_to_claims(chat_client, raw_md, audit_state=audit_state)
     
     # Debug Save
-    claims_path = SOP_PATH.replace(".docx", "_CLAIMS.md")
+    claims_path = sop_path.replace(".docx", "_CLAIMS.md")
     with open(claims_path, "w", encoding="utf-8") as f:
         f.write(claims_md)
     print(f"✅ Claims extrahiert nach: {claims_path}")
 
-    final_report = audit_claims(claims_md, search_client, emb_client, chat_client)
+    cache = RetrievalCache(retrieval_cache_scope(retriever))
+    embedding_cache = EmbeddingCache(f"{EMBEDDING_DEPLOYMENT}:{EMBEDDING_DIMENSIONS}")
+    final_report = audit_claims(claims_md, retriever, emb_client, chat_client,
+                                partial_report_path=sop_path.replace(".docx", "_PARTIAL_REPORT.md"),
+                                cache=cache, embedding_cache=embedding_cache, audit_state=audit_state,
+                                xref_graph=XrefGraph.load())
     
-    report_path = SOP_PATH.replace(".docx", "_AUDIT_REPORT.md")
+    report_path = sop_path.replace(".docx", "_AUDIT_REPORT.md")
     with open(report_path, "w", encoding="utf-8") as f:
-        f.write(f"# Audit Report: {os.path.basename(SOP_PATH)}\n\n{final_report}")
+        f.write(f"# Audit Report: {os.path.basename(sop_path)}\n\n{final_report}")
     
     print(f"\n🎉 DONE. Finaler Report: {report_path}")
 
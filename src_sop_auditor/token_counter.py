@@ -0,0 +1,15 @@
+import tiktoken
+
+_ENCODING = None
+
+def count_tokens(text):
+    """Token-Schätzung (cl100k_base wie text-embedding-3 / GPT-4 Familie)."""
+    global _ENCODING
+    if _ENCODING is None:
+        try:
+            _ENCODING = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _ENCODING = False  # Offline ohne BPE-Datei -> grobe Schätzung
+    if not _ENCODING:
+        return len(text) // 3 + 1
+    return len(_ENCODING.encode(text))
@@ -0,0 +1,114 @@
+import os
+import json
+
+# Max. Claims pro Urteils-Request (1 = ein Request pro Claim wie bisher)
+VERDICT_BATCH_SIZE = int(os.getenv("AUDIT_VERDICT_BATCH_SIZE", "1"))
+# Token-Budget für den gemeinsamen Regulatorik-Kontext einer Claim-Gruppe
+BATCH_CONTEXT_TOKEN_BUDGET = int(os.getenv("AUDIT_BATCH_CONTEXT_TOKENS", "3000"))
+
+STATUS_LABELS = {"KONFORM": "✅ KONFORM", "WARNUNG": "⚠️ WARNUNG", "KRITISCH": "❌ KRITISCH"}
+
+# Structured Output: ein Urteil pro Claim, über claim_id zurück zugeordnet
+VERDICT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "verdicts": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "claim_id": {"type": "integer"},
+                    "status": {"type": "string", "enum": list(STATUS_LABELS)},
+                    "begruendung": {"type": "string"},
+                    "zitat": {"type": "string"},
+                },
+                "required": ["claim_id", "status", "begruendung", "zitat"],
+                "additionalProperties": False,
+            },
+        }
+    },
+    "required": ["verdicts"],
+    "additionalProperties": False,
+}
+
+RESPONSE_FORMAT = {"type": "json_schema", "json_schema": {"name": "audit_verdicts", "strict": True, "schema": VERDICT_SCHEMA}}
+
+# Statischer System-Prompt (identisch für alle Gruppen -> Prompt-Cache), Claims + Fakten im User-Teil
+BATCH_AUDIT_PROMPT = """
+Du bist ein strenger MDR/IVDR Auditor für Medizintechnik.
+
+Du bekommst mehrere SOP AUSSAGEN DES HERSTELLERS (jeweils mit claim_id) und die REGULATORISCHEN FAKTEN
+(Aus der Datenbank), die für diese Aussagen gefunden wurden.
+
+AUFGABE:
+Prüfe JEDE SOP-Aussage einzeln und unabhängig von den anderen auf Konformität mit den Fakten.
+Liefere für jede claim_id genau ein Urteil:
+- status: KONFORM, WARNUNG oder KRITISCH
+- begruendung: Deine Analyse auf Deutsch. Warum ist es konform oder nicht?
+- zitat: Nenne Artikel/Guideline UND kopiere den relevanten Satz wörtlich aus den "REGULATORISCHE FAKTEN". Wenn der Text dort steht, zitiere ihn!
+"""
+
+def _hit_key(hit):
+    return hit.get("id") or hit.get("title")
+
+def group_by_context(hit_lists, max_group=VERDICT_BATCH_SIZE) -> list:
+    """
+    Gruppiert Claims mit überlappenden Treffern (gleiche Chunk-IDs), max. max_group pro Gruppe.
+    Greedy in Claim-Reihenfolge: ein Claim kommt in die offene Gruppe mit der größten Überlappung.
+    Rückgabe: Listen von Claim-Indizes.
+    """
+    groups, group_keys = [], []
+    for i, hits in enumerate(hit_lists):
+        keys = {_hit_key(h) for h in hits}
+        best, best_overlap = None, 0
+        for g, existing in enumerate(group_keys):
+            overlap = len(keys & existing)
+            if len(groups[g]) < max_group and overlap > best_overlap:
+                best, best_overlap = g, overlap
+        if best is None:
+            groups.append([i])
+            group_keys.append(set(keys))
+        else:
+            groups[best].append(i)
+            group_keys[best] |= keys
+    return groups
+
+def merge_hits(hit_lists) -> list:
+    """Vereinigung der Treffer einer Gruppe, nach Rang verschränkt (die besten Treffer aller Claims zuerst)."""
+    merged, seen = [], set()
+    for rank in range(max((len(h) for h in hit_lists), default=0)):
+        for hits in hit_lists:
+            if rank < len(hits) and _hit_key(hits[rank]) not in seen:
+                seen.add(_hit_key(hits[rank]))
+                merged.append(hits[rank])
+    return merged
+
+def build_batch_prompt(contents, context_str) -> str:
+    """Variabler User-Teil zum statischen BATCH_AUDIT_PROMPT: erst der gemeinsame Kontext, die Claims zuletzt."""
+    claims = "\n".join(f'[claim_id {n}] "{content}"' for n, content in enumerate(contents, start=1))
+    return f"REGULATORISCHE FAKTEN (Aus der Datenbank):\n{context_str}\n\nSOP AUSSAGEN DES HERSTELLERS:\n{claims}"
+
+def format_decision(verdict) -> str:
+    """Urteil im selben Markdown-Format wie der Einzel-Prompt."""
+    status = STATUS_LABELS.get(str(verdict.get("status", "")).upper(), verdict.get("status"))
+    return (f"**Status:** {status}\n"
+            f"**Begründung:** {verdict.get('begruendung', '')}\n"
+            f"**Zitat / Referenz:** {verdict.get('zitat', '')}")
+
+def parse_verdicts(text, n_claims) -> dict:
+    """JSON Antwort -> {Position in der Gruppe: Urteil (Markdown)}. Fehlende/ungültige Urteile fehlen im Dict."""
+    try:
+        verdicts = json.loads(text).get("verdicts", [])
+    except (TypeError, ValueError, AttributeError):
+        return {}
+    decisions = {}
+    for verdict in verdicts:
+        if not isinstance(verdict, dict) or verdict.get("status") not in STATUS_LABELS:
+            continue
+        try:
+            pos = int(verdict.get("claim_id")) - 1
+        except (TypeError, ValueError):
+            continue
+        if 0 <= pos < n_claims and pos not in decisions:
+            decisions[pos] = format_decision(verdict)
+    return decisions
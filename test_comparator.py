@@ -4,7 +4,7 @@ from dotenv import load_dotenv
 from openai import AzureOpenAI
 from azure.core.credentials import AzureKeyCredential
 from azure.search.documents import SearchClient
-from azure.search.documents.models import VectorizedQuery
+from src.retrieval_backend import RETRIEVAL_BACKEND, create_retrieval_backend
 
 # Lade Umgebungsvariablen
 load_dotenv()
@@ -20,6 +20,7 @@ EMBEDDING_ENDPOINT = os.getenv("AZURE_OPENAI_EMBEDDING_ENDPOINT")
 EMBEDDING_KEY = os.getenv("AZURE_OPENAI_EMBEDDING_KEY")
 EMBEDDING_DEPLOYMENT = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT") # text-embedding-3-large
 EMBEDDING_API_VERSION = os.getenv("AZURE_OPENAI_EMBEDDING_API_VERSION")
+EMBEDDING_DIMENSIONS = int(os.getenv("AZURE_OPENAI_EMBEDDING_DIMENSIONS", "3072"))
 
 # Chat / Logic (Resource 2)
 CHAT_ENDPOINT = os.getenv("AZURE_OPENAI_CHAT_ENDPOINT")
@@ -40,7 +41,7 @@ def main():
     print(f"📄 SOP Claim: '{SOP_CHUNK_TEXT.strip()}'\n")
 
     # 1. CLIENTS INIT
-    if not SEARCH_KEY or not EMBEDDING_KEY or not CHAT_KEY:
+    if not EMBEDDING_KEY or not CHAT_KEY or (RETRIEVAL_BACKEND == "azure" and not SEARCH_KEY):
         print("❌ Error: API Keys fehlen in .env")
         return
 
@@ -50,11 +51,15 @@ def main():
         api_version=EMBEDDING_API_VERSION
     )
 
-    search_client = SearchClient(
-        endpoint=SEARCH_ENDPOINT,
-        index_name=INDEX_NAME,
-        credential=AzureKeyCredential(SEARCH_KEY)
-    )
+    search_client = None
+    if RETRIEVAL_BACKEND == "azure":
+        search_client = SearchClient(
+            endpoint=SEARCH_ENDPOINT,
+            index_name=INDEX_NAME,
+            credential=AzureKeyCredential(SEARCH_KEY)
+        )
+    # RETRIEVAL_BACKEND=local -> Suche im lokalen Vector Store, ohne Netzwerk
+    retriever = create_retrieval_backend(RETRIEVAL_BACKEND, search_client)
 
     chat_client = AzureOpenAI(
         azure_endpoint=CHAT_ENDPOINT,
@@ -67,7 +72,8 @@ def main():
     try:
         emb_resp = emb_client.embeddings.create(
             input=SOP_CHUNK_TEXT,
-            model=EMBEDDING_DEPLOYMENT
+            model=EMBEDDING_DEPLOYMENT,
+            dimensions=EMBEDDING_DIMENSIONS
         )
         query_vector = emb_resp.data[0].embedding
         print(f"   ✅ Vektor generiert ({len(query_vector)} Dimensionen).")
@@ -75,20 +81,14 @@ def main():
         print(f"   ❌ Embedding Fehler: {e}")
         return
 
-    # 3. AZURE AI SEARCH (Vector Search)
-    print("2️⃣ Suche im 'mdr-legal-index-v1' nach Regulationen...")
-    
-    vector_query = VectorizedQuery(
-        vector=query_vector, 
-        k_nearest_neighbors=3, 
-        fields="contentVector"
-    )
+    # 3. RETRIEVAL (Azure Hybrid Search oder lokale Vektorsuche)
+    print(f"2️⃣ Suche nach Regulationen (Backend: {RETRIEVAL_BACKEND})...")
 
-    results = search_client.search(
-        search_text=SOP_CHUNK_TEXT, # Hybrid Search (Keyword + Vector)
-        vector_queries=[vector_query],
-        select=["title", "content", "source_type", "chapter", "id"],
-        top=3
+    results = retriever.search(
+        SOP_CHUNK_TEXT, # Hybrid Search (Keyword + Vector)
+        query_vector,
+        top=3,
+        select=["title", "content", "source_type", "chapter", "id"]
     )
 
     retrieved_context = []
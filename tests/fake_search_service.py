@@ -0,0 +1,117 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+class FakeSearchService:
+    """
+    Lokaler Stand-in für die Azure AI Search REST API (nur die Endpunkte, die wir nutzen).
+    Hält Indexe, Dokumente und Aliase im Speicher.
+    """
+
+    def __init__(self, api_key: str = "test-key"):
+        self.api_key = api_key
+        self.indexes = {}   # name -> {"schema": ..., "docs": {id: doc}}
+        self.aliases = {}   # name -> [index names]
+        self.requests = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(service):
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=None, content_type="application/json"):
+                data = b"" if body is None else (body if isinstance(body, bytes) else json.dumps(body).encode("utf-8"))
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length", 0))
+                return json.loads(self.rfile.read(length)) if length else None
+
+            def _route(self, method):
+                path = urlparse(self.path).path
+                service.requests.append((method, path))
+                if self.headers.get("api-key") != service.api_key:
+                    return self._send(403, {"error": {"message": "Forbidden"}})
+
+                parts = [p for p in path.split("/") if p]
+                handler = getattr(self, f"_{method.lower()}_{parts[0]}", None) if parts else None
+                if not handler:
+                    return self._send(404, {"error": {"message": f"No route {method} {path}"}})
+                return handler(parts[1:])
+
+            def do_GET(self): self._route("GET")
+            def do_PUT(self): self._route("PUT")
+            def do_POST(self): self._route("POST")
+            def do_DELETE(self): self._route("DELETE")
+
+            # --- /indexes ---
+            def _put_indexes(self, parts):
+                schema = self._body()
+                created = parts[0] not in service.indexes
+                service.indexes[parts[0]] = {"schema": schema, "docs": {}}
+                self._send(201 if created else 200, schema)
+
+            def _get_indexes(self, parts):
+                index = service.indexes.get(parts[0])
+                if not index:
+                    return self._send(404, {"error": {"message": "Index not found"}})
+                if parts[1:] == ["docs", "$count"]:
+                    return self._send(200, str(len(index["docs"])).encode("utf-8"), "text/plain")
+                self._send(200, index["schema"])
+
+            def _delete_indexes(self, parts):
+                if service.indexes.pop(parts[0], None) is None:
+                    return self._send(404, {"error": {"message": "Index not found"}})
+                self._send(204)
+
+            def _post_indexes(self, parts):
+                index = service.indexes.get(parts[0])
+                if not index or parts[1:] != ["docs", "index"]:
+                    return self._send(404, {"error": {"message": "Index not found"}})
+
+                vector_field = next(f for f in index["schema"]["fields"] if f["name"] == "contentVector")
+                results = []
+                for action in self._body()["value"]:
+                    doc = {k: v for k, v in action.items() if not k.startswith("@search.")}
+                    if len(doc.get("contentVector") or []) != vector_field["dimensions"]:
+                        results.append({"key": doc.get("id"), "status": False, "errorMessage": "Vector dimensions mismatch", "statusCode": 400})
+                        continue
+                    index["docs"][doc["id"]] = doc
+                    results.append({"key": doc["id"], "status": True, "errorMessage": None, "statusCode": 200})
+                self._send(207 if any(not r["status"] for r in results) else 200, {"value": results})
+
+            # --- /aliases ---
+            def _put_aliases(self, parts):
+                body = self._body()
+                missing = [i for i in body["indexes"] if i not in service.indexes]
+                if missing:
+                    return self._send(400, {"error": {"message": f"Unknown index {missing}"}})
+                service.aliases[parts[0]] = body["indexes"]
+                self._send(200, body)
+
+            def _get_aliases(self, parts):
+                if parts[0] not in service.aliases:
+                    return self._send(404, {"error": {"message": "Alias not found"}})
+                self._send(200, {"name": parts[0], "indexes": service.aliases[parts[0]]})
+
+        return Handler
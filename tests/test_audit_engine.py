@@ -0,0 +1,182 @@
+import os
+import json
+import sys
+import time
+import random
+import threading
+import subprocess
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src_sop_auditor')))
+
+import sop_audit_pipeline as pipeline
+from rate_limiter import AdaptiveRateLimiter
+
+CLAIMS_MD = "\n".join(f"### Claim: Claim {i}\nSOP Text {i}" for i in range(12))
+
+class ThrottleError(Exception):
+    status_code = 429
+    response = SimpleNamespace(headers={"retry-after": "0"})
+
+def make_clients(throttle_first=0, fail_on=None):
+    state = {"throttles": throttle_first, "active": 0, "max_active": 0, "embedding_requests": 0}
+    lock = threading.Lock()
+
+    def embed(input, model, dimensions, timeout):
+        texts = input if isinstance(input, list) else [input]
+        state["embedding_requests"] += 1
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[float(len(t)), 0.2]) for i, t in enumerate(texts)])
+
+    def chat(model, messages, timeout):
+        with lock:
+            if state["throttles"]:
+                state["throttles"] -= 1
+                raise ThrottleError("429")
+            state["active"] += 1
+            state["max_active"] = max(state["max_active"], state["active"])
+        time.sleep(random.uniform(0, 0.02))  # Claims werden in zufälliger Reihenfolge fertig
+        with lock:
+            state["active"] -= 1
+        prompt = messages[-1]["content"]
+        if fail_on and fail_on in prompt:
+            raise RuntimeError("Boom")
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="**Status:** ✅ KONFORM"))])
+
+    emb_client, chat_client, search_client = MagicMock(), MagicMock(), MagicMock()
+    emb_client.embeddings.create.side_effect = embed
+    chat_client.chat.completions.create.side_effect = chat
+    search_client.search.return_value = [{"source_type": "MDR", "title": "Artikel 83", "content": "PMS", "chapter": "VII"}]
+    return search_client, emb_client, chat_client, state
+
+def fast_limiter():
+    return AdaptiveRateLimiter(rate=1000, max_rate=1000)
+
+def test_audit_claims_keeps_claim_order_and_writes_partial_report(tmp_path):
+    search_client, emb_client, chat_client, state = make_clients(fail_on="SOP Text 5")
+    partial = tmp_path / "partial.md"
+
+    report = pipeline.audit_claims(CLAIMS_MD, search_client, emb_client, chat_client,
+                                   partial_report_path=str(partial), max_workers=4, limiter=fast_limiter())
+
+    entries = report.split("\n---\n")
+    assert len(entries) == 12
+    assert [e.split("\n")[0].split(": ", 1)[-1].replace("## ", "") for e in entries] == [f"Claim {i}" for i in range(12)]
+    assert "💥 ERROR" in entries[5]
+    assert 1 < state["max_active"] <= 4
+    assert state["embedding_requests"] == 1
+
+    written = partial.read_text(encoding="utf-8")
+    assert written.startswith("# PARTIAL AUDIT LOG")
+    positions = [written.index(f"Claim {i}\n") for i in range(12)]
+    assert positions == sorted(positions)
+
+def test_rate_limiter_backs_off_on_429_and_retries():
+    search_client, _, chat_client, _ = make_clients(throttle_first=2)
+    limiter = fast_limiter()
+
+    entry = pipeline.audit_single_claim("Claim", "SOP Text", [0.1, 0.2], search_client, chat_client, limiter)
+
+    assert "KONFORM" in entry
+    assert limiter.throttle_count == 2
+    assert limiter.rate < 1000
+
+def test_rate_limiter_spaces_requests():
+    limiter = AdaptiveRateLimiter(rate=50, max_rate=50)
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    assert time.monotonic() - start >= 5 / 50 * 0.9
+
+def test_embed_claims_batches_by_token_budget(monkeypatch):
+    monkeypatch.setattr(pipeline, "count_tokens", len)
+    _, emb_client, _, state = make_clients()
+    texts = ["x" * 300, "y" * 300, "z" * 30, "w" * 600]
+
+    batches = pipeline.batch_by_token_budget(texts, token_budget=650)
+    assert batches == [[0, 1, 2], [3]]
+
+    vectors = pipeline.embed_claims(emb_client, texts, fast_limiter(), token_budget=650)
+    assert [v[0] for v in vectors] == [300.0, 300.0, 30.0, 600.0]
+    assert state["embedding_requests"] == len(batches)
+
+def test_embed_claims_falls_back_to_single_requests():
+    _, emb_client, _, _ = make_clients()
+    original = emb_client.embeddings.create.side_effect
+    def flaky(input, **kwargs):
+        if isinstance(input, list):
+            raise RuntimeError("Batch too large")
+        if input == "bad":
+            raise RuntimeError("Content filter")
+        return original(input, **kwargs)
+    emb_client.embeddings.create.side_effect = flaky
+
+    vectors = pipeline.embed_claims(emb_client, ["gut", "bad"], fast_limiter())
+    assert vectors[0] == [3.0, 0.2]
+    assert vectors[1] is None
+
+class StubSearchClient:
+    """Ersatz für azure.search.documents.SearchClient: merkt sich Konstruktor und Suchanfragen."""
+    instances = []
+
+    def __init__(self, endpoint, index_name, credential):
+        self.endpoint, self.index_name, self.credential = endpoint, index_name, credential
+        self.queries = []
+        StubSearchClient.instances.append(self)
+
+    def search(self, search_text, vector_queries, select, top):
+        self.queries.append((search_text, top))
+        return [{"id": "mdr_art_83_1", "content": "Art. 83", "@search.score": 1.0}]
+
+def test_create_retriever_builds_azure_search_client(monkeypatch):
+    import azure.search.documents
+    StubSearchClient.instances = []
+    monkeypatch.setattr(azure.search.documents, "SearchClient", StubSearchClient)
+    monkeypatch.setattr(pipeline, "resolve_index_version", lambda index, endpoint, key: f"{index}-v2")
+    monkeypatch.setattr(pipeline, "SEARCH_ENDPOINT", "https://search.example")
+    monkeypatch.setattr(pipeline, "INDEX_NAME", "mdr-index")
+    monkeypatch.setattr(pipeline, "SEARCH_KEY", "key")
+
+    # Default-Backend (RETRIEVAL_BACKEND=azure) wie in CLI, Batch Runner und App
+    retriever = pipeline.create_retriever("azure")
+
+    assert len(StubSearchClient.instances) == 1
+    client = StubSearchClient.instances[0]
+    assert (client.endpoint, client.index_name) == ("https://search.example", "mdr-index")
+    assert retriever.version == "mdr-index-v2"
+    hits = retriever.search("Meldefrist", [0.1, 0.2], top=5)
+    assert hits[0]["id"] == "mdr_art_83_1"
+    assert client.queries == [("Meldefrist", 5)]
+
+# Konfiguration aus der .env, die Module beim Import lesen (Modul, Attribut, Variable, Wert in der .env, erwartet)
+ENV_CONFIG = [
+    ("retrieval_cache", "RETRIEVAL_CACHE_PATH", "RETRIEVAL_CACHE_PATH", "cache/audit.sqlite", "cache/audit.sqlite"),
+    ("retrieval_cache", "RETRIEVAL_CACHE_THRESHOLD", "RETRIEVAL_CACHE_THRESHOLD", "0.9", 0.9),
+    ("retrieval_cache", "RETRIEVAL_CACHE_MAX_AGE_DAYS", "RETRIEVAL_CACHE_MAX_AGE_DAYS", "7", 7.0),
+    ("retrieval_cache", "RETRIEVAL_CACHE_MAX_ENTRIES", "RETRIEVAL_CACHE_MAX_ENTRIES", "123", 123),
+    ("context_packer", "CONTEXT_TOKEN_BUDGET", "AUDIT_CONTEXT_TOKENS", "2500", 2500),
+    ("verdict_batcher", "VERDICT_BATCH_SIZE", "AUDIT_VERDICT_BATCH_SIZE", "4", 4),
+    ("verdict_batcher", "BATCH_CONTEXT_TOKEN_BUDGET", "AUDIT_BATCH_CONTEXT_TOKENS", "5000", 5000),
+]
+
+ENV_PROBE = """
+import sys, json, functools, importlib, dotenv
+# load_dotenv der Pipeline auf die Test-.env umbiegen (statt der .env im Repo)
+dotenv.load_dotenv = functools.partial(dotenv.load_dotenv, sys.argv[1])
+sys.path.insert(0, sys.argv[2])
+import sop_audit_pipeline
+print(json.dumps([getattr(importlib.import_module(module), attr) for module, attr in json.loads(sys.argv[3])]))
+"""
+
+def test_pipeline_loads_env_before_module_config(tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text("".join(f'{name}="{value}"\n' for _, _, name, value, _ in ENV_CONFIG))
+    env = {key: value for key, value in os.environ.items() if key not in {name for _, _, name, _, _ in ENV_CONFIG}}
+    folder = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src_sop_auditor'))
+    attrs = json.dumps([(module, attr) for module, attr, _, _, _ in ENV_CONFIG])
+
+    result = subprocess.run([sys.executable, "-c", ENV_PROBE, str(env_file), folder, attrs],
+                            capture_output=True, text=True, env=env, timeout=120)
+
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == [expected for *_, expected in ENV_CONFIG]
@@ -0,0 +1,89 @@
+import os
+import sys
+import re
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src_sop_auditor')))
+
+import sop_audit_pipeline as pipeline
+from audit_state import AuditState, chunk_fingerprint
+from rate_limiter import AdaptiveRateLimiter
+
+HIT = {"id": "mdr_art_83_0", "source_type": "MDR", "title": "Artikel 83", "content": "PMS System."}
+
+def make_clients(hits):
+    calls = {"extract": 0, "verdict": 0}
+
+    def chat(model, messages, timeout):
+        prompt = messages[-1]["content"]
+        if prompt.startswith("RAW SOP CONTENT"):
+            calls["extract"] += 1
+            rules = re.findall(r"^(Regel .+)$", prompt, flags=re.MULTILINE)
+            content = "\n\n".join(f"### Claim: {r[:8]}\n{r}" for r in rules)
+        else:
+            calls["verdict"] += 1
+            content = "**Status:** ✅ KONFORM"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    def embed(input, model, dimensions, timeout):
+        texts = input if isinstance(input, list) else [input]
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[float(len(t)), 1.0]) for i, t in enumerate(texts)])
+
+    chat_client, emb_client, retriever = MagicMock(), MagicMock(), MagicMock()
+    chat_client.chat.completions.create.side_effect = chat
+    emb_client.embeddings.create.side_effect = embed
+    retriever.search.side_effect = lambda *args, **kwargs: hits
+    return chat_client, emb_client, retriever, calls
+
+def audit(raw_md, state_path, tmp_path, hits=(HIT,)):
+    chat_client, emb_client, retriever, calls = make_clients(list(hits))
+    limiter = AdaptiveRateLimiter(rate=1000, max_rate=1000)
+    state = AuditState(state_path, model="gpt-test")
+    claims_md = pipeline.refine_to_claims(chat_client, raw_md, max_workers=2, limiter=limiter,
+                                         max_tokens=120, audit_state=state)
+    report = pipeline.audit_claims(claims_md, retriever, emb_client, chat_client,
+                                   partial_report_path=str(tmp_path / "partial.md"),
+                                   max_workers=2, limiter=limiter, audit_state=state)
+    return report, calls, state
+
+SOP_V1 = "# Geltungsbereich\n\nRegel A: PMS-Bericht jährlich.\n\nRegel B: Vigilanz binnen 15 Tagen.\n\n# Verantwortung\n\nRegel C: QMB prüft."
+SOP_V2 = SOP_V1.replace("15 Tagen", "10 Tagen")
+
+def test_reaudit_only_judges_changed_claims(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "count_tokens", len)
+    state_path = str(tmp_path / "SOP_AUDIT_STATE.json")
+
+    report, calls, _ = audit(SOP_V1, state_path, tmp_path)
+    assert calls["verdict"] == 3
+
+    # Unveränderte SOP: keine Extraktion, kein Urteil
+    report_again, calls, state = audit(SOP_V1, state_path, tmp_path)
+    assert calls == {"extract": 0, "verdict": 0}
+    assert report_again == report
+    assert state.stats["claims_reused"] == 3
+
+    # Eine Regel geändert: nur ihr Abschnitt wird neu extrahiert, nur ihr Claim neu beurteilt
+    report, calls, state = audit(SOP_V2, state_path, tmp_path)
+    assert calls == {"extract": 1, "verdict": 1}
+    assert "10 Tagen" in report and "15 Tagen" not in report
+    assert state.stats == {"sections_reused": 1, "claims_reused": 2, "claims_judged": 1}
+
+def test_changed_regulatory_chunk_forces_new_verdict(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "count_tokens", len)
+    state_path = str(tmp_path / "SOP_AUDIT_STATE.json")
+    audit(SOP_V1, state_path, tmp_path)
+
+    updated = dict(HIT, content="PMS System, aktualisiert.")
+    _, calls, _ = audit(SOP_V1, state_path, tmp_path, hits=(updated,))
+    assert calls == {"extract": 0, "verdict": 3}
+
+def test_state_of_other_model_is_discarded(tmp_path):
+    state_path = str(tmp_path / "state.json")
+    state = AuditState(state_path, model="gpt-a")
+    state.put_verdict("Regel A", [HIT], "**Status:** ✅ KONFORM")
+    state.save()
+
+    assert AuditState(state_path, model="gpt-a").get_verdict("Regel A", [HIT]) == "**Status:** ✅ KONFORM"
+    assert AuditState(state_path, model="gpt-b").get_verdict("Regel A", [HIT]) is None
+    assert chunk_fingerprint([HIT]) != chunk_fingerprint([dict(HIT, content="neu")])
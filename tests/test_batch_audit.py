@@ -0,0 +1,87 @@
+import os
+import sys
+import re
+import json
+import docx
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src_sop_auditor')))
+
+import batch_audit
+from rate_limiter import AdaptiveRateLimiter
+from retrieval_cache import RetrievalCache, EmbeddingCache
+
+def write_sop(path, rules):
+    doc = docx.Document()
+    doc.add_heading("Geltungsbereich", level=1)
+    for rule in rules:
+        doc.add_paragraph(rule)
+    doc.save(path)
+
+def make_clients(fail_sop=None):
+    calls = {"extract": 0, "verdict": 0, "embed_texts": 0}
+
+    def chat(model, messages, timeout):
+        prompt = messages[-1]["content"]
+        if prompt.startswith("RAW SOP CONTENT"):
+            calls["extract"] += 1
+            if fail_sop and fail_sop in prompt:
+                raise RuntimeError("Abbruch")
+            rules = re.findall(r"^(Regel .+)$", prompt, flags=re.MULTILINE)
+            content = "\n\n".join(f"### Claim: {r[:8]}\n{r}" for r in rules)
+        else:
+            calls["verdict"] += 1
+            content = "**Status:** ❌ KRITISCH" if "Klasse I" in prompt else "**Status:** ✅ KONFORM"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    def embed(input, model, dimensions, timeout):
+        texts = input if isinstance(input, list) else [input]
+        calls["embed_texts"] += len(texts)
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[float(len(t)), 1.0]) for i, t in enumerate(texts)])
+
+    chat_client, emb_client, retriever = MagicMock(), MagicMock(), MagicMock()
+    chat_client.chat.completions.create.side_effect = chat
+    emb_client.embeddings.create.side_effect = embed
+    retriever.search.return_value = [{"id": "mdr_art_83_0", "source_type": "MDR", "title": "Artikel 83", "content": "PMS System."}]
+    return chat_client, emb_client, retriever, calls
+
+def run(source, output, tmp_path, fail_sop=None):
+    chat_client, emb_client, retriever, calls = make_clients(fail_sop)
+    cache_path = str(tmp_path / "cache.sqlite")
+    index = batch_audit.run_batch(source, output, retriever, emb_client, chat_client, max_documents=2, max_workers=2,
+                                  limiter=AdaptiveRateLimiter(rate=1000, max_rate=1000),
+                                  cache=RetrievalCache("v1", path=cache_path),
+                                  embedding_cache=EmbeddingCache("emb:2", path=cache_path))
+    return index, calls
+
+def test_batch_audit_writes_reports_index_and_resumes(tmp_path):
+    sops = tmp_path / "sops"
+    (sops / "pms").mkdir(parents=True)
+    write_sop(str(sops / "pms" / "SOP-01.docx"), ["Regel A: PMS-Bericht jährlich.", "Regel B: Klasse I ohne PMS-Plan."])
+    write_sop(str(sops / "SOP-02.docx"), ["Regel A: PMS-Bericht jährlich.", "Regel C: Vigilanz binnen 15 Tagen."])
+    write_sop(str(sops / "SOP-03.docx"), ["Regel D: Nur für Abbruch-Test."])
+    output = str(tmp_path / "out")
+
+    # Erster Lauf bricht bei SOP-03 ab
+    index, calls = run(str(sops), output, tmp_path, fail_sop="Regel D")
+    state = json.load(open(os.path.join(output, "batch_state.json"), encoding="utf-8"))["documents"]
+    assert state["pms__SOP-01"]["status"] == "done" and state["SOP-02"]["status"] == "done"
+    assert "error" in state["SOP-03"]
+    # 'Regel A' kommt in zwei SOPs vor -> nur einmal embedded
+    assert calls["embed_texts"] == 3
+    assert os.path.exists(os.path.join(output, "pms__SOP-01_AUDIT_REPORT.md"))
+
+    # Wiederaufnahme: nur SOP-03 wird neu verarbeitet
+    index, calls = run(str(sops), output, tmp_path)
+    assert calls["extract"] == 1 and calls["verdict"] == 1
+
+    text = open(index, encoding="utf-8").read()
+    assert "| pms__SOP-01 | done | 1 | 0 | 1 | 0 | [pms__SOP-01_AUDIT_REPORT.md]" in text
+    assert "| **Summe** | | 4 | 0 | 1 | 0 | |" in text
+
+def test_find_sops_accepts_globs_and_skips_lock_files(tmp_path):
+    for name in ["a.docx", "~$a.docx", "b.txt"]:
+        (tmp_path / name).write_bytes(b"")
+    assert [os.path.basename(p) for p in batch_audit.find_sops(str(tmp_path / "*.docx"))] == ["a.docx"]
+    assert [os.path.basename(p) for p in batch_audit.find_sops(str(tmp_path))] == ["a.docx"]
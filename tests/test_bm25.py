@@ -0,0 +1,35 @@
+from src.bm25 import BM25Index, analyze, tokenize, reciprocal_rank_fusion
+
+DOCS = [
+    ("art_83", "Der Hersteller erstellt einen Plan zur Überwachung nach dem Inverkehrbringen."),
+    ("art_84", "Der Überwachungsplan ist Teil der technischen Dokumentation."),
+    ("art_61", "Klinische Bewertung für Produkte der Klasse III."),
+    ("art_86", "Der Sicherheitsbericht wird jährlich aktualisiert."),
+]
+
+def test_german_tokenizer_drops_stopwords_and_folds_inflections():
+    assert tokenize("Die Produkte der Hersteller") == tokenize("Produkten Herstellern")
+    assert "der" not in tokenize("Der Plan")
+    assert tokenize("Maßnahmen") == tokenize("MASSNAHMEN")
+
+def test_compounds_are_split_against_the_corpus_vocabulary():
+    index = BM25Index.build(DOCS)
+    assert analyze("Überwachungsplans", index.vocabulary)[1:] == ["überwachung", "plan"]
+    # Kompositum in der Query findet auch die ausgeschriebene Form
+    assert {doc for doc, _ in index.search("Überwachungsplan")} == {"art_83", "art_84"}
+    assert index.search("Überwachungsplan")[0][0] == "art_84"
+
+def test_bm25_ranking_and_roundtrip(tmp_path):
+    index = BM25Index.build(DOCS)
+    assert index.search("klinische Bewertungen")[0][0] == "art_61"
+    assert index.search("Blockchain") == []
+
+    index.save(str(tmp_path), version="v1")
+    assert BM25Index.load(str(tmp_path), version="v2") is None
+    loaded = BM25Index.load(str(tmp_path), version="v1")
+    assert loaded.search("Sicherheitsbericht") == index.search("Sicherheitsbericht")
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60)
+    assert [doc for doc, _ in fused] == ["b", "a", "d", "c"]
+    assert reciprocal_rank_fusion([["a", "b"]], top=1) == [("a", 1 / 61)]
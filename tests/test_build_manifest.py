@@ -0,0 +1,75 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src_mdcg_pdf_handler')))
+
+from build_manifest import BuildManifest, StageSpec, build_plan, format_plan, select_stale
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+def specs(tmp_path, prompt="v1"):
+    md, refined = str(tmp_path / "md"), str(tmp_path / "refined")
+    return [
+        StageSpec("refine", md, "*.md", lambda p: os.path.join(refined, os.path.basename(p)), {"prompt": prompt}),
+        StageSpec("upload", refined, "*.md", lambda p: None, {"index": "idx"}),
+    ]
+
+def build_all(manifest, stages):
+    """Mini-Pipeline: refine = upper(), upload = nichts; wie die run_* Funktionen."""
+    for spec in stages:
+        files = [os.path.join(spec.input_folder, n) for n in sorted(os.listdir(spec.input_folder))]
+        for path, _ in select_stale(manifest, spec, files):
+            out = spec.output_for(path)
+            if out:
+                with open(path, encoding="utf-8") as f:
+                    write(out, f.read().upper())
+            manifest.record(spec.name, path, out, spec.config)
+    manifest.save()
+
+def planned(plan):
+    return {stage: {os.path.basename(p): reason for p, reason in entries} for stage, entries, _ in plan}
+
+def test_only_changed_inputs_and_config_are_rebuilt(tmp_path):
+    write(str(tmp_path / "md" / "a.md"), "a")
+    write(str(tmp_path / "md" / "b.md"), "b")
+    manifest_path = str(tmp_path / "build_manifest.json")
+    build_all(BuildManifest(manifest_path), specs(tmp_path))
+
+    manifest = BuildManifest(manifest_path)
+    assert planned(build_plan(manifest, specs(tmp_path))) == {"refine": {}, "upload": {}}
+    assert "Alles aktuell" in format_plan(build_plan(manifest, specs(tmp_path)))
+
+    # Input geändert -> refine für a, upload für a als Upstream
+    write(str(tmp_path / "md" / "a.md"), "a2")
+    assert planned(build_plan(manifest, specs(tmp_path))) == {"refine": {"a.md": "Input geändert"},
+                                                              "upload": {"a.md": "Upstream"}}
+
+    # Prompt geändert -> alles in refine, Output fehlt -> nur dieses Artefakt
+    plan = planned(build_plan(manifest, specs(tmp_path, prompt="v2")))
+    assert plan["refine"] == {"a.md": "Config geändert", "b.md": "Config geändert"}
+    os.remove(str(tmp_path / "refined" / "b.md"))
+    assert planned(build_plan(manifest, specs(tmp_path)))["refine"]["b.md"] == "Output fehlt"
+
+def test_unchanged_upstream_output_stops_propagation(tmp_path):
+    # Re-Build mit identischem Output (z.B. Whitespace im Input, gleiches Ergebnis) -> upload bleibt aktuell
+    write(str(tmp_path / "md" / "a.md"), "a")
+    manifest_path = str(tmp_path / "build_manifest.json")
+    build_all(BuildManifest(manifest_path), specs(tmp_path))
+    write(str(tmp_path / "md" / "a.md"), "A")
+
+    manifest = BuildManifest(manifest_path)
+    stages = specs(tmp_path)
+    refine = select_stale(manifest, stages[0], [str(tmp_path / "md" / "a.md")])
+    assert [reason for _, reason in refine] == ["Input geändert"]
+    build_all(manifest, stages)
+    assert BuildManifest(manifest_path).status("upload", str(tmp_path / "refined" / "a.md"), None, {"index": "idx"}) is None
+
+def test_force_rebuilds_everything(tmp_path):
+    write(str(tmp_path / "md" / "a.md"), "a")
+    manifest = BuildManifest(str(tmp_path / "build_manifest.json"))
+    build_all(manifest, specs(tmp_path))
+    plan = planned(build_plan(manifest, specs(tmp_path), force=True))
+    assert plan == {"refine": {"a.md": "erzwungen"}, "upload": {"a.md": "erzwungen"}}
@@ -0,0 +1,66 @@
+import os
+import sys
+import re
+import docx
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src_sop_auditor')))
+
+import sop_audit_pipeline as pipeline
+from rate_limiter import AdaptiveRateLimiter
+
+def make_sop(path, chapters=6, paragraphs=4):
+    doc = docx.Document()
+    doc.add_heading("SOP Post-Market Surveillance", level=0)
+    for c in range(chapters):
+        doc.add_heading(f"Kapitel {c}", level=1)
+        doc.add_heading(f"Unterkapitel {c}.1", level=2)
+        for p in range(paragraphs):
+            doc.add_paragraph(f"Regel {c}.{p}: Der PMS-Bericht wird jährlich erstellt und geprüft.")
+    table = doc.add_table(rows=2, cols=2)
+    table.cell(0, 0).text, table.cell(0, 1).text = "Version", "Datum"
+    doc.save(path)
+
+def test_headings_become_markdown_and_sections_cover_everything(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "count_tokens", len)
+    path = str(tmp_path / "sop.docx")
+    make_sop(path)
+
+    raw_md = pipeline.docx_to_raw_markdown(path)
+    assert raw_md.startswith("# SOP Post-Market Surveillance")
+    assert "\n\n## Unterkapitel 3.1\n\n" in raw_md
+
+    sections = pipeline.split_sections(raw_md, max_tokens=400)
+    assert len(sections) > 1
+    assert all(len(s) <= 400 for s in sections)
+    assert "[Abschnitt: Kapitel 2 > Unterkapitel 2.1]\n\n# Kapitel 2\n\n## Unterkapitel 2.1" in "".join(sections)
+
+    # Jeder Absatz landet genau einmal in einem Abschnitt
+    joined = "\n\n".join(sections)
+    for block in raw_md.split("\n\n"):
+        if block.strip():
+            assert joined.count(block) == 1, block
+
+def test_refine_to_claims_maps_sections_concurrently_and_dedupes(monkeypatch):
+    monkeypatch.setattr(pipeline, "count_tokens", len)
+    raw_md = "\n\n".join(f"# Kapitel {c}\n\nRegel {c}" for c in range(8))
+
+    def chat(model, messages, timeout):
+        section = messages[-1]["content"]
+        numbers = re.findall(r"Regel (\d+)", section)
+        if "Regel 7" in section:
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="KEINE"))])
+        claims = [f"### Claim: Regel {n}\nRegel {n} gilt." for n in numbers]
+        claims.append("### Claim: Allgemein\nDie SOP gilt für alle Produkte.")  # Dublette in jedem Abschnitt
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="\n\n".join(claims)))])
+
+    client = MagicMock()
+    client.chat.completions.create.side_effect = chat
+
+    claims_md = pipeline.refine_to_claims(client, raw_md, max_workers=4,
+                                          limiter=AdaptiveRateLimiter(rate=1000, max_rate=1000), max_tokens=60)
+    titles = [title for title, _ in pipeline.parse_claims(claims_md)]
+
+    assert client.chat.completions.create.call_count == 8
+    assert titles == ["Regel 0", "Allgemein"] + [f"Regel {n}" for n in range(1, 7)]
@@ -0,0 +1,55 @@
+import os
+import sys
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src_sop_auditor')))
+
+import context_packer
+from context_packer import pack_context, ContextStats
+
+ARTICLE = " ".join(f"Satz {i}: Der Hersteller aktualisiert den PMS-Plan gemäß Anhang III Abschnitt {i}." for i in range(30))
+
+def mdr_hits(text, base="mdr_art_84"):
+    splitter = RecursiveCharacterTextSplitter(chunk_size=600, chunk_overlap=200, separators=[" ", ""])
+    parts = splitter.split_text(text)
+    return [{"id": f"{base}_{i}", "source_type": "MDR", "title": f"Artikel 84 (Part {i+1}/{len(parts)})",
+             "content": part} for i, part in enumerate(parts)]
+
+def test_adjacent_parts_are_merged_without_splitter_overlap(monkeypatch):
+    monkeypatch.setattr(context_packer, "count_tokens", len)
+    hits = mdr_hits(ARTICLE)[:3]
+
+    references, stats = pack_context(hits, token_budget=10_000)
+
+    assert len(references) == 1
+    assert references[0].startswith("QUELLE: MDR | Artikel 84\n")
+    merged = references[0].split("TEXTAUSZUG: ", 1)[1]
+    assert ARTICLE.startswith(merged)
+    assert stats["packed_tokens"] < stats["naive_tokens"]
+
+def test_non_adjacent_parts_and_repeated_sentences(monkeypatch):
+    monkeypatch.setattr(context_packer, "count_tokens", len)
+    parts = mdr_hits(ARTICLE)
+    shared = "Die Benannte Stelle prüft die technische Dokumentation vollständig."
+    mdcg = {"id": "mdcg_1a2b3c4d", "source_type": "MDCG", "title": "MDCG 2020-7", "content": shared + " Eigener Hinweis."}
+    hits = [parts[0], dict(parts[3], content=shared + " " + parts[3]["content"]), mdcg]
+
+    references, _ = pack_context(hits, token_budget=10_000)
+
+    assert " [...] " in references[0]
+    assert references[1] == "QUELLE: MDCG | MDCG 2020-7\nTEXTAUSZUG: Eigener Hinweis."
+
+def test_budget_keeps_most_relevant_passages(monkeypatch):
+    monkeypatch.setattr(context_packer, "count_tokens", len)
+    hits = [
+        {"id": "mdr_art_10_0", "source_type": "MDR", "title": "Artikel 10", "content": "Erster Satz. " * 20},
+        {"id": "mdr_art_52_0", "source_type": "MDR", "title": "Artikel 52", "content": "Zweiter Satz hier. Noch einer."},
+    ]
+    references, stats = pack_context(hits, token_budget=150)
+
+    assert len(references) == 1 and "Artikel 10" in references[0]
+    assert stats["packed_tokens"] <= 150
+
+    totals = ContextStats()
+    totals.add(stats)
+    assert "gespart" in totals.summary()
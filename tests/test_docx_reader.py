@@ -0,0 +1,68 @@
+import io
+import os
+import sys
+import docx
+from docx.enum.text import WD_BREAK
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src_sop_auditor')))
+
+import sop_audit_pipeline as pipeline
+from docx_reader import read_docx_markdown
+
+def build_sop(path):
+    doc = docx.Document()
+    doc.add_heading("SOP Vigilanz", level=0)
+    doc.add_heading("1 Zweck", level=1)
+    p = doc.add_paragraph("Meldung binnen ")
+    run = p.add_run("15 Tagen")
+    run.add_tab()
+    run.add_text("nach Kenntnis")
+    run.add_break()
+    run.add_text("Zeile 2")
+    run.add_break(WD_BREAK.PAGE)
+    p._p.append(parse_xml(f'<w:hyperlink {nsdecls("w")}><w:r><w:t xml:space="preserve"> siehe MDR Art. 87</w:t></w:r></w:hyperlink>'))
+    # Runs in w:ins ignoriert python-docx -> muss hier genauso sein
+    p._p.append(parse_xml(f'<w:ins {nsdecls("w")} w:id="1" w:author="x"><w:r><w:t>EINGEFÜGT</w:t></w:r></w:ins>'))
+    doc.add_paragraph("   ")
+    doc.add_heading("1.1 Verantwortung", level=2)
+
+    table = doc.add_table(rows=4, cols=4)
+    for r, row in enumerate(table.rows):
+        for c, cell in enumerate(row.cells):
+            cell.text = f"R{r}C{c}"
+    table.cell(0, 0).merge(table.cell(0, 2))              # gridSpan
+    table.cell(1, 3).merge(table.cell(3, 3))              # vMerge über 3 Zeilen
+    table.cell(2, 0).merge(table.cell(3, 1))              # Block: Span + vMerge
+    table.cell(1, 1).paragraphs[0].add_run().add_break()
+    table.cell(1, 1).add_paragraph("zweiter Absatz")
+    table.cell(1, 2).add_table(rows=1, cols=1).cell(0, 0).text = "verschachtelt"
+    doc.add_paragraph("Nach der Tabelle.")
+
+    second = doc.add_table(rows=2, cols=2)
+    second.cell(0, 0).text = "Version"
+    # gridBefore: Zeile beginnt erst in Spalte 2
+    tr = second.rows[1]._tr
+    tr.remove(tr.tc_lst[0])
+    tr.insert(0, parse_xml(f'<w:trPr {nsdecls("w")}><w:gridBefore w:val="1"/></w:trPr>'))
+    tr.tc_lst[0].get_or_add_tcPr()
+    doc.save(path)
+
+def test_streaming_reader_matches_python_docx(tmp_path):
+    path = str(tmp_path / "sop.docx")
+    build_sop(path)
+
+    expected = pipeline.docx_to_raw_markdown_legacy(path)
+    assert "# SOP Vigilanz" in expected and "| R1C0 | R1C1  zweiter Absatz | R1C2 | R1C3 R2C3 R3C3 |" in expected
+    assert read_docx_markdown(path) == expected
+
+def test_reader_accepts_file_objects(tmp_path):
+    path = str(tmp_path / "sop.docx")
+    build_sop(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    assert read_docx_markdown(io.BytesIO(data)) == read_docx_markdown(path)
+    # Streamlit Upload: Bytes direkt, ohne Temp-Datei
+    assert pipeline.docx_to_raw_markdown(data) == read_docx_markdown(path)
+    assert pipeline.docx_to_raw_markdown(memoryview(data), name="upload.docx") == read_docx_markdown(path)
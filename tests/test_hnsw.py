@@ -0,0 +1,48 @@
+import os
+import json
+import importlib.util
+import numpy as np
+from src.hnsw import HNSWIndex
+from src.vector_math import normalize_rows, exact_top_k, recall_at_k
+from src.create_index_definition import build_index_schema, load_hnsw_parameters, HNSW_PROFILE_PATH
+
+rng = np.random.default_rng(7)
+CENTERS = rng.normal(size=(10, 32))
+CORPUS = normalize_rows(CENTERS[rng.integers(0, 10, 500)] + 0.5 * rng.normal(size=(500, 32)))
+QUERIES = normalize_rows(CENTERS[rng.integers(0, 10, 20)] + 0.5 * rng.normal(size=(20, 32)))
+
+def test_hnsw_recall_against_exact_search():
+    index = HNSWIndex(32, m=8, ef_construction=100)
+    index.add_items(CORPUS)
+
+    found = np.asarray([index.search(q, 10, ef_search=100) for q in QUERIES])
+    assert recall_at_k(found, exact_top_k(CORPUS, QUERIES, 10)) >= 0.95
+
+def test_hnsw_respects_link_limits():
+    index = HNSWIndex(32, m=4, ef_construction=50)
+    index.add_items(CORPUS)
+
+    assert max(len(n) for n in index.graph[0].values()) <= 8
+    for layer in index.graph[1:]:
+        assert max(len(n) for n in layer.values()) <= 4
+
+def test_schema_uses_emitted_hnsw_profile(tmp_path, monkeypatch):
+    benchmarks = os.path.join(os.path.dirname(__file__), "..", "benchmarks")
+    monkeypatch.syspath_prepend(benchmarks)
+    spec = importlib.util.spec_from_file_location("tune_hnsw", os.path.join(benchmarks, "tune_hnsw.py"))
+    tune_hnsw = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(tune_hnsw)
+
+    # Getuntes Profil mit Werten abseits des Defaults
+    path = tmp_path / "profile.json"
+    tuned = {"m": 12, "efConstruction": 640, "efSearch": 96, "recall": 0.99, "latency_ms_mean": 1.0, "build_s": 2.0}
+    tune_hnsw.emit_profile(tuned, str(path), k=10, n_corpus=500, n_queries=20)
+    parameters = load_hnsw_parameters(str(path))
+    assert parameters != load_hnsw_parameters(HNSW_PROFILE_PATH)
+
+    algorithm = build_index_schema(hnsw_parameters=parameters)["vectorSearch"]["algorithms"][0]
+    assert algorithm["hnswParameters"] == {"m": 12, "efConstruction": 640, "efSearch": 96, "metric": "cosine"}
+
+    # Ohne Angabe gilt das eingecheckte Profil
+    default = build_index_schema()["vectorSearch"]["algorithms"][0]
+    assert default["hnswParameters"] == load_hnsw_parameters(HNSW_PROFILE_PATH)
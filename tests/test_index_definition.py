@@ -0,0 +1,34 @@
+import pytest
+from src.create_index_definition import build_index_schema, COMPRESSION_NAMES
+
+def get_vector_field(schema):
+    return next(f for f in schema["fields"] if f["name"] == "contentVector")
+
+def test_default_schema_without_compression():
+    schema = build_index_schema(name="test-index", dimensions=3072, compression="none")
+
+    assert schema["name"] == "test-index"
+    assert get_vector_field(schema)["dimensions"] == 3072
+    assert "compressions" not in schema["vectorSearch"]
+    assert "compression" not in schema["vectorSearch"]["profiles"][0]
+
+def test_reduced_dimensions_with_scalar_compression():
+    schema = build_index_schema(name="test-index", dimensions=1024, compression="scalar")
+
+    assert get_vector_field(schema)["dimensions"] == 1024
+    compression = schema["vectorSearch"]["compressions"][0]
+    assert compression["kind"] == "scalarQuantization"
+    assert compression["scalarQuantizationParameters"]["quantizedDataType"] == "int8"
+    assert compression["rescoringOptions"]["enableRescoring"] is True
+    assert schema["vectorSearch"]["profiles"][0]["compression"] == COMPRESSION_NAMES["scalar"]
+
+def test_binary_compression():
+    schema = build_index_schema(name="test-index", dimensions=3072, compression="binary")
+
+    compression = schema["vectorSearch"]["compressions"][0]
+    assert compression["kind"] == "binaryQuantization"
+    assert "scalarQuantizationParameters" not in compression
+
+def test_unknown_compression_raises():
+    with pytest.raises(ValueError):
+        build_index_schema(compression="pq")
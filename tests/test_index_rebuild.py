@@ -0,0 +1,129 @@
+import os
+import json
+import pytest
+from dotenv import dotenv_values
+
+from src.search_rest import SearchRestClient
+from src.vector_store import LocalVectorStore, content_hash
+from src.index_rebuild import rebuild_index, RebuildError
+from tests.fake_search_service import FakeSearchService
+
+DIMS = 8
+
+@pytest.fixture
+def service():
+    with FakeSearchService() as svc:
+        yield svc
+
+@pytest.fixture
+def corpus(tmp_path):
+    chunks_dir = tmp_path / "json"
+    chunks_dir.mkdir()
+    chunks = [{"id": f"mdr_art_{i}_0", "title": f"Artikel {i}", "content": f"Text {i}", "source_type": "MDR",
+               "url": "http://example.com", "chapter": "KAPITEL I", "valid_from": "2025-01-10T00:00:00Z",
+               "contentVector": None} for i in range(7)]
+    (chunks_dir / "mdr.json").write_text(json.dumps(chunks), encoding="utf-8")
+
+    store = LocalVectorStore(str(tmp_path / "vectors"), dims=DIMS)
+    for i, chunk in enumerate(chunks):
+        store.add(chunk["id"], [float(i)] * DIMS, content_hash(chunk["content"]))
+    return str(chunks_dir), store
+
+def live_index(service, rest):
+    rest.create_index({"name": "mdr-legal-index-v1", "fields": [{"name": "contentVector", "dimensions": DIMS}]})
+    service.indexes["mdr-legal-index-v1"]["docs"]["old"] = {"id": "old"}
+
+def rebuild_indexes(service):
+    return [name for name in service.indexes if name != "mdr-legal-index-v1"]
+
+def test_rebuild_backfills_and_switches_alias(service, corpus):
+    chunks_dir, store = corpus
+    rest = SearchRestClient(service.endpoint, service.api_key)
+    live_index(service, rest)
+
+    result = rebuild_index(rest, "mdr-legal-index", chunks_dir, store, alias="mdr-legal", batch_size=3, poll_interval=0)
+
+    new_index = result["index"]
+    assert new_index.startswith("mdr-legal-index-")
+    assert result["documents"] == 7
+    assert len(service.indexes[new_index]["docs"]) == 7
+    assert service.indexes[new_index]["docs"]["mdr_art_3_0"]["contentVector"] == [3.0] * DIMS
+    assert service.aliases["mdr-legal"] == [new_index]
+    # Live-Index bleibt unangetastet (Rollback)
+    assert service.indexes["mdr-legal-index-v1"]["docs"] == {"old": {"id": "old"}}
+    assert rest.get_alias("mdr-legal")["indexes"] == [new_index]
+
+def test_rebuild_switches_config_without_alias(service, corpus, tmp_path):
+    chunks_dir, store = corpus
+    env_file = tmp_path / ".env"
+    env_file.write_text('AZURE_SEARCH_INDEX="mdr-legal-index-v1"\n', encoding="utf-8")
+    rest = SearchRestClient(service.endpoint, service.api_key)
+
+    result = rebuild_index(rest, "mdr-legal-index", chunks_dir, store, env_file=str(env_file), poll_interval=0)
+
+    assert dotenv_values(env_file)["AZURE_SEARCH_INDEX"] == result["index"]
+
+def test_rebuild_aborts_on_missing_vectors(service, corpus, tmp_path):
+    chunks_dir, _ = corpus
+    partial_store = LocalVectorStore(str(tmp_path / "partial"), dims=DIMS)
+    partial_store.add("mdr_art_0_0", [0.0] * DIMS, content_hash("Text 0"))
+    rest = SearchRestClient(service.endpoint, service.api_key)
+
+    with pytest.raises(RebuildError):
+        rebuild_index(rest, "mdr-legal-index", chunks_dir, partial_store, alias="mdr-legal", poll_interval=0)
+    assert "mdr-legal" not in service.aliases
+    # Der halb befüllte neue Index wird wieder gelöscht
+    assert rebuild_indexes(service) == []
+
+def test_rebuild_aborts_on_rejected_documents(service, corpus, tmp_path):
+    chunks_dir, _ = corpus
+    wrong_dims = LocalVectorStore(str(tmp_path / "wrong"), dims=DIMS)
+    for i in range(7):
+        wrong_dims.add(f"mdr_art_{i}_0", [1.0] * DIMS, content_hash(f"Text {i}"))
+    rest = SearchRestClient(service.endpoint, service.api_key)
+    # Server erwartet andere Dimensionen als die lokalen Vektoren -> alle Dokumente abgelehnt
+    original = rest.create_index
+    rest.create_index = lambda schema: original({**schema, "fields": [{"name": "contentVector", "dimensions": DIMS * 2}]})
+
+    with pytest.raises(RebuildError, match="abgelehnt"):
+        rebuild_index(rest, "mdr-legal-index", chunks_dir, wrong_dims, alias="mdr-legal", poll_interval=0)
+    assert "mdr-legal" not in service.aliases
+    assert rebuild_indexes(service) == []
+
+def test_rebuild_deletes_new_index_on_count_mismatch(service, corpus):
+    chunks_dir, store = corpus
+    rest = SearchRestClient(service.endpoint, service.api_key)
+    live_index(service, rest)
+    rest.document_count = lambda name: 3
+
+    with pytest.raises(RebuildError, match="enthält 3 statt 7"):
+        rebuild_index(rest, "mdr-legal-index", chunks_dir, store, alias="mdr-legal", count_timeout=0, poll_interval=0)
+    assert "mdr-legal" not in service.aliases
+    assert rebuild_indexes(service) == []
+    assert service.indexes["mdr-legal-index-v1"]["docs"] == {"old": {"id": "old"}}
+
+def test_rebuild_reembeds_edited_chunks(service, corpus):
+    chunks_dir, store = corpus
+    chunks_file = os.path.join(chunks_dir, "mdr.json")
+    with open(chunks_file, encoding="utf-8") as f:
+        chunks = json.load(f)
+    chunks[2]["content"] = "Text 2 (korrigiert)"
+    with open(chunks_file, "w", encoding="utf-8") as f:
+        json.dump(chunks, f)
+    rest = SearchRestClient(service.endpoint, service.api_key)
+
+    # Ohne Embedding: alter Vektor passt nicht mehr zum Text -> fehlt, statt veraltet im Index zu landen
+    with pytest.raises(RebuildError, match="mdr_art_2_0"):
+        rebuild_index(rest, "mdr-legal-index", chunks_dir, store, alias="mdr-legal", poll_interval=0)
+
+    embedded = []
+    def embed(text):
+        embedded.append(text)
+        return [9.0] * DIMS
+
+    result = rebuild_index(rest, "mdr-legal-index", chunks_dir, store, alias="mdr-legal", poll_interval=0, embed=embed)
+    assert embedded == ["Text 2 (korrigiert)"]
+    docs = service.indexes[result["index"]]["docs"]
+    assert docs["mdr_art_2_0"]["contentVector"] == [9.0] * DIMS
+    assert docs["mdr_art_3_0"]["contentVector"] == [3.0] * DIMS
+    assert store.get("mdr_art_2_0", content_hash("Text 2 (korrigiert)")) == [9.0] * DIMS
@@ -0,0 +1,34 @@
+import json
+import pytest
+from src.json_stream import iter_json_array
+
+ITEMS = [
+    {"id": "mdr_art_1_0", "content": "Text mit ] Klammern, [Kommas] und \"Quotes\"", "contentVector": [0.125, -1.5e-3, 2]},
+    {"id": "mdr_art_2_0", "content": "Ümlaute: Überwachung nach dem Inverkehrbringen", "contentVector": []},
+    12345,
+    None,
+]
+
+@pytest.mark.parametrize("buffer_size", [1, 3, 7, 64, 1 << 16])
+def test_iter_json_array_matches_json_load(tmp_path, buffer_size):
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(ITEMS, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    assert list(iter_json_array(str(path), buffer_size=buffer_size)) == ITEMS
+
+def test_iter_json_array_empty(tmp_path):
+    path = tmp_path / "empty.json"
+    path.write_text("  [ ]  ", encoding="utf-8")
+    assert list(iter_json_array(str(path), buffer_size=2)) == []
+
+def test_iter_json_array_rejects_non_array(tmp_path):
+    path = tmp_path / "object.json"
+    path.write_text('{"id": 1}', encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(iter_json_array(str(path)))
+
+def test_iter_json_array_truncated_file_raises(tmp_path):
+    path = tmp_path / "broken.json"
+    path.write_text('[{"id": 1}, {"id": ', encoding="utf-8")
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(str(path), buffer_size=4))
@@ -1,5 +1,6 @@
 import sys
 import os
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
 
@@ -23,6 +24,10 @@ import main as orchestrator
 
 class TestOrchestrator(unittest.TestCase):
     def setUp(self):
+        # Build-Plan braucht echte Ordner/Configs der Stage-Module -> hier nicht relevant
+        plan_patcher = patch.object(orchestrator, "print_build_plan")
+        self.print_build_plan = plan_patcher.start()
+        self.addCleanup(plan_patcher.stop)
         # Reset mocks before each test
         ingest_mock.run_batch_processing.reset_mock()
         refine_mock.run_refinement_pipeline.reset_mock()
@@ -69,6 +74,15 @@ class TestOrchestrator(unittest.TestCase):
         convert_mock.convert_md_to_json_structure.assert_called_once()
         upload_mock.run_upload_pipeline.assert_called_once()
 
+    @patch('sys.argv', ['main.py', '--step', 'all', '--force'])
+    def test_force_is_passed_to_every_step(self):
+        orchestrator.main()
+        self.print_build_plan.assert_called_once_with("all", True)
+        ingest_mock.run_batch_processing.assert_called_once_with(force=True)
+        refine_mock.run_refinement_pipeline.assert_called_once_with(force=True)
+        convert_mock.convert_md_to_json_structure.assert_called_once_with(force=True)
+        upload_mock.run_upload_pipeline.assert_called_once_with(force=True)
+
     @patch('sys.argv', ['main.py'])
     def test_no_args_runs_all(self):
         # Default behavior should probably be 'all' for backward compatibility
@@ -78,5 +92,29 @@ class TestOrchestrator(unittest.TestCase):
         convert_mock.convert_md_to_json_structure.assert_called_once()
         upload_mock.run_upload_pipeline.assert_called_once()
 
+    def test_stream_runs_each_document_through_all_stages(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ("a.pdf", "b.pdf"):
+                open(os.path.join(tmp, name), "w").close()
+            ingest_mock.INPUT_FOLDER = tmp
+            for mock in (ingest_mock, refine_mock, convert_mock):
+                mock.OUTPUT_FOLDER = os.path.join(tmp, "out")
+            ingest_mock.ingest_pdf.side_effect = lambda pdf, client: pdf.replace(".pdf", ".md")
+            refine_mock.refine_file.side_effect = lambda client, md: md
+            convert_mock.convert_file.side_effect = lambda md, splitter: md.replace(".md", ".json")
+            session = upload_mock.UploadSession.return_value
+            session.process_file.reset_mock()
+
+            pipeline_cls = orchestrator.StreamingPipeline
+            with patch('sys.argv', ['main.py', '--stream']), \
+                    patch.object(orchestrator, "StreamingPipeline", lambda stages: pipeline_cls(stages, dashboard_seconds=0)):
+                orchestrator.main()
+
+            uploaded = sorted(c.args[0] for c in session.process_file.call_args_list)
+            self.assertEqual(uploaded, [os.path.join(tmp, "a.json"), os.path.join(tmp, "b.json")])
+            session.finish.assert_called_once()
+            ingest_mock.run_batch_processing.assert_not_called()
+            upload_mock.run_upload_pipeline.assert_not_called()
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,64 @@
+import os
+import sys
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src_sop_auditor')))
+
+from src.prompt_usage import PromptUsage, usage_counts
+import sop_audit_pipeline as pipeline
+from rate_limiter import AdaptiveRateLimiter
+
+def response(prompt_tokens, cached_tokens, completion_tokens=10):
+    usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                            prompt_tokens_details=SimpleNamespace(cached_tokens=cached_tokens))
+    return SimpleNamespace(usage=usage, choices=[SimpleNamespace(message=SimpleNamespace(content="**Status:** ✅ KONFORM"))])
+
+def test_usage_counts_handles_missing_usage():
+    assert usage_counts(SimpleNamespace()) == {"prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+    assert usage_counts(response(2000, 1024))["cached_tokens"] == 1024
+
+def test_prompt_usage_sums_cached_tokens_and_writes_log(tmp_path):
+    log_path = str(tmp_path / "usage.jsonl")
+    usage = PromptUsage(log_path=log_path)
+    usage.call("Urteil", lambda: response(2000, 0))
+    usage.call("Urteil", lambda: response(2000, 1536))
+
+    assert usage.totals["Urteil"]["requests"] == 2
+    assert usage.totals["Urteil"]["cached_tokens"] == 1536
+    assert "1536/4000 Prompt-Tokens aus dem Cache (38%)" in usage.summary()
+    lines = [json.loads(line) for line in open(log_path, encoding="utf-8")]
+    assert [line["cached_tokens"] for line in lines] == [0, 1536]
+
+def common_prefix(a, b):
+    return os.path.commonprefix([a, b])
+
+def test_audit_requests_share_a_static_prefix(monkeypatch):
+    monkeypatch.setattr(pipeline, "count_tokens", len)
+    chat_client, retriever = MagicMock(), MagicMock()
+    chat_client.chat.completions.create.return_value = response(1500, 1024)
+    retriever.search.return_value = [{"id": "mdr_art_83_0", "source_type": "MDR", "title": "Artikel 83", "content": "PMS System."}]
+    limiter = AdaptiveRateLimiter(rate=1000, max_rate=1000)
+
+    for content in ("Regel A: PMS jährlich.", "Regel B: Vigilanz binnen 15 Tagen."):
+        pipeline.audit_single_claim("Claim", content, [1.0, 0.0], retriever, chat_client, limiter)
+
+    first, second = [call.kwargs["messages"] for call in chat_client.chat.completions.create.call_args_list]
+    # Variable Daten nur im User-Teil -> identischer System-Prompt für alle Claims
+    assert first[0] == second[0] == {"role": "system", "content": pipeline.AUDIT_PROMPT}
+    assert "Regel A" in first[1]["content"] and "PMS System." in first[1]["content"]
+    assert "Regel" not in pipeline.AUDIT_PROMPT
+
+    # Gleicher Kontext -> der Präfix reicht über System-Prompt und Fakten bis zum Claim
+    shared = common_prefix(first[0]["content"] + first[1]["content"], second[0]["content"] + second[1]["content"])
+    assert shared.endswith('SOP AUSSAGE DES HERSTELLERS:\n"Regel ')
+    assert "PMS System." in shared
+
+def test_batch_prompt_puts_shared_context_before_claims():
+    context = "Artikel 83 - PMS System.\n\nArtikel 84 - PMS-Plan."
+    first = pipeline.BATCH_AUDIT_PROMPT + pipeline.build_batch_prompt(["SOP-A", "SOP-B"], context)
+    second = pipeline.BATCH_AUDIT_PROMPT + pipeline.build_batch_prompt(["SOP-C"], context)
+
+    assert context in common_prefix(first, second)
@@ -0,0 +1,128 @@
+import time
+import threading
+from types import SimpleNamespace
+from functools import lru_cache
+from unittest.mock import MagicMock
+
+import pytest
+from dotenv import load_dotenv
+
+from src import quota_governor
+from src.quota_governor import QuotaGovernor, GovernedClient, govern, estimate_tokens
+
+WINDOW = 0.5  # "Minute" im Test: 0.5s
+
+def make(tmp_path, tpm=1000, rpm=1000, reserve=0.0):
+    return QuotaGovernor(str(tmp_path / "quota.sqlite"), budgets={"chat": (tpm, rpm)}, window=WINDOW, reserve=reserve)
+
+def test_token_budget_is_enforced(tmp_path):
+    governor = make(tmp_path, tpm=1000)
+    start = time.monotonic()
+    for _ in range(20):
+        governor.acquire("chat", 100)   # 2000 Tokens = zwei volle Fenster
+    elapsed = time.monotonic() - start
+    assert WINDOW * 0.9 <= elapsed < WINDOW * 3
+
+def test_unknown_deployment_is_not_governed(tmp_path):
+    governor = make(tmp_path)
+    assert governor.acquire("embedding", 10 ** 9) is None
+
+def test_settle_refunds_overestimate(tmp_path):
+    governor = make(tmp_path, tpm=1000)
+    grant = governor.acquire("chat", 900)
+    governor.settle(grant, 100)
+    start = time.monotonic()
+    governor.acquire("chat", 800)      # wäre ohne Korrektur erst nach Ablauf des Fensters frei
+    assert time.monotonic() - start < WINDOW * 0.3
+
+def test_backoff_is_shared_between_processes(tmp_path):
+    # Zwei Instanzen auf derselben Datei = zwei Prozesse
+    first, second = make(tmp_path), make(tmp_path)
+    first.backoff("chat", 0.3)
+    start = time.monotonic()
+    second.acquire("chat", 1)
+    assert time.monotonic() - start >= 0.25
+
+def test_reserve_keeps_burst_for_interactive(tmp_path):
+    governor = make(tmp_path, tpm=1000, reserve=0.5)
+    governor.acquire("chat", 500, "batch")
+    start = time.monotonic()
+    governor.acquire("chat", 400, "interactive")
+    assert time.monotonic() - start < 0.05
+    start = time.monotonic()
+    governor.acquire("chat", 100, "batch")  # Batch-Anteil (50%) ausgeschöpft -> wartet auf das Fenster
+    assert time.monotonic() - start >= WINDOW * 0.5
+
+def test_interactive_waiter_goes_first(tmp_path):
+    governor, other = make(tmp_path, tpm=1000), make(tmp_path, tpm=1000)
+    governor.acquire("chat", 1000)       # Fenster voll
+    order = []
+    batch = threading.Thread(target=lambda: (other.acquire("chat", 600, "batch"), order.append("batch")))
+    batch.start()
+    time.sleep(0.05)
+    governor.acquire("chat", 600, "interactive")
+    order.append("interactive")
+    batch.join()
+    assert order == ["interactive", "batch"]
+
+def test_governed_client_settles_and_reports_429(tmp_path):
+    governor = make(tmp_path, tpm=1000)
+    client = MagicMock()
+    client.chat.completions.create.return_value = SimpleNamespace(usage=SimpleNamespace(total_tokens=42))
+    governed = GovernedClient(client, governor, "interactive")
+
+    messages = [{"role": "user", "content": "x" * 400}]
+    assert governed.chat.completions.create(model="chat", messages=messages, max_tokens=50).usage.total_tokens == 42
+    client.chat.completions.create.assert_called_once_with(model="chat", messages=messages, max_tokens=50)
+    assert estimate_tokens({"messages": messages, "max_tokens": 50}) == 151
+
+    error = RuntimeError("429 Too Many Requests")
+    error.status_code = 429
+    client.embeddings.create.side_effect = error
+    with pytest.raises(RuntimeError):
+        governed.embeddings.create(model="chat", input=["a"])
+    assert governor.stats["throttled"] == 1
+    assert governed.some_other_attribute is client.some_other_attribute
+
+def test_failed_call_releases_its_grant(tmp_path):
+    governor = make(tmp_path, tpm=1000)
+    throttled = RuntimeError("429 Too Many Requests")
+    throttled.status_code = 429
+    for error in (RuntimeError("500 Internal Server Error"), throttled):
+        def fail():
+            raise error
+        with pytest.raises(RuntimeError):
+            governor.call("chat", fail, tokens=900)
+
+    # Abgelehnte Requests belegen kein Budget: 800 Tokens passen nach dem kurzen 429-Backoff sofort
+    start = time.monotonic()
+    governor.acquire("chat", 800)
+    assert time.monotonic() - start < WINDOW * 0.5
+
+QUOTA_ENV = ("QUOTA_CHAT_TPM", "QUOTA_CHAT_RPM", "QUOTA_EMBEDDING_TPM", "QUOTA_EMBEDDING_RPM",
+             "QUOTA_PRIORITY", "QUOTA_DB_PATH", "AZURE_OPENAI_CHAT_DEPLOYMENT")
+
+def test_govern_without_budget_returns_client(monkeypatch):
+    for name in QUOTA_ENV:
+        monkeypatch.delenv(name, raising=False)
+    client = object()
+    assert govern(client, "batch") is client
+
+def test_budget_from_env_file_loaded_after_import(tmp_path, monkeypatch):
+    # Die Tools importieren quota_governor vor ihrem load_dotenv() - das Budget aus der .env muss trotzdem greifen
+    env = tmp_path / ".env"
+    env.write_text(f'QUOTA_CHAT_TPM="30000"\nQUOTA_CHAT_RPM="60"\nAZURE_OPENAI_CHAT_DEPLOYMENT="audit-chat"\n'
+                   f'QUOTA_PRIORITY="interactive"\nQUOTA_DB_PATH="{tmp_path / "quota.sqlite"}"\n')
+    for name in QUOTA_ENV:
+        monkeypatch.setenv(name, "")  # merkt den Ausgangszustand, load_dotenv setzt danach neu
+        monkeypatch.delenv(name)
+    monkeypatch.setattr(quota_governor, "default_governor", lru_cache(maxsize=None)(quota_governor.default_governor.__wrapped__))
+    load_dotenv(env)
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=MagicMock())),
+                             embeddings=SimpleNamespace(create=MagicMock()))
+    governed = govern(client, "batch")
+    assert isinstance(governed, GovernedClient)
+    assert governed.priority == "interactive"
+    assert governed.governor.budgets == {"audit-chat": (30000, 60)}
+    assert governed.governor.path == str(tmp_path / "quota.sqlite")
@@ -0,0 +1,43 @@
+import os
+import sys
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src_sop_auditor')))
+
+from src.mdr_references import extract_references, chunk_element
+from src.reranker import rerank
+import sop_audit_pipeline as pipeline
+
+def test_extract_references_expands_lists_and_ranges_and_skips_other_acts():
+    text = ("Gemäß Anhang XIV Teil B und Artikel 83 bis 86 sowie Art. 61, 62. "
+            "Artikel 5 der Richtlinie 93/42/EWG gilt nicht. Anhänge II und III.")
+    assert extract_references(text) == ["anx_xiv", "art_83", "art_84", "art_85", "art_86", "art_61", "art_62", "anx_ii", "anx_iii"]
+    assert chunk_element({"id": "mdr_anx_XIV_2"}) == "anx_xiv"
+    assert chunk_element({"id": "x", "source_type": "MDR", "title": "Artikel 10 - Pflichten"}) == "art_10"
+    assert chunk_element({"id": "mdcg_2020_7_3", "source_type": "MDCG", "title": "Artikel 2"}) is None
+
+def candidates():
+    hits = [{"id": f"mdcg_{i}", "source_type": "MDCG", "title": f"Guidance {i}", "content": "Allgemeine Hinweise zur Dokumentation.",
+             "@search.score": 1.0 - i / 40} for i in range(20)]
+    hits.append({"id": "mdr_anx_XIV_0", "source_type": "MDR", "title": "ANHANG XIV", "content": "Klinische Bewertung und klinische Nachbeobachtung.",
+                 "@search.score": 0.4})
+    return hits
+
+def test_explicit_reference_and_bm25_pull_deep_candidate_to_the_top():
+    claim = "Die klinische Nachbeobachtung erfolgt gemäß Anhang XIV."
+    top = rerank(claim, candidates(), 3)
+    assert top[0]["id"] == "mdr_anx_XIV_0"
+    assert [h["id"] for h in top[1:]] == ["mdcg_0", "mdcg_1"]
+
+def test_without_features_the_search_order_is_kept():
+    hits = [{"id": f"c{i}", "source_type": "MDCG", "title": "", "content": "x", "@search.score": 3 - i} for i in range(3)]
+    assert [h["id"] for h in rerank("ohne Treffer", hits, 3)] == ["c0", "c1", "c2"]
+
+def test_retrieve_references_fetches_candidates_and_prompts_only_the_best(tmp_path):
+    retriever = MagicMock()
+    retriever.search.return_value = candidates()
+    hits = pipeline.retrieve_references("Nachbeobachtung gemäß Anhang XIV.", [1.0, 0.0], retriever, top=3, candidates=30)
+
+    assert retriever.search.call_args.kwargs["top"] == 30
+    assert len(hits) == 3 and hits[0]["id"] == "mdr_anx_XIV_0"
+    assert set(hits[0]) == set(pipeline.RETRIEVAL_FIELDS)
@@ -0,0 +1,78 @@
+import json
+import numpy as np
+import pytest
+
+from src.vector_store import LocalVectorStore
+from src.retrieval_backend import LocalVectorBackend, create_retrieval_backend
+
+DIMS = 16
+
+@pytest.fixture
+def local_corpus(tmp_path):
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(40, DIMS)).astype(np.float32)
+    chunks = [{"id": f"mdr_art_{i}_0", "title": f"Artikel {i}", "content": f"Text {i}", "source_type": "MDR",
+               "url": "http://example.com", "chapter": "KAPITEL I", "contentVector": None} for i in range(40)]
+
+    chunks_dir = tmp_path / "json"
+    chunks_dir.mkdir()
+    # Ein Chunk fehlt im JSON -> Vektor ohne Metadaten
+    (chunks_dir / "mdr.json").write_text(json.dumps(chunks[1:]), encoding="utf-8")
+
+    store = LocalVectorStore(str(tmp_path / "vectors"), dims=DIMS)
+    for chunk, vec in zip(chunks, vectors):
+        store.add(chunk["id"], vec)
+    return str(tmp_path / "vectors"), str(chunks_dir), vectors
+
+def test_local_backend_matches_brute_force_cosine(local_corpus):
+    store_folder, chunks_dir, vectors = local_corpus
+    backend = LocalVectorBackend(store_folder, chunks_dir, block_rows=7)
+
+    query = vectors[5] + 0.1
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(normed @ (query / np.linalg.norm(query))))
+    expected = [f"mdr_art_{i}_0" for i in expected if i != 0][:5]
+
+    hits = backend.search("egal", query.tolist(), top=5, select=["title", "source_type"])
+    assert [h["title"] for h in hits] == [f"Artikel {i.split('_')[2]}" for i in expected]
+    assert set(hits[0]) == {"title", "source_type", "@search.score"}
+    assert hits[0]["@search.score"] >= hits[-1]["@search.score"]
+
+def test_local_backend_batch_search_and_dimension_check(local_corpus):
+    store_folder, chunks_dir, vectors = local_corpus
+    backend = LocalVectorBackend(store_folder, chunks_dir)
+
+    rows, scores = backend.search_vectors(vectors[:3], k=1)
+    assert rows[:, 0].tolist() == [0, 1, 2]
+    assert np.allclose(scores[:, 0], 1.0, atol=1e-5)
+
+    with pytest.raises(ValueError):
+        backend.search("egal", [0.1] * (DIMS - 1))
+
+def test_factory_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        create_retrieval_backend("elastic")
+    with pytest.raises(ValueError):
+        create_retrieval_backend("azure")
+
+def test_hybrid_search_fuses_bm25_with_vector_ranking(local_corpus):
+    store_folder, chunks_dir, vectors = local_corpus
+    backend = LocalVectorBackend(store_folder, chunks_dir)
+
+    # Vektor zeigt auf Chunk 5, der Text nur auf Chunk 19 -> beide landen vorne
+    hits = backend.search("19", vectors[5].tolist(), top=2, select=["id"])
+    assert {h["id"] for h in hits} == {"mdr_art_5_0", "mdr_art_19_0"}
+
+    # Gespeicherter BM25 Index wird wiederverwendet
+    again = LocalVectorBackend(store_folder, chunks_dir)
+    assert again.lexical.doc_ids == backend.lexical.doc_ids
+
+def test_local_similarity_scores_given_chunks(local_corpus):
+    store_folder, chunks_dir, vectors = local_corpus
+    backend = LocalVectorBackend(store_folder, chunks_dir)
+
+    query = vectors[3]
+    scores = backend.similarity(query, ["mdr_art_9_0", "unbekannt", "mdr_art_3_0"])
+    expected = vectors[9] @ query / (np.linalg.norm(vectors[9]) * np.linalg.norm(query))
+    assert scores[0] == pytest.approx(expected, abs=1e-5)
+    assert scores[1] == 0.0 and scores[2] == pytest.approx(1.0, abs=1e-5)
@@ -0,0 +1,76 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src_sop_auditor')))
+
+from retrieval_cache import RetrievalCache, claim_hash, resolve_index_version
+from src.search_rest import SearchRestClient
+from tests.fake_search_service import FakeSearchService
+
+HITS = [{"title": "Artikel 84", "content": "PMS-Plan", "source_type": "MDR", "chapter": "KAPITEL VII"}]
+
+def vec(*values):
+    return np.asarray(values, dtype=np.float32)
+
+def test_exact_hit_ignores_whitespace_and_case(tmp_path):
+    cache = RetrievalCache("index-v1", path=str(tmp_path / "cache.sqlite"))
+    cache.put("Der PMS-Plan wird jährlich aktualisiert.", vec(1, 0, 0), HITS)
+
+    assert cache.get("der  PMS-Plan wird jährlich\naktualisiert.") == HITS
+    assert cache.stats["exact"] == 1
+    assert claim_hash("A  b") == claim_hash("a b")
+
+def test_near_duplicate_lookup_by_cosine(tmp_path):
+    cache = RetrievalCache("index-v1", path=str(tmp_path / "cache.sqlite"), threshold=0.95)
+    cache.put("Vigilanz: Meldung innerhalb von 15 Tagen.", vec(1, 0.1, 0), HITS)
+
+    assert cache.get("Vigilanz: Meldung binnen 15 Tagen.", vec(1, 0.12, 0)) == HITS
+    assert cache.get("Etwas ganz anderes.", vec(0, 0, 1)) is None
+    assert cache.stats == {"exact": 0, "near": 1, "miss": 1}
+
+def test_cache_is_shared_between_instances_and_scoped_to_index(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cli_cache = RetrievalCache("index-v1", path=path)
+    app_cache = RetrievalCache("index-v1", path=path)
+
+    cli_cache.put("Claim A", vec(0, 1, 0), HITS)
+    # Anderer Prozess/Instanz sieht neue Einträge auch beim Near-Duplicate Lookup
+    assert app_cache.get("Claim A (Kopie)", vec(0, 1, 0.01)) == HITS
+
+    reindexed = RetrievalCache("index-v2", path=path)
+    assert reindexed.get("Claim A", vec(0, 1, 0)) is None
+    # Andere Scopes bleiben erhalten (z.B. CLI und App mit verschiedener Kandidatenzahl)
+    assert RetrievalCache("index-v1", path=path).get("Claim A") == HITS
+
+def test_entries_expire_by_age_and_lru(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = RetrievalCache("index-v1", path=path)
+    for n in range(4):
+        cache.put(f"Claim {n}", vec(n, 1, 0), HITS)
+    with cache._db:
+        cache._db.execute("UPDATE retrieval SET last_used = ? WHERE claim_hash = ?", (0, claim_hash("Claim 0")))
+
+    RetrievalCache("index-v2", path=path, max_age_days=30)
+    assert RetrievalCache("index-v1", path=path).get("Claim 0") is None
+    assert cache.get("Claim 1") == HITS      # zuletzt genutzt -> bleibt bei LRU
+
+    RetrievalCache("index-v2", path=path, max_entries=1)
+    assert cache.get("Claim 1") == HITS
+    assert cache.get("Claim 2") is None and cache.get("Claim 3") is None
+
+def test_index_version_changes_with_content(tmp_path):
+    with FakeSearchService() as service:
+        rest = SearchRestClient(service.endpoint, service.api_key)
+        rest.create_index({"name": "mdr-v1", "fields": [{"name": "contentVector", "dimensions": 2}]})
+        rest.upload_documents("mdr-v1", [{"id": "a", "contentVector": [1.0, 0.0]}])
+        first = resolve_index_version("mdr-v1", service.endpoint, service.api_key, store_folder=str(tmp_path))
+
+        rest.upload_documents("mdr-v1", [{"id": "b", "contentVector": [0.0, 1.0]}])
+        assert resolve_index_version("mdr-v1", service.endpoint, service.api_key, store_folder=str(tmp_path)) != first
+
+        # Re-Upload mit gleicher Dokumentanzahl -> neues Upload-Manifest
+        (tmp_path / "upload_manifest_mdr-v1.json").write_text('{"chunks": {"a": {"indexed": "h1"}}}')
+        before = resolve_index_version("mdr-v1", service.endpoint, service.api_key, store_folder=str(tmp_path))
+        (tmp_path / "upload_manifest_mdr-v1.json").write_text('{"chunks": {"a": {"indexed": "h2"}}}')
+        assert resolve_index_version("mdr-v1", service.endpoint, service.api_key, store_folder=str(tmp_path)) != before
@@ -0,0 +1,64 @@
+"""
+Startzeit der Einstiegspunkte, jeweils in einem frischen Interpreter gemessen.
+Regressions-Schutz: schwere SDKs (openai, Azure, langchain, python-docx) dürfen nur von dem
+Schritt geladen werden, der sie braucht. Die Zeiten stehen in der Ausgabe (pytest -s).
+Statt fester Zeitbudgets (CI-Rauschen) wird relativ gemessen: Einstiegspunkte ohne schwere
+SDKs müssen deutlich schneller starten als ein eager Import aller SDKs im selben Lauf.
+"""
+import os
+import sys
+import json
+import importlib.util
+import subprocess
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# Leichte Einstiegspunkte dürfen höchstens diesen Anteil der eager Import-Zeit brauchen
+LAZY_SHARE = 0.5
+
+HEAVY = ["openai", "tiktoken", "azure.ai.documentintelligence", "azure.search.documents", "langchain_text_splitters", "docx"]
+
+# (Name, Ordner, Import-Code, erlaubte schwere Module)
+ENTRYPOINTS = [
+    ("main", "src_mdcg_pdf_handler", "import main", []),
+    ("main --step ingest", "src_mdcg_pdf_handler", "import main; main.load_stage('ingest')", ["azure.ai.documentintelligence"]),
+    ("main --step refine", "src_mdcg_pdf_handler", "import main; main.load_stage('refine')", ["openai", "tiktoken"]),
+    ("main --step convert", "src_mdcg_pdf_handler", "import main; main.load_stage('convert')", ["langchain_text_splitters"]),
+    ("main --step upload", "src_mdcg_pdf_handler", "import main; main.load_stage('upload')", ["openai", "azure.search.documents"]),
+    ("sop_audit_pipeline", "src_sop_auditor", "import sop_audit_pipeline", ["tiktoken"]),
+    ("upload_data", ".", "import upload_data", []),
+]
+
+PROBE = """
+import sys, time, json
+sys.path.insert(0, '.')
+start = time.perf_counter()
+{code}
+print(json.dumps({{"ms": (time.perf_counter() - start) * 1000, "modules": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def measure(folder: str, code: str) -> dict:
+    result = subprocess.run([sys.executable, "-c", PROBE.format(code=code, heavy=HEAVY)], cwd=os.path.join(ROOT, folder),
+                            capture_output=True, text=True, timeout=120)
+    # Ein kaputter Einstiegspunkt (ImportError, SyntaxError) ist genau die Regression, die hier auffallen soll
+    assert result.returncode == 0, f"Import fehlgeschlagen:\n{result.stderr.strip()}"
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+@pytest.fixture(scope="module")
+def eager_ms():
+    """Referenz: alle schweren SDKs eager importiert (so startete jeder Schritt vor dem Lazy Loading)."""
+    installed = [module for module in HEAVY if importlib.util.find_spec(module.split(".")[0])]
+    result = measure(".", "; ".join(f"import {module}" for module in installed))
+    print(f"\n⏱️ {'eager (alle SDKs)':<22} {result['ms']:7.0f} ms")
+    return result["ms"]
+
+@pytest.mark.parametrize("name, folder, code, allowed", ENTRYPOINTS, ids=[e[0] for e in ENTRYPOINTS])
+def test_startup_imports_only_what_the_step_needs(name, folder, code, allowed, eager_ms):
+    result = measure(folder, code)
+    print(f"\n⏱️ {name:<22} {result['ms']:7.0f} ms  {', '.join(result['modules']) or '-'}")
+
+    unexpected = sorted(set(result["modules"]) - set(allowed))
+    assert not unexpected, f"{name} lädt beim Start: {unexpected}"
+    if not allowed:
+        assert result["ms"] < eager_ms * LAZY_SHARE, f"{name} startet kaum schneller als ein eager Import ({eager_ms:.0f} ms)"
@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src_mdcg_pdf_handler')))
+
+from stream_pipeline import Stage, StreamingPipeline, render_dashboard
+
+def run(stages, items, queue_size=2):
+    lines = []
+    pipeline = StreamingPipeline(stages, queue_size=queue_size, dashboard_seconds=0, printer=lines.append)
+    return pipeline, pipeline.run(items), lines
+
+def test_documents_flow_through_all_stages():
+    seen = []
+    lock = threading.Lock()
+    def record(item):
+        with lock:
+            seen.append(item)
+    stages = [Stage("a", lambda x: x + 1, 2), Stage("b", lambda x: x * 10, 3), Stage("c", record, 1)]
+    _, final, lines = run(stages, range(8))
+
+    assert sorted(seen) == [(i + 1) * 10 for i in range(8)]
+    assert [s["done"] for s in final] == [8, 8, 8]
+    assert all(s["queued"] == 0 and s["active"] == 0 for s in final)
+    assert "📊" in lines[-1]
+
+def test_stages_overlap_across_documents():
+    # Dokument 0 ist in Stufe 2, bevor Stufe 1 das letzte Dokument begonnen hat
+    events = []
+    lock = threading.Lock()
+    def stage(name):
+        def fn(item):
+            with lock:
+                events.append((name, item))
+            time.sleep(0.02)
+            return item
+        return fn
+    run([Stage("ocr", stage("ocr"), 1), Stage("llm", stage("llm"), 1)], range(5))
+
+    assert events.index(("llm", 0)) < events.index(("ocr", 4))
+
+def test_failure_only_drops_that_document():
+    def flaky(item):
+        if item == 2:
+            raise RuntimeError("OCR kaputt")
+        return item
+    done = []
+    pipeline, final, lines = run([Stage("ocr", flaky, 2), Stage("upload", done.append, 1)], range(5))
+
+    assert sorted(done) == [0, 1, 3, 4]
+    assert final[0]["failed"] == 1 and final[1]["done"] == 4
+    assert pipeline.errors[0][:2] == ("ocr", 2)
+    assert any("OCR kaputt" in line for line in lines)
+
+def test_bounded_queue_applies_backpressure():
+    # Langsame zweite Stufe: die erste Stufe darf höchstens Queue + Worker Dokumente vorauslaufen
+    gate = threading.Event()
+    progress = []
+    def slow(item):
+        gate.wait(1)
+        return None
+    stages = [Stage("fast", lambda x: progress.append(x) or x, 1), Stage("slow", slow, 1)]
+    pipeline = StreamingPipeline(stages, queue_size=2, dashboard_seconds=0, printer=lambda _: None)
+    runner = threading.Thread(target=pipeline.run, args=(range(20),))
+    runner.start()
+    time.sleep(0.2)
+    ahead = len(progress)
+    gate.set()
+    runner.join()
+
+    assert ahead <= 2 + 1 + 1 + 1  # Queue slow + aktives Item slow + Item in fast + wartender put
+    assert len(progress) == 20
+
+def test_render_dashboard():
+    text = render_dashboard([{"name": "refine", "queued": 3, "active": 2, "workers": 4, "done": 7, "failed": 1,
+                              "per_minute": 12.5}])
+    assert "refine" in text and "2/4" in text and "12.5" in text
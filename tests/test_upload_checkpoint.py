@@ -0,0 +1,142 @@
+import os
+import sys
+import json
+import importlib.util
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+HANDLER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src_mdcg_pdf_handler'))
+sys.path.insert(0, HANDLER_DIR)
+
+from src.vector_store import LocalVectorStore
+from upload_checkpoint import UploadCheckpoint, DeadLetterQueue
+
+# test_orchestrator ersetzt 'upload_manager' in sys.modules durch einen Mock -> eigenständig laden
+spec = importlib.util.spec_from_file_location("upload_manager_under_test", os.path.join(HANDLER_DIR, "upload_manager.py"))
+upload_manager = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(upload_manager)
+
+DIMS = 4
+
+def test_vector_store_roundtrip_and_truncated_tail(tmp_path):
+    store = LocalVectorStore(str(tmp_path), dims=DIMS)
+    store.add("a", [1, 0, 0, 0], "h1")
+    store.add("b", [0, 1, 0, 0], "h2")
+    store.add("a", [0, 0, 1, 0], "h3")  # Überschreibt 'a'
+
+    # Simulierter Absturz: halbe ID-Zeile ohne Newline
+    with open(os.path.join(tmp_path, "ids.jsonl"), "a", encoding="utf-8") as f:
+        f.write('{"id": "c"')
+
+    reopened = LocalVectorStore(str(tmp_path))
+    assert len(reopened) == 2
+    assert reopened.get("a") == [0, 0, 1, 0]
+    assert reopened.get("a", "h1") is None
+    ids, matrix = reopened.load()
+    assert ids == ["b", "a"]
+    assert np.array_equal(matrix, np.array([[0, 1, 0, 0], [0, 0, 1, 0]], dtype=np.float32))
+
+def test_checkpoint_resets_indexed_for_other_index(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    checkpoint = UploadCheckpoint(path, "index-v1")
+    checkpoint.mark_embedded("a", "t")
+    checkpoint.mark_indexed("a", "d")
+    checkpoint.save()
+
+    assert UploadCheckpoint(path, "index-v1").is_indexed("a", "d")
+    other = UploadCheckpoint(path, "index-v2")
+    assert not other.is_indexed("a", "d")
+    assert other.counts() == (1, 0)
+
+def make_embedding_client(fail_on=()):
+    calls = []
+    def create(input, model, dimensions):
+        calls.append(input)
+        if input in fail_on:
+            raise RuntimeError("429 Too Many Requests")
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[float(len(input))] * DIMS)])
+    client = MagicMock()
+    client.embeddings.create.side_effect = create
+    return client, calls
+
+def make_search_client(reject=()):
+    def upload_documents(documents):
+        return [SimpleNamespace(key=d["id"], succeeded=d["id"] not in reject, error_message="rejected") for d in documents]
+    client = MagicMock()
+    client.upload_documents.side_effect = upload_documents
+    return client
+
+def run_pipeline(tmp_path, emb_client, search_client, retry=False):
+    store_dir = str(tmp_path / "vectors")
+    with patch.multiple(
+        upload_manager,
+        INPUT_FOLDER=str(tmp_path / "json"),
+        AOAI_ENDPOINT="https://example", EMBEDDING_DEPLOYMENT="emb", EMBEDDING_DIMENSIONS=DIMS,
+        VECTOR_STORE_PATH=store_dir,
+        MANIFEST_PATH=os.path.join(store_dir, "manifest.json"),
+        DEAD_LETTER_PATH=os.path.join(store_dir, "dead_letter.jsonl"),
+        BUILD_MANIFEST_PATH=os.path.join(store_dir, "build_manifest.json"),
+        AzureOpenAI=MagicMock(return_value=emb_client),
+        SearchClient=MagicMock(return_value=search_client),
+        AzureKeyCredential=MagicMock(),
+    ):
+        upload_manager.run_upload_pipeline(retry_dead_letter=retry)
+    return DeadLetterQueue(os.path.join(store_dir, "dead_letter.jsonl"))
+
+def test_failures_go_to_dead_letter_and_restart_does_only_missing_work(tmp_path):
+    os.makedirs(tmp_path / "json")
+    chunks = [{"id": f"c{i}", "content": "x" * (i + 1), "title": "T"} for i in range(4)]
+    with open(tmp_path / "json" / "doc.json", "w", encoding="utf-8") as f:
+        json.dump(chunks, f)
+
+    # Lauf 1: Embedding für c1 schlägt fehl, Upload für c2 wird abgelehnt
+    emb_client, calls = make_embedding_client(fail_on={"xx"})
+    dead_letter = run_pipeline(tmp_path, emb_client, make_search_client(reject={"c2"}))
+    records = {r["id"]: r["stage"] for r in dead_letter.load()}
+    assert records == {"c1": "embed", "c2": "upload"}
+    assert len(calls) == 4
+
+    # Lauf 2 (Retry): nur c1 wird neu embedded, c2 nutzt den lokalen Vektor
+    emb_client, calls = make_embedding_client()
+    search_client = make_search_client()
+    dead_letter = run_pipeline(tmp_path, emb_client, search_client, retry=True)
+    assert calls == ["xx"]
+    uploaded = [d["id"] for c in search_client.upload_documents.call_args_list for d in c.kwargs["documents"]]
+    assert sorted(uploaded) == ["c1", "c2"]
+    assert dead_letter.load() == []
+
+    # Lauf 3: alles indexiert -> keine Embeddings, kein Upload
+    emb_client, calls = make_embedding_client()
+    search_client = make_search_client()
+    run_pipeline(tmp_path, emb_client, search_client)
+    assert calls == []
+    search_client.upload_documents.assert_not_called()
+
+def test_interrupted_retry_keeps_dead_letter_records(tmp_path):
+    os.makedirs(tmp_path / "json")
+    chunks = [{"id": f"c{i}", "content": "x" * (i + 1), "title": "T"} for i in range(4)]
+    with open(tmp_path / "json" / "doc.json", "w", encoding="utf-8") as f:
+        json.dump(chunks, f)
+    emb_client, _ = make_embedding_client(fail_on={"xx"})
+    run_pipeline(tmp_path, emb_client, make_search_client(reject={"c2"}))
+
+    # Retry bricht ab (Ctrl-C im Embedding von c1) -> kein Fehler-Eintrag geht verloren
+    emb_client, _ = make_embedding_client()
+    emb_client.embeddings.create.side_effect = KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        run_pipeline(tmp_path, emb_client, make_search_client(), retry=True)
+    dead_letter = DeadLetterQueue(str(tmp_path / "vectors" / "dead_letter.jsonl"))
+    assert dead_letter.drain() == {"c1", "c2"}
+
+    # Nächster Retry läuft durch und räumt auf
+    emb_client, calls = make_embedding_client()
+    search_client = make_search_client()
+    run_pipeline(tmp_path, emb_client, search_client, retry=True)
+    assert calls == ["xx"]
+    uploaded = [d["id"] for c in search_client.upload_documents.call_args_list for d in c.kwargs["documents"]]
+    assert sorted(uploaded) == ["c1", "c2"]
+    assert dead_letter.drain() == set()
+    assert not os.path.exists(dead_letter.retry_path)
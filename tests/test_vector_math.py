@@ -0,0 +1,42 @@
+import numpy as np
+from src.vector_math import (
+    normalize_rows,
+    truncate_dimensions,
+    quantize_scalar_int8,
+    dequantize_scalar_int8,
+    quantize_binary,
+    hamming_similarity,
+    exact_top_k,
+    recall_at_k
+)
+
+rng = np.random.default_rng(0)
+CORPUS = normalize_rows(rng.normal(size=(300, 64)))
+QUERIES = normalize_rows(rng.normal(size=(20, 64)))
+
+def test_exact_top_k_matches_full_sort():
+    top = exact_top_k(CORPUS, QUERIES, k=5, block_size=7)
+    expected = np.argsort(-(QUERIES @ CORPUS.T), axis=1)[:, :5]
+    assert np.array_equal(top, expected)
+
+def test_truncate_dimensions_renormalizes():
+    truncated = truncate_dimensions(CORPUS, 16)
+    assert truncated.shape == (300, 16)
+    assert np.allclose(np.linalg.norm(truncated, axis=1), 1.0, atol=1e-5)
+
+def test_scalar_quantization_roundtrip_is_close():
+    codes, minimum, scale = quantize_scalar_int8(CORPUS)
+    assert codes.dtype == np.int8
+    restored = dequantize_scalar_int8(codes, minimum, scale)
+    assert np.abs(restored - CORPUS).max() <= scale.max()
+
+def test_binary_quantization_self_is_best_match():
+    codes = quantize_binary(CORPUS)
+    assert codes.shape == (300, 8)
+    similarity = hamming_similarity(codes, codes[:10])
+    assert np.array_equal(similarity.argmax(axis=1), np.arange(10))
+
+def test_recall_at_k():
+    exact = np.array([[1, 2, 3, 4]])
+    assert recall_at_k(np.array([[1, 2, 9, 8]]), exact) == 0.5
+    assert recall_at_k(exact, exact) == 1.0
@@ -0,0 +1,144 @@
+import os
+import sys
+import re
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src_sop_auditor')))
+
+import sop_audit_pipeline as pipeline
+from verdict_batcher import group_by_context, merge_hits, parse_verdicts
+from rate_limiter import AdaptiveRateLimiter
+
+def hit(chunk_id, content=None):
+    return {"id": chunk_id, "source_type": "MDR", "title": chunk_id, "content": content or f"Text von {chunk_id}."}
+
+def test_group_by_context_joins_overlapping_claims():
+    hit_lists = [
+        [hit("art_83"), hit("art_84")],
+        [hit("art_87")],
+        [hit("art_84"), hit("art_86")],
+        [hit("art_83")],
+        [hit("art_87"), hit("art_88")],
+    ]
+    assert group_by_context(hit_lists, max_group=2) == [[0, 2], [1, 4], [3]]
+    assert group_by_context(hit_lists, max_group=5) == [[0, 2, 3], [1, 4]]
+
+def test_merge_hits_interleaves_by_rank_without_duplicates():
+    merged = merge_hits([[hit("a"), hit("b")], [hit("c"), hit("a"), hit("d")]])
+    assert [h["id"] for h in merged] == ["a", "c", "b", "d"]
+
+def test_parse_verdicts_formats_and_ignores_invalid_entries():
+    text = json.dumps({"verdicts": [
+        {"claim_id": 2, "status": "KRITISCH", "begruendung": "Frist fehlt.", "zitat": "Art. 87"},
+        {"claim_id": 1, "status": "VIELLEICHT", "begruendung": "", "zitat": ""},
+        {"claim_id": 9, "status": "KONFORM", "begruendung": "", "zitat": ""},
+    ]})
+    decisions = parse_verdicts(text, 2)
+    assert list(decisions) == [1]
+    assert decisions[1].startswith("**Status:** ❌ KRITISCH\n**Begründung:** Frist fehlt.")
+    assert parse_verdicts("kein json", 2) == {}
+
+HITS = {
+    "Regel A": [hit("mdr_art_83_0"), hit("mdr_art_84_0")],
+    "Regel B": [hit("mdr_art_84_0"), hit("mdr_art_83_0")],
+    "Regel C": [hit("mdr_art_87_0")],
+    "Regel D": [hit("mdr_art_83_0")],
+}
+
+def make_clients(drop_claim=None, fail_search=None, reject_schema=False, fail_single=None):
+    calls = {"single": 0, "batched": 0}
+
+    def chat(model, messages, timeout, response_format=None):
+        prompt = messages[-1]["content"]
+        if response_format is None:
+            calls["single"] += 1
+            if fail_single and f'"{fail_single}' in prompt:
+                raise RuntimeError("500 chat")
+            content = "**Status:** ❌ KRITISCH" if "Regel C" in prompt else "**Status:** ✅ KONFORM"
+        else:
+            calls["batched"] += 1
+            if reject_schema:
+                raise RuntimeError("400 response_format json_schema not supported")
+            claims = re.findall(r'\[claim_id (\d+)\] "(Regel \w)', prompt)
+            content = json.dumps({"verdicts": [
+                {"claim_id": int(n), "status": "WARNUNG", "begruendung": f"Batch {rule}", "zitat": "Art. 83"}
+                for n, rule in claims if rule != drop_claim
+            ]})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    def embed(input, model, dimensions, timeout):
+        texts = input if isinstance(input, list) else [input]
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[float(len(t)), 1.0]) for i, t in enumerate(texts)])
+
+    def search(text, vector, top, select):
+        if fail_search and text.startswith(fail_search):
+            raise RuntimeError("503 search")
+        return HITS[text[:7]]
+
+    chat_client, emb_client, retriever = MagicMock(), MagicMock(), MagicMock()
+    retriever.search.side_effect = search
+    chat_client.chat.completions.create.side_effect = chat
+    emb_client.embeddings.create.side_effect = embed
+    return chat_client, emb_client, retriever, calls
+
+CLAIMS_MD = "\n\n".join(f"### Claim: {rule}\n{rule}: Vorgabe {n}." for n, rule in enumerate(HITS))
+
+def run(tmp_path, batch_size, **failures):
+    chat_client, emb_client, retriever, calls = make_clients(**failures)
+    report = pipeline.audit_claims(CLAIMS_MD, retriever, emb_client, chat_client,
+                                   partial_report_path=str(tmp_path / "partial.md"), max_workers=2,
+                                   limiter=AdaptiveRateLimiter(rate=1000, max_rate=1000),
+                                   verdict_batch_size=batch_size)
+    return report, calls
+
+def test_batched_verdicts_are_split_back_per_claim(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "count_tokens", len)
+    report, calls = run(tmp_path, batch_size=3)
+    # A, B, D teilen Art. 83/84 -> ein Request; C allein -> Einzel-Prompt
+    assert calls == {"single": 1, "batched": 1}
+
+    entries = report.split("\n---\n")
+    assert [re.search(r"## Claim: (Regel \w)", e).group(1) for e in entries] == ["Regel A", "Regel B", "Regel C", "Regel D"]
+    assert "**Status:** ⚠️ WARNUNG\n**Begründung:** Batch Regel B" in entries[1]
+    assert "❌ KRITISCH" in entries[2]
+    assert open(tmp_path / "partial.md", encoding="utf-8").read().count("## Claim:") == 4
+
+def test_missing_verdict_falls_back_to_single_call(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "count_tokens", len)
+    report, calls = run(tmp_path, batch_size=3, drop_claim="Regel B")
+    assert calls == {"single": 2, "batched": 1}
+    assert "**SOP Text:**\n> Regel B: Vorgabe 1.\n\n**Status:** ✅ KONFORM" in report
+
+def test_batch_size_one_keeps_one_call_per_claim(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "count_tokens", len)
+    _, calls = run(tmp_path, batch_size=1)
+    assert calls == {"single": 4, "batched": 0}
+
+def test_failed_search_becomes_error_entry_for_that_claim(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "count_tokens", len)
+    for batch_size in (1, 3):
+        report, _ = run(tmp_path, batch_size=batch_size, fail_search="Regel B")
+        entries = report.split("\n---\n")
+        assert len(entries) == 4
+        assert "💥 ERROR (503 search)" in entries[1]
+        assert "Regel A" in entries[0] and "💥" not in entries[0] + entries[2] + entries[3]
+
+def test_rejected_group_request_falls_back_to_single_calls(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "count_tokens", len)
+    report, calls = run(tmp_path, batch_size=3, reject_schema=True)
+    assert calls == {"single": 4, "batched": 1}
+    entries = report.split("\n---\n")
+    assert "💥" not in report
+    assert "✅ KONFORM" in entries[0] and "❌ KRITISCH" in entries[2]
+
+def test_failed_single_fallback_keeps_group_verdicts(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "count_tokens", len)
+    # B fehlt in der Gruppen-Antwort, die Einzelprüfung von B scheitert -> nur B ist ein Fehler
+    report, calls = run(tmp_path, batch_size=3, drop_claim="Regel B", fail_single="Regel B")
+    assert calls == {"single": 2, "batched": 1}
+    entries = report.split("\n---\n")
+    assert "💥 ERROR (500 chat)" in entries[1]
+    assert "Batch Regel A" in entries[0] and "Batch Regel D" in entries[3]
+    assert "❌ KRITISCH" in entries[2]
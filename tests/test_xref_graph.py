@@ -0,0 +1,80 @@
+import os
+import sys
+import subprocess
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src_sop_auditor')))
+
+from src.xref_graph import XrefGraph
+from src.mdr_parser import LOCAL_MDR_PATH
+import sop_audit_pipeline as pipeline
+
+CHUNKS = [
+    {"id": "mdr_art_61_0", "source_type": "MDR", "title": "Artikel 61 - Klinische Bewertung (Part 1/2)",
+     "content": "Die klinische Bewertung erfolgt nach Anhang XIV Teil A."},
+    {"id": "mdr_art_61_1", "source_type": "MDR", "title": "Artikel 61 - Klinische Bewertung (Part 2/2)",
+     "content": "Die Nachbeobachtung ist Teil des Plans gemäß Artikel 84. Siehe auch Artikel 5 der Richtlinie 93/42/EWG."},
+    {"id": "mdr_art_84_0", "source_type": "MDR", "title": "Artikel 84 - Plan zur Überwachung",
+     "content": "Der Plan nach Anhang III Abschnitt 1.1 ist Teil der Dokumentation nach Anhang II."},
+    {"id": "mdr_anx_XIV_0", "source_type": "MDR", "title": "ANHANG XIV", "content": "KLINISCHE BEWERTUNG UND KLINISCHE NACHBEOBACHTUNG"},
+    {"id": "mdr_anx_III_0", "source_type": "MDR", "title": "ANHANG III", "content": "TECHNISCHE DOKUMENTATION ÜBER DIE ÜBERWACHUNG. Artikel 84."},
+    {"id": "mdcg_2020_7_0", "source_type": "MDCG", "title": "MDCG 2020-7", "content": "Gemäß Anhang XIV."},
+]
+
+def test_graph_links_elements_across_chunk_parts(tmp_path):
+    graph = XrefGraph.build(CHUNKS)
+    assert graph.nodes == ["art_61", "art_84", "anx_xiv", "anx_iii"]
+    assert graph.neighbors("art_61") == ["anx_xiv", "art_84"]
+    # Anhang II ist kein Knoten (nicht im Corpus) -> kein Verweis
+    assert graph.neighbors("art_84") == ["anx_iii"]
+    assert graph.edge_count == 4
+
+    graph.save(str(tmp_path / "xref"))
+    loaded = XrefGraph.load(str(tmp_path / "xref"))
+    assert loaded.neighbors("anx_iii") == ["art_84"]
+    assert loaded.titles[0] == "Artikel 61 - Klinische Bewertung"
+    assert XrefGraph.load(str(tmp_path / "fehlt")) is None
+
+def test_expand_adds_referenced_provisions_not_yet_retrieved():
+    graph = XrefGraph.build(CHUNKS)
+    hits = [dict(CHUNKS[0]), dict(CHUNKS[3])]
+    expansions = graph.expand(hits, limit=2)
+    assert [h["id"] for h in expansions] == ["mdr_art_84_0"]
+
+    # Im Claim genannte Vorschriften zuerst
+    expansions = graph.expand(hits, limit=2, claim="Die Dokumentation folgt Anhang III.")
+    assert [h["id"] for h in expansions] == ["mdr_anx_III_0", "mdr_art_84_0"]
+    assert graph.expand(hits, limit=0) == []
+
+def test_retrieve_references_appends_graph_expansion():
+    retriever = MagicMock()
+    retriever.search.return_value = [dict(CHUNKS[2], **{"@search.score": 1.0})]
+    hits = pipeline.retrieve_references("PMS-Plan", [1.0, 0.0], retriever, candidates=3,
+                                        xref_graph=XrefGraph.build(CHUNKS))
+    assert [h["id"] for h in hits] == ["mdr_art_84_0", "mdr_anx_III_0"]
+    assert retriever.search.call_count == 1
+
+def test_mdr_parser_script_imports_xref_graph(tmp_path):
+    # 'python src/mdr_parser.py' muss 'src' finden; Fehler enden mit Exit-Code statt still
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    result = subprocess.run([sys.executable, os.path.join("src", "mdr_parser.py")], cwd=root, capture_output=True,
+                            text=True, timeout=120, env={**os.environ, "OUTPUT_JSON_PATH": str(tmp_path)})
+    assert "No module named" not in result.stdout + result.stderr
+    if not os.path.exists(LOCAL_MDR_PATH):
+        assert "nicht gefunden" in result.stdout
+        assert result.returncode == 1
+
+def test_mdr_parser_writes_graph_next_to_chunks_from_env_file(tmp_path):
+    # OUTPUT_JSON_PATH nur in der .env: der Graph muss trotzdem neben den Chunks landen
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    env_file = tmp_path / ".env"
+    env_file.write_text(f'OUTPUT_JSON_PATH="{tmp_path / "chunks"}"\n')
+    probe = ("import sys, functools, dotenv; dotenv.load_dotenv = functools.partial(dotenv.load_dotenv, sys.argv[1]); "
+             "from src import mdr_parser; print(mdr_parser.OUTPUT_JSON_PATH); print(mdr_parser.XREF_GRAPH_PATH)")
+    env = {key: value for key, value in os.environ.items() if key not in ("OUTPUT_JSON_PATH", "XREF_GRAPH_PATH")}
+    result = subprocess.run([sys.executable, "-c", probe, str(env_file)], cwd=root, capture_output=True,
+                            text=True, timeout=120, env=env)
+    assert result.returncode == 0, result.stderr
+    chunks, graph = result.stdout.strip().splitlines()[-2:]
+    assert chunks == str(tmp_path / "chunks")
+    assert graph == os.path.join(chunks, "mdr_xref")
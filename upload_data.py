@@ -1,10 +1,11 @@
 import json
 import os
 import time
+import argparse
+from functools import lru_cache
 from dotenv import load_dotenv  # Import this
-from azure.core.credentials import AzureKeyCredential
-from azure.search.documents import SearchClient
-from openai import AzureOpenAI
+from src.json_stream import iter_json_array
+from src.quota_governor import govern
 
 # Load environment variables from .env file
 load_dotenv()
@@ -20,32 +21,44 @@ AOAI_ENDPOINT = os.getenv("AZURE_OPENAI_EMBEDDING_ENDPOINT")
 AOAI_KEY = os.getenv("AZURE_OPENAI_EMBEDDING_KEY")
 AOAI_DEPLOYMENT = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT")
 AOAI_API_VERSION = os.getenv("AZURE_OPENAI_EMBEDDING_API_VERSION")
+AOAI_DIMENSIONS = int(os.getenv("AZURE_OPENAI_EMBEDDING_DIMENSIONS", "3072"))
+
+# Streaming Mode Limits (Azure AI Search: max. 1000 Dokumente bzw. 16 MB pro Request)
+STREAM_BATCH_SIZE = 50
+STREAM_MAX_BATCH_BYTES = 8 * 1024 * 1024
+
+# --- 2. CLIENTS (lazy: erst beim ersten Embedding/Upload, nicht beim Import) ---
+def check_config():
+    # Safety Check: Stop if keys are missing
+    if not SEARCH_KEY or not AOAI_KEY:
+        raise ValueError("❌ CRITICAL ERROR: API Keys not found. Did you create the .env file?")
+
+@lru_cache(maxsize=None)
+def get_search_client():
+    from azure.core.credentials import AzureKeyCredential
+    from azure.search.documents import SearchClient
+    check_config()
+    return SearchClient(
+        endpoint=SEARCH_ENDPOINT,
+        index_name=INDEX_NAME,
+        credential=AzureKeyCredential(SEARCH_KEY)
+    )
 
-# Safety Check: Stop if keys are missing
-if not SEARCH_KEY or not AOAI_KEY:
-    raise ValueError("❌ CRITICAL ERROR: API Keys not found. Did you create the .env file?")
-
-# --- 2. INITIALIZE CLIENTS ---
-print("--- CONFIGURATION CHECK ---")
-print(f"OpenAI Endpoint: {AOAI_ENDPOINT}")
-print(f"OpenAI Deployment: {AOAI_DEPLOYMENT}")
-print(f"OpenAI Version: {AOAI_API_VERSION}")
-print("---------------------------")
-
-# Search Client
-search_client = SearchClient(
-    endpoint=SEARCH_ENDPOINT,
-    index_name=INDEX_NAME,
-    credential=AzureKeyCredential(SEARCH_KEY)
-)
-
-# OpenAI Client
-# CRITICAL: This must use the variables defined above
-openai_client = AzureOpenAI(
-    azure_endpoint=AOAI_ENDPOINT,
-    api_key=AOAI_KEY,
-    api_version=AOAI_API_VERSION
-)
+@lru_cache(maxsize=None)
+def get_openai_client():
+    from openai import AzureOpenAI
+    check_config()
+    print("--- CONFIGURATION CHECK ---")
+    print(f"OpenAI Endpoint: {AOAI_ENDPOINT}")
+    print(f"OpenAI Deployment: {AOAI_DEPLOYMENT}")
+    print(f"OpenAI Version: {AOAI_API_VERSION}")
+    print("---------------------------")
+    # CRITICAL: This must use the variables defined above
+    return govern(AzureOpenAI(
+        azure_endpoint=AOAI_ENDPOINT,
+        api_key=AOAI_KEY,
+        api_version=AOAI_API_VERSION
+    ), "batch")
 
 # --- 3. HELPER FUNCTIONS ---
 def generate_embeddings(text):
@@ -54,13 +67,85 @@ def generate_embeddings(text):
     safe_text = text[:8000] 
     
     # CRITICAL: This must use the AOAI_DEPLOYMENT variable
-    response = openai_client.embeddings.create(
+    response = get_openai_client().embeddings.create(
         input=safe_text,
-        model=AOAI_DEPLOYMENT
+        model=AOAI_DEPLOYMENT,
+        dimensions=AOAI_DIMENSIONS
     )
     return response.data[0].embedding
 
-# --- 4. MAIN UPLOAD PROCESS ---
+def build_document(item, vector):
+    """Mappt einen Chunk aus compliance_data.json auf die Index-Felder."""
+    return {
+        "id": item.get("id"),
+        "title": item.get("title", "No Title"),
+        "content": item.get("content", ""),
+        "source_type": item.get("source_type", "MDR"),
+        "url": item.get("url", ""),
+        "chapter": item.get("chapter", ""),
+        "valid_from": item.get("valid_from", None),
+        "contentVector": vector
+    }
+
+def upload_batch(documents):
+    """Lädt einen Batch hoch. Rückgabe: (succeeded, failed)."""
+    try:
+        result = get_search_client().upload_documents(documents=documents)
+        succeeded = sum([1 for r in result if r.succeeded])
+        return succeeded, len(documents) - succeeded
+    except Exception as e:
+        print(f"\n   ❌ Batch Upload Error: {e}")
+        return 0, len(documents)
+
+# --- 4. STREAMING UPLOAD (Bounded Memory) ---
+def stream_upload(path, batch_size=STREAM_BATCH_SIZE, max_batch_bytes=STREAM_MAX_BATCH_BYTES):
+    """
+    Liest die Chunks inkrementell aus der JSON-Datei und lädt sie in begrenzten Batches hoch.
+    Im Speicher liegt höchstens ein Batch (batch_size Dokumente bzw. max_batch_bytes),
+    egal wie groß der Corpus ist.
+    """
+    print(f"Streaming {path} (Batch: {batch_size} Docs / {max_batch_bytes // (1024 * 1024)} MB)...")
+
+    batch = []
+    batch_bytes = 0
+    processed = succeeded = failed = skipped = 0
+
+    for item in iter_json_array(path):
+        processed += 1
+        doc_id = item.get("id")
+        content_text = item.get("content", "")
+
+        vector = []
+        if content_text:
+            try:
+                vector = generate_embeddings(content_text)
+            except Exception as e:
+                print(f"\n   ❌ Vector Failed ({doc_id}): {e}")
+                skipped += 1
+                continue
+
+        doc = build_document(item, vector)
+        doc_bytes = len(json.dumps(doc, ensure_ascii=False).encode("utf-8"))
+
+        # Batch voll (Anzahl oder Payload-Größe) -> erst hochladen, dann weiterpuffern
+        if batch and (len(batch) >= batch_size or batch_bytes + doc_bytes > max_batch_bytes):
+            ok, nok = upload_batch(batch)
+            succeeded += ok
+            failed += nok
+            print(f"[{processed}] ⬆️ Batch: {ok} ✅ / {nok} ❌")
+            batch, batch_bytes = [], 0
+
+        batch.append(doc)
+        batch_bytes += doc_bytes
+
+    if batch:
+        ok, nok = upload_batch(batch)
+        succeeded += ok
+        failed += nok
+
+    print(f"Upload Complete! ✅ Succeeded: {succeeded}, ❌ Failed: {failed}, ⚠️ Skipped (Vector Failed): {skipped}")
+
+# --- 5. MAIN UPLOAD PROCESS (Legacy: alles puffern, ein Upload) ---
 def main():
     print("Loading data.json...")
     try:
@@ -130,7 +215,7 @@ def main():
     print(f"\nUploading {len(documents_to_upload)} documents to Azure Search...")
     
     try:
-        result = search_client.upload_documents(documents=documents_to_upload)
+        result = get_search_client().upload_documents(documents=documents_to_upload)
         succeeded = sum([1 for r in result if r.succeeded])
         failed = sum([1 for r in result if not r.succeeded])
         print(f"Upload Complete! ✅ Succeeded: {succeeded}, ❌ Failed: {failed}")
@@ -138,4 +223,13 @@ def main():
         print(f"Upload Error: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Embeddings erzeugen und Chunks nach Azure Search hochladen")
+    parser.add_argument("--stream", action="store_true", help="Chunks inkrementell lesen und in begrenzten Batches hochladen")
+    parser.add_argument("--input", default="output/compliance_data.json", help="JSON-Array mit Chunks (nur --stream)")
+    parser.add_argument("--batch-size", type=int, default=STREAM_BATCH_SIZE, help="Max. Dokumente pro Upload-Request")
+    args = parser.parse_args()
+
+    if args.stream:
+        stream_upload(args.input, batch_size=args.batch_size)
+    else:
+        main()
\ No newline at end of file